@@ -1,29 +1,42 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.core.security import decode_access_token
+from app.database import SessionLocal
+from app.core.security import STREAM_TOKEN_SCOPE, decode_access_token
+from app.core.auth_cache import auth_cache
 from app.models.database import User
 
 security = HTTPBearer()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
-    token = credentials.credentials
+def authenticate_token(token: str, db: Optional[Session] = None) -> User:
+    """
+    Resolve a bearer token to an active user, raising HTTPException otherwise
+    
+    Verified tokens are served from the auth cache; a DB session (`db`, or a
+    short-lived one) is only used on a miss.
+    """
+    user = auth_cache.get(token)
+    if user is not None:
+        return user
+    
     payload = decode_access_token(token)
     
     user_id = payload.get("sub")
-    if user_id is None:
+    # Scoped tokens (e.g. stream tokens) are not logins
+    if user_id is None or payload.get("scope") is not None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials"
         )
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
+    session = db or SessionLocal()
+    try:
+        user = session.query(User).filter(User.id == int(user_id)).first()
+    finally:
+        if db is None:
+            session.close()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,12 +45,32 @@ async def get_current_user(
     
     if not user.is_active:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_403_FORBIDDEN,
             detail="Inactive user"
         )
     
+    auth_cache.put(token, user, payload.get("exp"))
     return user
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> User:
+    """Get current authenticated user"""
+    return authenticate_token(credentials.credentials)
+
+async def verify_stream_token(job_id: str, token: str = Query(...)):
+    """
+    Check the ?token= of a video job stream, for media elements that cannot send headers
+    
+    Only tokens issued for this job's stream are accepted, never a login token.
+    """
+    payload = decode_access_token(token)
+    if payload.get("scope") != STREAM_TOKEN_SCOPE or payload.get("job") != job_id or payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid stream token"
+        )
+
 async def get_current_admin_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
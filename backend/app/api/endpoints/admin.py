@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List
 
 from app.database import get_db
 from app.api.deps import get_current_admin_user
-from app.models.database import User, Detection, ModelConfig
-from app.models.schemas import SystemStats, UserStats, ModelListResponse, ModelSwitchRequest
+from app.models.database import User, Detection, ModelConfig, UserDetectionStats
+from app.models.schemas import SystemStats, UserStats, ModelListResponse, ModelSwitchRequest, BackendSwitchRequest, QuantizeRequest, UserUpdate
+from app.models.schemas import User as UserSchema
+from app.core.auth_cache import auth_cache
+from app.services.detected_objects import delete_objects
+from app.services.frame_store import sidecar_path
 from app.core.config import settings
+from app.services.onnx_backend import BACKENDS
 import psutil
 import time
 
@@ -40,35 +46,136 @@ async def get_system_stats(
         uptime=uptime_str
     )
 
+@router.get("/inference")
+async def get_inference_stats(
+    request: Request,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Get inference queue depth, wait times, batching and model pool counters (admin only)
+    """
+    yolo_service = request.app.state.yolo_service
+    
+    return {
+        "pools": [
+            request.app.state.inference_pool.get_stats(),
+            request.app.state.video_pool.get_stats()
+        ],
+        "batching": yolo_service.batcher.get_stats() if yolo_service.batcher else None,
+        "file_writer": request.app.state.file_writer.get_stats(),
+        "annotation_renderer": request.app.state.annotation_renderer.get_stats(),
+        "auth_cache": auth_cache.get_stats(),
+        "detection_writer": request.app.state.detection_writer.get_stats() if request.app.state.detection_writer else None,
+        "model_pool": {
+            **yolo_service.registry.get_stats(),
+            "models": yolo_service.registry.loaded_models()
+        }
+    }
+
+@router.get("/cache")
+async def get_cache_stats(
+    request: Request,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Get detection result cache hit/miss counters (admin only)
+    """
+    cache = request.app.state.yolo_service.cache
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.get_stats()}
+
+@router.delete("/cache")
+async def clear_cache(
+    request: Request,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Drop every cached detection result (admin only)
+    """
+    cache = request.app.state.yolo_service.cache
+    if cache is not None:
+        cache.clear()
+    return {"message": "Detection cache cleared"}
+
+# sort_by values -> columns of the users/user_detection_stats join
+USER_STATS_SORT_COLUMNS = {
+    "user_id": User.id,
+    "username": User.username,
+    "total_detections": func.coalesce(UserDetectionStats.detection_count, 0),
+    "total_objects": func.coalesce(UserDetectionStats.total_objects, 0),
+    "total_processing_time": func.coalesce(UserDetectionStats.total_processing_time, 0.0),
+    "last_detection": UserDetectionStats.last_detection_at
+}
+
 @router.get("/users", response_model=List[UserStats])
 async def get_users_stats(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    sort_by: str = Query("user_id"),
+    order: str = Query("asc"),
     current_admin: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
 ):
     """
     Get user statistics (admin only)
+    
+    Reads the incrementally maintained user_detection_stats table in one
+    paginated query; the total number of users is in X-Total-Count.
+    """
+    if sort_by not in USER_STATS_SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort_by. Allowed: {list(USER_STATS_SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order. Allowed: ['asc', 'desc']")
+    
+    column = USER_STATS_SORT_COLUMNS[sort_by]
+    rows = db.query(User.id, User.username, UserDetectionStats)\
+        .outerjoin(UserDetectionStats, UserDetectionStats.user_id == User.id)\
+        .order_by(column.desc() if order == "desc" else column.asc(), User.id.asc())\
+        .offset(skip)\
+        .limit(limit)\
+        .all()
+    response.headers["X-Total-Count"] = str(db.query(func.count(User.id)).scalar())
+    
+    return [
+        UserStats(
+            user_id=user_id,
+            username=username,
+            total_detections=stats.detection_count if stats else 0,
+            last_detection=stats.last_detection_at if stats else None,
+            total_objects=stats.total_objects if stats else 0,
+            total_processing_time=stats.total_processing_time if stats else 0.0
+        )
+        for user_id, username, stats in rows
+    ]
+
+@router.patch("/users/{user_id}", response_model=UserSchema)
+async def update_user(
+    user_id: int,
+    update: UserUpdate,
+    current_admin: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
     """
-    users = db.query(User).all()
-    
-    user_stats = []
-    for user in users:
-        detection_count = db.query(func.count(Detection.id))\
-            .filter(Detection.user_id == user.id)\
-            .scalar()
-        
-        last_detection_obj = db.query(Detection)\
-            .filter(Detection.user_id == user.id)\
-            .order_by(Detection.created_at.desc())\
-            .first()
-        
-        user_stats.append(UserStats(
-            user_id=user.id,
-            username=user.username,
-            total_detections=detection_count,
-            last_detection=last_detection_obj.created_at if last_detection_obj else None
-        ))
-    
-    return user_stats
+    Activate/deactivate a user or change their admin role (admin only)
+    
+    Cached logins of the user are invalidated when the change is committed.
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if user.id == current_admin.id and (update.is_active is False or update.is_admin is False):
+        raise HTTPException(status_code=400, detail="Admins cannot deactivate or demote themselves")
+    
+    if update.is_active is not None:
+        user.is_active = update.is_active
+    if update.is_admin is not None:
+        user.is_admin = update.is_admin
+    db.commit()
+    db.refresh(user)
+    
+    return user
 
 @router.get("/models", response_model=ModelListResponse)
 async def list_models(
@@ -83,13 +190,22 @@ async def list_models(
     
     model_info_list = []
     for model in available_models:
+        # Class lists are only known for models resident in the pool
+        loaded = yolo_service.registry.peek(model["name"])
         model_info_list.append({
             "model_name": model["name"],
             "model_path": model["path"],
-            "description": f"YOLOv8 model: {model['name']}",
+            "description": (
+                f"{model['quantization'].upper()} variant of {model['variant_of'] or 'unknown model'}"
+                if model.get("quantization") else f"YOLOv8 model: {model['name']}"
+            ),
             "is_active": model["is_current"],
-            "classes_count": len(yolo_service.model.names) if model["is_current"] else 0,
-            "classes": list(yolo_service.model.names.values()) if model["is_current"] else []
+            "is_loaded": loaded is not None,
+            "classes_count": len(loaded.names) if loaded else 0,
+            "classes": list(loaded.names.values()) if loaded else [],
+            "variant_of": model.get("variant_of"),
+            "quantization": model.get("quantization"),
+            "report": model.get("report")
         })
     
     return ModelListResponse(
@@ -97,6 +213,38 @@ async def list_models(
         current_model=yolo_service.current_model
     )
 
+@router.post("/models/quantize")
+async def quantize_model(
+    request: Request,
+    quantize_request: QuantizeRequest,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Build an INT8 variant of a model and report latency and accuracy vs FP32 (admin only)
+    """
+    yolo_service = request.app.state.yolo_service
+    
+    try:
+        report = await run_in_threadpool(
+            yolo_service.quantize_model,
+            quantize_request.model_name,
+            quantize_request.mode,
+            quantize_request.calibration_dir
+        )
+        return {
+            "success": True,
+            "message": f"Created {report['variant']}",
+            "report": report
+        }
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Model file not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ImportError:
+        raise HTTPException(status_code=400, detail="Quantization requires the onnx and onnxruntime packages")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Quantization failed: {str(e)}")
+
 @router.post("/switch-model")
 async def switch_model(
     request: Request,
@@ -120,8 +268,48 @@ async def switch_model(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load model: {str(e)}")
 
+@router.get("/backend")
+async def get_backend(
+    request: Request,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Get the active inference backend (admin only)
+    """
+    yolo_service = request.app.state.yolo_service
+    
+    return {
+        "backend": yolo_service.registry.backend,
+        "available_backends": list(BACKENDS)
+    }
+
+@router.post("/backend")
+async def switch_backend(
+    request: Request,
+    backend_request: BackendSwitchRequest,
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Switch between the PyTorch and ONNX Runtime inference backends (admin only)
+    """
+    yolo_service = request.app.state.yolo_service
+    
+    try:
+        # First switch to onnx may export the model, so keep it off the event loop
+        result = await run_in_threadpool(yolo_service.set_backend, backend_request.backend)
+        return {
+            "success": True,
+            "message": f"Backend switched to {backend_request.backend}",
+            **result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to switch backend: {str(e)}")
+
 @router.delete("/detection/{detection_id}")
 async def delete_detection(
+    request: Request,
     detection_id: int,
     current_admin: User = Depends(get_current_admin_user),
     db: Session = Depends(get_db)
@@ -140,7 +328,12 @@ async def delete_detection(
         Path(detection.file_path).unlink()
     if detection.result_path and Path(detection.result_path).exists():
         Path(detection.result_path).unlink()
+    if detection.result_path:
+        sidecar_path(detection.result_path).unlink(missing_ok=True)
+        # A deferred render would otherwise be attempted from the deleted source
+        request.app.state.annotation_renderer.discard(Path(detection.result_path).name)
     
+    delete_objects(db, detection.id)
     db.delete(detection)
     db.commit()
     
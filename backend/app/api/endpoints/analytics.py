@@ -0,0 +1,171 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional
+
+from app.database import get_db
+from app.api.deps import get_current_user
+from app.models.database import User, Detection, DetectedObjectRecord
+from app.models.schemas import ObjectSearchResult, ClassCount, DetectionHistory
+
+router = APIRouter()
+
+GROUP_BY_OPTIONS = ("class", "day", "hour", "class_day", "class_hour")
+PERIOD_FORMATS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%d %H:00"}
+
+def _object_filters(
+    query,
+    current_user: User,
+    all_users: bool,
+    class_name: Optional[List[str]],
+    min_confidence: Optional[float],
+    start: Optional[datetime],
+    end: Optional[datetime]
+):
+    """Apply the shared filters; all_users is only honoured for admins"""
+    if not (all_users and current_user.is_admin):
+        query = query.filter(DetectedObjectRecord.user_id == current_user.id)
+    if class_name:
+        query = query.filter(DetectedObjectRecord.class_name.in_(class_name))
+    if min_confidence is not None:
+        query = query.filter(DetectedObjectRecord.confidence >= min_confidence)
+    if start is not None:
+        query = query.filter(DetectedObjectRecord.created_at >= start)
+    if end is not None:
+        query = query.filter(DetectedObjectRecord.created_at < end)
+    return query
+
+def _period(db: Session, granularity: str):
+    """SQL expression bucketing created_at into day/hour strings"""
+    column = DetectedObjectRecord.created_at
+    if db.bind.dialect.name == "postgresql":
+        return func.to_char(column, "YYYY-MM-DD" if granularity == "day" else "YYYY-MM-DD HH24:00")
+    return func.strftime(PERIOD_FORMATS[granularity], column)
+
+@router.get("/objects", response_model=List[ObjectSearchResult])
+async def search_objects(
+    class_name: Optional[List[str]] = Query(None),
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    all_users: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Search individual detected objects, newest first
+    
+    e.g. ?class_name=truck&min_confidence=0.8. Admins can pass all_users=true.
+    """
+    query = db.query(
+        DetectedObjectRecord.detection_id,
+        Detection.file_name,
+        Detection.model_used,
+        DetectedObjectRecord.class_name,
+        DetectedObjectRecord.confidence,
+        DetectedObjectRecord.x1,
+        DetectedObjectRecord.y1,
+        DetectedObjectRecord.x2,
+        DetectedObjectRecord.y2,
+        DetectedObjectRecord.created_at
+    ).join(Detection, Detection.id == DetectedObjectRecord.detection_id)
+    query = _object_filters(query, current_user, all_users, class_name, min_confidence, start, end)
+    rows = query.order_by(DetectedObjectRecord.created_at.desc(), DetectedObjectRecord.id.desc())\
+        .offset(skip)\
+        .limit(limit)\
+        .all()
+    
+    return [
+        ObjectSearchResult(
+            detection_id=row.detection_id,
+            file_name=row.file_name,
+            model_used=row.model_used,
+            class_name=row.class_name,
+            confidence=row.confidence,
+            bbox=[row.x1, row.y1, row.x2, row.y2],
+            created_at=row.created_at
+        )
+        for row in rows
+    ]
+
+@router.get("/detections", response_model=List[DetectionHistory])
+async def search_detections(
+    class_name: Optional[List[str]] = Query(None),
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    min_count: int = Query(1, ge=1),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    all_users: bool = False,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Detections containing at least `min_count` matching objects, newest first
+    
+    e.g. images with a truck above 0.8 confidence: ?class_name=truck&min_confidence=0.8
+    """
+    matching = db.query(DetectedObjectRecord.detection_id)
+    matching = _object_filters(matching, current_user, all_users, class_name, min_confidence, start, end)
+    matching = matching.group_by(DetectedObjectRecord.detection_id)\
+        .having(func.count(DetectedObjectRecord.id) >= min_count)
+    
+    columns = [getattr(Detection, name) for name in DetectionHistory.model_fields]
+    return db.query(*columns)\
+        .filter(Detection.id.in_(matching.statement))\
+        .order_by(Detection.created_at.desc(), Detection.id.desc())\
+        .offset(skip)\
+        .limit(limit)\
+        .all()
+
+@router.get("/counts", response_model=List[ClassCount])
+async def count_objects(
+    group_by: str = "class",
+    class_name: Optional[List[str]] = Query(None),
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    all_users: bool = False,
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Aggregate object counts by class and/or time bucket (UTC)
+    
+    e.g. persons per day: ?class_name=person&group_by=class_day
+    """
+    if group_by not in GROUP_BY_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid group_by. Allowed: {list(GROUP_BY_OPTIONS)}")
+    
+    keys = []
+    if group_by.startswith("class"):
+        keys.append(DetectedObjectRecord.class_name.label("class_name"))
+    granularity = group_by.split("_")[-1]
+    if granularity in PERIOD_FORMATS:
+        keys.append(_period(db, granularity).label("period"))
+    
+    query = db.query(
+        *keys,
+        func.count(DetectedObjectRecord.id).label("count"),
+        func.count(func.distinct(DetectedObjectRecord.detection_id)).label("detections"),
+        func.avg(DetectedObjectRecord.confidence).label("avg_confidence")
+    )
+    query = _object_filters(query, current_user, all_users, class_name, min_confidence, start, end)
+    order = [key.desc() if key.name == "period" else key for key in keys]
+    rows = query.group_by(*keys).order_by(*order).limit(limit).all()
+    
+    return [
+        ClassCount(
+            class_name=getattr(row, "class_name", None),
+            period=getattr(row, "period", None),
+            count=row.count,
+            detections=row.detections,
+            avg_confidence=round(float(row.avg_confidence or 0.0), 4)
+        )
+        for row in rows
+    ]
@@ -1,25 +1,147 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request, Form
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Request, Form, WebSocket, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 from pathlib import Path
-import shutil
+import asyncio
+import base64
+import json
+import math
 import time
-from typing import Optional
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
 import cv2
 import numpy as np
 
-from app.database import get_db
-from app.api.deps import get_current_user
-from app.models.database import User, Detection
-from app.models.schemas import DetectionResponse, DetectedObject, DetectionHistory
+from app.database import get_db, SessionLocal
+from app.api.deps import get_current_user, verify_stream_token, authenticate_token
+from app.models.database import User, Detection, VideoJob
+from app.models.schemas import DetectionResponse, DetectionHistory, VideoJobStatus, VideoStreamToken, VideoDetections, VideoFrameDetections
 from app.core.config import settings
+from app.core.security import create_stream_token
+from app.services.inference_pool import InferenceQueueFull
+from app.services.video_jobs import TERMINAL_STATUSES
+from app.services.tracking import TRACKER_TYPES
+from app.core.metrics import StageTimer, record_request, record_error
+from app.services.yolo_service import IMAGE_FORMATS
+from app.services.detection_batch import DetectionBatch
+from app.services.detected_objects import object_rows
+from app.services.detection_writer import save_detection
+from app.services.frame_store import FrameDetectionReader, sidecar_path
+from app.services.upload_ingest import IMAGE_KINDS, VIDEO_KINDS, IngestedUpload, UploadTooLarge, ingest_upload
+from app.services.wire_format import WIRE_FORMATS, available_formats, encode_detections, negotiate
+
+IMAGE_RESPONSE_MODES = ("base64", "url", "preview", "multipart")
+STREAM_CHUNK_SIZE = 256 * 1024
 
 router = APIRouter()
 
-async def save_upload_file(upload_file: UploadFile, destination: Path) -> Path:
-    """Save uploaded file to destination"""
-    with destination.open("wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-    return destination
+def _queue_full_error(exc: InferenceQueueFull) -> HTTPException:
+    """Translate a saturated inference queue into a 503 with Retry-After"""
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy processing other detections, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+def _validate_frame_skipping(frame_stride: int, tracker: str):
+    """Reject out-of-range stride or unknown tracker options"""
+    if not 1 <= frame_stride <= settings.MAX_FRAME_STRIDE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"frame_stride must be between 1 and {settings.MAX_FRAME_STRIDE}"
+        )
+    if tracker not in TRACKER_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid tracker. Allowed: {list(TRACKER_TYPES)}"
+        )
+
+def _resolve_model(request: Request, model: Optional[str]) -> str:
+    """Pick the requested model (or the default) and reject unknown names"""
+    yolo_service = request.app.state.yolo_service
+    if not model:
+        return yolo_service.current_model
+    if not yolo_service.is_model_available(model):
+        raise HTTPException(status_code=400, detail=f"Unknown model: {model}")
+    return model
+
+def _detection_meta(
+    file_name: str,
+    file_type: str,
+    model_name: str,
+    processing_time: float,
+    result_url: Optional[str] = None,
+    annotated_image: Optional[str] = None,
+    **extra
+) -> dict:
+    """Scalar DetectionResponse fields; objects are added by the wire encoder"""
+    return {
+        "success": True,
+        "file_name": file_name,
+        "file_type": file_type,
+        "model_used": model_name,
+        "processing_time": processing_time,
+        "result_url": result_url,
+        "annotated_image": annotated_image,
+        "pipeline_stats": None,
+        **extra
+    }
+
+def _encoded_response(request: Request, meta: dict, detections: DetectionBatch) -> Response:
+    """
+    Detection result in the format the Accept header asks for (JSON, MessagePack
+    or packed arrays), serialized straight from the columnar detections without
+    building and re-validating pydantic models
+    """
+    fmt = negotiate(request.headers.get("accept"))
+    return Response(
+        encode_detections(fmt, meta, detections),
+        media_type=WIRE_FORMATS[fmt],
+        headers={"Vary": "Accept"}
+    )
+
+def _multipart_response(body: bytes, image: bytes, image_format: str, filename: str) -> Response:
+    """multipart/mixed response: the JSON detection result followed by the raw annotated image"""
+    boundary = uuid.uuid4().hex
+    parts = [
+        f"--{boundary}\r\nContent-Type: application/json\r\n\r\n".encode(),
+        body,
+        (
+            f"\r\n--{boundary}\r\nContent-Type: image/{image_format}\r\n"
+            f"Content-Disposition: attachment; filename=\"{filename}\"\r\n\r\n"
+        ).encode(),
+        image,
+        f"\r\n--{boundary}--\r\n".encode()
+    ]
+    return Response(b"".join(parts), media_type=f"multipart/mixed; boundary={boundary}")
+
+def _save_detection(request: Request, db: Session, objects: Optional[list] = None, **values):
+    """Record a Detection row and its detected_objects rows, through the write-behind queue when it is enabled"""
+    save_detection(db, request.app.state.detection_writer, objects, **values)
+
+async def ingest_upload_file(
+    upload_file: UploadFile,
+    kinds: Tuple[str, ...],
+    destination: Optional[Path] = None
+) -> IngestedUpload:
+    """Copy an upload (to disk or memory) in one pass, enforcing MAX_FILE_SIZE and checking its magic bytes"""
+    try:
+        upload = await ingest_upload(
+            upload_file,
+            destination,
+            max_size=settings.MAX_FILE_SIZE,
+            chunk_size=settings.UPLOAD_CHUNK_SIZE
+        )
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    if upload.kind not in kinds:
+        if destination:
+            destination.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail=f"File content is not a supported format. Allowed: {list(kinds)}")
+    return upload
 
 @router.post("/image", response_model=DetectionResponse)
 async def detect_image(
@@ -27,11 +149,23 @@ async def detect_image(
     file: UploadFile = File(...),
     confidence: Optional[float] = Form(0.25),
     iou: Optional[float] = Form(0.45),
+    model: Optional[str] = Form(None),
+    response_mode: Optional[str] = Form(None),
+    image_format: Optional[str] = Form(None),
+    annotate: Optional[bool] = Form(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Detect objects in an uploaded image
+    
+    response_mode picks how the annotated image is delivered: "base64" (inline
+    data URI), "url" (result_url only), "preview" (downscaled data URI plus
+    result_url) or "multipart" (JSON part followed by the raw image).
+    image_format is "jpeg" or "webp".
+    
+    With annotate=false only the detections are returned; result_url is
+    rendered the first time it is fetched.
     """
     # Validate file extension
     file_ext = Path(file.filename).suffix.lower()
@@ -40,75 +174,134 @@ async def detect_image(
             status_code=400,
             detail=f"Invalid file type. Allowed: {settings.ALLOWED_IMAGE_EXTENSIONS}"
         )
+    model_name = _resolve_model(request, model)
+    response_mode = response_mode or settings.IMAGE_RESPONSE_MODE
+    image_format = image_format or settings.RESULT_IMAGE_FORMAT
+    if response_mode not in IMAGE_RESPONSE_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid response_mode. Allowed: {list(IMAGE_RESPONSE_MODES)}")
+    if image_format not in IMAGE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid image_format. Allowed: {list(IMAGE_FORMATS)}")
+    if response_mode in ("url", "preview") and not settings.PERSIST_IMAGE_FILES:
+        raise HTTPException(status_code=400, detail=f"response_mode '{response_mode}' requires stored result files")
+    annotate = settings.ANNOTATE_BY_DEFAULT if annotate is None else annotate
+    if not annotate and response_mode in ("preview", "multipart"):
+        raise HTTPException(status_code=400, detail=f"response_mode '{response_mode}' requires annotate=true")
     
-    # Save uploaded file
+    timer = StageTimer()
+    
+    # Read uploaded file (its hash, taken while reading, also addresses the result cache)
+    with timer.stage("upload_read"):
+        upload = await ingest_upload_file(file, IMAGE_KINDS)
+    contents = upload.data
     timestamp = int(time.time())
     filename = f"{current_user.id}_{timestamp}_{file.filename}"
     file_path = settings.UPLOAD_DIR / filename
-    await save_upload_file(file, file_path)
+    
+    # Upload and result are persisted off the request path (or not at all)
+    persist = settings.PERSIST_IMAGE_FILES
+    file_writer = request.app.state.file_writer
     
     try:
         # Get YOLO service from app state
         yolo_service = request.app.state.yolo_service
+        result_filename = f"result_{Path(filename).stem}{IMAGE_FORMATS[image_format]}"
+        result_path = settings.RESULTS_DIR / result_filename
         
-        # Perform detection
-        detections, annotated_image, processing_time = yolo_service.detect_image(
-            str(file_path),
-            confidence=confidence,
-            iou=iou
-        )
+        def process():
+            # Perform detection straight from the uploaded bytes (served from the cache for repeat uploads)
+            detections, annotated_bytes, processing_time, _ = yolo_service.detect_image_bytes(
+                contents,
+                confidence=confidence,
+                iou=iou,
+                content_hash=upload.sha256,
+                model_name=model_name,
+                timer=timer,
+                image_format=image_format,
+                annotate=annotate
+            )
+            
+            # Only inline modes pay for base64; it reuses the already encoded image
+            annotated_inline = None
+            if response_mode == "base64" and annotate:
+                with timer.stage("base64"):
+                    annotated_inline = yolo_service.to_data_uri(annotated_bytes, image_format)
+            elif response_mode == "preview":
+                with timer.stage("preview"):
+                    preview = yolo_service.make_preview(
+                        annotated_bytes,
+                        settings.PREVIEW_MAX_DIMENSION,
+                        settings.PREVIEW_QUALITY,
+                        image_format
+                    )
+                    annotated_inline = yolo_service.to_data_uri(preview, image_format)
+            return detections, annotated_bytes, annotated_inline, processing_time
         
-        # Save annotated result
-        result_filename = f"result_{filename}"
-        result_path = settings.RESULTS_DIR / result_filename
-        cv2.imwrite(str(result_path), annotated_image)
+        # Run off the event loop in the bounded inference pool
+        detections, annotated_bytes, annotated_inline, processing_time = await request.app.state.inference_pool.run(process)
+        
+        if persist:
+            with timer.stage("file_write"):
+                file_writer.write(file_path, contents)
+                if annotate:
+                    file_writer.write(result_path, annotated_bytes)
+                else:
+                    # Rendered from the stored upload when result_url is first fetched
+                    request.app.state.annotation_renderer.defer_image(result_path, file_path, detections)
         
-        # Encode annotated image to base64
-        annotated_base64 = yolo_service.encode_image_to_base64(annotated_image)
+        # Per-object dicts are built once, only at the edge
+        with timer.stage("serialize"):
+            detected_dicts = detections.to_dicts()
         
         # Save detection to database
-        detection_record = Detection(
-            user_id=current_user.id,
-            file_name=file.filename,
-            file_type="image",
-            file_path=str(file_path),
-            result_path=str(result_path),
-            model_used=yolo_service.current_model,
-            confidence_threshold=confidence,
-            objects_detected=[
-                {
-                    "class_name": d["class_name"],
-                    "confidence": d["confidence"],
-                    "bbox": d["bbox"]
-                } for d in detections
-            ],
-            total_objects=len(detections),
-            processing_time=processing_time
-        )
-        db.add(detection_record)
-        db.commit()
+        with timer.stage("db_write"):
+            _save_detection(
+                request,
+                db,
+                user_id=current_user.id,
+                file_name=file.filename,
+                file_type="image",
+                file_path=str(file_path) if persist else None,
+                result_path=str(result_path) if persist else None,
+                model_used=model_name,
+                confidence_threshold=confidence,
+                objects_detected=detected_dicts,
+                total_objects=len(detections),
+                processing_time=processing_time,
+                objects=object_rows(detections)
+            )
         
         # Prepare response
-        detected_objects = [
-            DetectedObject(**d) for d in detections
-        ]
+        with timer.stage("serialize"):
+            meta = _detection_meta(
+                file.filename,
+                "image",
+                model_name,
+                processing_time,
+                result_url=f"/results/{result_filename}" if persist else None,
+                annotated_image=annotated_inline
+            )
+            if response_mode == "multipart":
+                response = _multipart_response(
+                    encode_detections("json", meta, detections),
+                    annotated_bytes,
+                    image_format,
+                    result_filename
+                )
+            else:
+                response = _encoded_response(request, meta, detections)
         
-        return DetectionResponse(
-            success=True,
-            file_name=file.filename,
-            file_type="image",
-            model_used=yolo_service.current_model,
-            objects_detected=detected_objects,
-            total_objects=len(detections),
-            processing_time=processing_time,
-            result_url=f"/results/{result_filename}",
-            annotated_image=annotated_base64
-        )
+        record_request("image", model_name, timer)
+        return response
     
+    except InferenceQueueFull as e:
+        record_error("image", "queue_full")
+        raise _queue_full_error(e)
     except Exception as e:
         # Clean up files on error
-        if file_path.exists():
-            file_path.unlink()
+        if persist:
+            file_writer.discard(file_path)
+            file_writer.discard(result_path)
+        record_error("image", "internal")
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
 @router.post("/video", response_model=DetectionResponse)
@@ -117,11 +310,23 @@ async def detect_video(
     file: UploadFile = File(...),
     confidence: Optional[float] = Form(0.25),
     iou: Optional[float] = Form(0.45),
+    frame_stride: int = Form(1),
+    tracker: str = Form("iou"),
+    adaptive_stride: bool = Form(False),
+    model: Optional[str] = Form(None),
+    annotate: Optional[bool] = Form(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Detect objects in an uploaded video
+    
+    frame_stride > 1 runs the detector every Nth frame and tracks boxes in
+    between; adaptive_stride detects more often when objects move quickly.
+    Per-frame detections are stored next to the result and can be queried
+    through /video/{detection_id}/detections. With annotate=false no video is
+    encoded; the annotated clip is rendered from those stored detections the
+    first time result_url is fetched.
     """
     # Validate file extension
     file_ext = Path(file.filename).suffix.lower()
@@ -130,12 +335,18 @@ async def detect_video(
             status_code=400,
             detail=f"Invalid file type. Allowed: {settings.ALLOWED_VIDEO_EXTENSIONS}"
         )
+    _validate_frame_skipping(frame_stride, tracker)
+    model_name = _resolve_model(request, model)
+    annotate = settings.ANNOTATE_BY_DEFAULT if annotate is None else annotate
+    
+    timer = StageTimer()
     
     # Save uploaded file
     timestamp = int(time.time())
     filename = f"{current_user.id}_{timestamp}_{file.filename}"
     file_path = settings.UPLOAD_DIR / filename
-    await save_upload_file(file, file_path)
+    with timer.stage("file_write"):
+        await ingest_upload_file(file, VIDEO_KINDS, file_path)
     
     try:
         # Get YOLO service from app state
@@ -144,66 +355,473 @@ async def detect_video(
         # Process video
         result_filename = f"result_{filename}"
         result_path = settings.RESULTS_DIR / result_filename
+        detections_path = sidecar_path(result_path)
         
-        frames_processed, processing_time = yolo_service.detect_video(
+        # Whole videos run in their own pool so they cannot starve image/webcam requests
+        frames_processed, processing_time, pipeline_stats = await request.app.state.video_pool.run(
+            yolo_service.detect_video,
             str(file_path),
             str(result_path),
             confidence=confidence,
-            iou=iou
+            iou=iou,
+            frame_stride=frame_stride,
+            tracker=tracker,
+            adaptive_stride=adaptive_stride,
+            model_name=model_name,
+            timer=timer,
+            annotate=annotate,
+            detections_path=str(detections_path)
         )
+        total_objects = pipeline_stats.get("objects", 0)
+        
+        if not annotate:
+            with timer.stage("file_write"):
+                request.app.state.annotation_renderer.defer_video(result_path, file_path, detections_path)
         
         # Save detection to database
-        detection_record = Detection(
-            user_id=current_user.id,
-            file_name=file.filename,
-            file_type="video",
-            file_path=str(file_path),
-            result_path=str(result_path),
-            model_used=yolo_service.current_model,
-            confidence_threshold=confidence,
-            objects_detected=[],  # Video doesn't store individual detections in DB
-            total_objects=frames_processed,
-            processing_time=processing_time
-        )
-        db.add(detection_record)
-        db.commit()
+        with timer.stage("db_write"):
+            _save_detection(
+                request,
+                db,
+                user_id=current_user.id,
+                file_name=file.filename,
+                file_type="video",
+                file_path=str(file_path),
+                result_path=str(result_path),
+                model_used=model_name,
+                confidence_threshold=confidence,
+                objects_detected=[],  # Per-frame detections live in the sidecar next to the result
+                total_objects=total_objects,
+                processing_time=processing_time
+            )
         
-        return DetectionResponse(
-            success=True,
-            file_name=file.filename,
-            file_type="video",
-            model_used=yolo_service.current_model,
-            objects_detected=[],
-            total_objects=frames_processed,
-            processing_time=processing_time,
-            result_url=f"/results/{result_filename}",
-            annotated_image=None
-        )
+        with timer.stage("serialize"):
+            response = DetectionResponse(
+                success=True,
+                file_name=file.filename,
+                file_type="video",
+                model_used=model_name,
+                objects_detected=[],
+                total_objects=total_objects,
+                processing_time=processing_time,
+                result_url=f"/results/{result_filename}",
+                annotated_image=None,
+                pipeline_stats=pipeline_stats
+            )
+        
+        record_request("video", model_name, timer, frames=frames_processed)
+        return response
     
+    except InferenceQueueFull as e:
+        if file_path.exists():
+            file_path.unlink()
+        record_error("video", "queue_full")
+        raise _queue_full_error(e)
     except Exception as e:
         # Clean up files on error
         if file_path.exists():
             file_path.unlink()
+        record_error("video", "internal")
         raise HTTPException(status_code=500, detail=f"Video processing failed: {str(e)}")
 
-@router.get("/history", response_model=list[DetectionHistory])
-async def get_detection_history(
+def _video_job_status(job: VideoJob, manager) -> VideoJobStatus:
+    """Build the public status of a video job, including live progress"""
+    frames_done, total_frames = manager.get_progress(job)
+    if job.status == "completed":
+        progress = 1.0
+    else:
+        progress = min(frames_done / total_frames, 1.0) if total_frames else 0.0
+    
+    return VideoJobStatus(
+        job_id=job.id,
+        status=job.status,
+        file_name=job.file_name,
+        model_used=job.model_used,
+        frames_done=frames_done,
+        total_frames=total_frames,
+        progress=progress,
+        result_url=f"/results/{Path(job.result_path).name}" if job.status == "completed" else None,
+        stream_url=f"/api/predict/video/jobs/{job.id}/stream"
+        if job.status not in ("failed", "cancelled") and Path(job.result_path).exists() else None,
+        detection_id=job.detection_id,
+        processing_time=job.processing_time or 0.0,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
+
+def _get_video_job(db: Session, job_id: str, current_user: User) -> VideoJob:
+    """Load a job owned by the current user (admins can see every job)"""
+    job = db.query(VideoJob).filter(VideoJob.id == job_id).first()
+    if not job or (job.user_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=404, detail="Video job not found")
+    return job
+
+@router.get("/video/{detection_id}/detections", response_model=VideoDetections)
+async def get_video_detections(
+    detection_id: int,
+    start: Optional[float] = Query(None, ge=0, description="Start time in seconds"),
+    end: Optional[float] = Query(None, ge=0, description="End time in seconds"),
+    class_name: Optional[list[str]] = Query(None),
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a processed video's per-frame detections for a time range
+    
+    Only the part of the memory-mapped sidecar covering [start, end] is read.
+    Results are grouped by frame and stop after `limit` objects.
+    """
+    detection = db.query(Detection.user_id, Detection.result_path)\
+        .filter(Detection.id == detection_id, Detection.file_type == "video")\
+        .first()
+    if not detection or (detection.user_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(status_code=404, detail="Video detection not found")
+    
+    path = sidecar_path(detection.result_path) if detection.result_path else None
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail="No per-frame detections stored for this video")
+    
+    reader = await run_in_threadpool(FrameDetectionReader, path)
+    class_ids = None
+    if class_name:
+        wanted = set(class_name)
+        class_ids = [class_id for class_id, name in reader.names.items() if name in wanted]
+    
+    frame_index, detections = await run_in_threadpool(reader.query, start, end, class_ids, min_confidence)
+    truncated = len(detections) > limit
+    frame_index = frame_index[:limit].tolist()
+    objects = detections.filter(slice(0, limit)).to_dicts()
+    
+    # Group by frame first so each VideoFrameDetections is validated once, with all its objects
+    grouped: list[tuple[int, list[dict]]] = []
+    for index, obj in zip(frame_index, objects):
+        if not grouped or grouped[-1][0] != index:
+            grouped.append((index, []))
+        grouped[-1][1].append(obj)
+    frames = [
+        VideoFrameDetections(frame=index, time=round(index / reader.fps, 3), objects=frame_objects)
+        for index, frame_objects in grouped
+    ]
+    
+    return VideoDetections(
+        detection_id=detection_id,
+        fps=reader.fps,
+        total_frames=reader.frames,
+        total_objects=reader.objects,
+        frames=frames,
+        truncated=truncated
+    )
+
+@router.post("/video/jobs", response_model=VideoJobStatus, status_code=202)
+async def submit_video_job(
+    request: Request,
+    file: UploadFile = File(...),
+    confidence: Optional[float] = Form(0.25),
+    iou: Optional[float] = Form(0.45),
+    frame_stride: int = Form(1),
+    tracker: str = Form("iou"),
+    adaptive_stride: bool = Form(False),
+    model: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Queue a video for background detection and return its job ID immediately
+    """
+    # Validate file extension
+    file_ext = Path(file.filename).suffix.lower()
+    if file_ext not in settings.ALLOWED_VIDEO_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed: {settings.ALLOWED_VIDEO_EXTENSIONS}"
+        )
+    _validate_frame_skipping(frame_stride, tracker)
+    model_name = _resolve_model(request, model)
+    
+    # Save uploaded file
+    timestamp = int(time.time())
+    filename = f"{current_user.id}_{timestamp}_{file.filename}"
+    file_path = settings.UPLOAD_DIR / filename
+    await ingest_upload_file(file, VIDEO_KINDS, file_path)
+    
+    manager = request.app.state.video_jobs
+    try:
+        job = manager.submit(
+            db,
+            user_id=current_user.id,
+            file_name=file.filename,
+            file_path=file_path,
+            result_path=settings.RESULTS_DIR / f"result_{filename}",
+            confidence=confidence,
+            iou=iou,
+            frame_stride=frame_stride,
+            tracker=tracker,
+            adaptive_stride=adaptive_stride,
+            model_name=model_name
+        )
+    except InferenceQueueFull as e:
+        file_path.unlink(missing_ok=True)
+        record_error("video_job", "queue_full")
+        raise _queue_full_error(e)
+    except ValueError as e:
+        file_path.unlink(missing_ok=True)
+        record_error("video_job", "bad_request")
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return _video_job_status(job, manager)
+
+@router.get("/video/jobs", response_model=list[VideoJobStatus])
+async def list_video_jobs(
+    request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 50
 ):
     """
-    Get detection history for current user
+    List the current user's video jobs, newest first
     """
-    detections = db.query(Detection)\
-        .filter(Detection.user_id == current_user.id)\
-        .order_by(Detection.created_at.desc())\
+    jobs = db.query(VideoJob)\
+        .filter(VideoJob.user_id == current_user.id)\
+        .order_by(VideoJob.created_at.desc())\
         .offset(skip)\
         .limit(limit)\
         .all()
     
-    return detections
+    manager = request.app.state.video_jobs
+    return [_video_job_status(job, manager) for job in jobs]
+
+@router.get("/video/jobs/{job_id}", response_model=VideoJobStatus)
+async def get_video_job(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get status and progress of a video job
+    """
+    job = _get_video_job(db, job_id, current_user)
+    return _video_job_status(job, request.app.state.video_jobs)
+
+@router.get("/video/jobs/{job_id}/events")
+async def stream_video_job_events(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent event stream of job progress, closed once the job finishes
+    """
+    _get_video_job(db, job_id, current_user)
+    manager = request.app.state.video_jobs
+    
+    def load_status() -> VideoJobStatus:
+        session = SessionLocal()
+        try:
+            job = session.query(VideoJob).filter(VideoJob.id == job_id).first()
+            return _video_job_status(job, manager)
+        finally:
+            session.close()
+    
+    async def event_stream():
+        last_payload = None
+        while not await request.is_disconnected():
+            job_status = await run_in_threadpool(load_status)
+            payload = job_status.model_dump_json()
+            if payload != last_payload:
+                yield f"event: progress\ndata: {payload}\n\n"
+                last_payload = payload
+            if job_status.status in TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(settings.VIDEO_JOB_EVENT_INTERVAL)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _parse_range(header: Optional[str]) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """(start, end) of a single "bytes=" range (start is None for a suffix range); None if absent or unsupported"""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    start, _, end = header[len("bytes="):].strip().partition("-")
+    if not all(part.isdigit() for part in (start, end) if part):
+        return None
+    requested = (int(start) if start else None, int(end) if end else None)
+    if requested == (None, None) or (start and end and requested[1] < requested[0]):
+        return None  # Invalid ranges are ignored, so the whole file is sent
+    return requested
+
+async def _read_file(path: Path, start: int, end: Optional[int] = None, follow=None, request: Optional[Request] = None):
+    """
+    Yield bytes [start, end) of a file; with `follow`, keep waiting for new
+    bytes at the end of the file for as long as follow() is true
+    """
+    with path.open("rb") as f:
+        f.seek(start)
+        position = start
+        while end is None or position < end:
+            size = STREAM_CHUNK_SIZE if end is None else min(STREAM_CHUNK_SIZE, end - position)
+            data = await run_in_threadpool(f.read, size)
+            if data:
+                position += len(data)
+                yield data
+                continue
+            if follow is None:
+                break
+            if not follow():
+                # One more pass picks up whatever the writer added before it stopped
+                follow = None
+                continue
+            if request is not None and await request.is_disconnected():
+                break
+            await asyncio.sleep(settings.VIDEO_STREAM_POLL_INTERVAL)
+
+@router.post("/video/jobs/{job_id}/stream-token", response_model=VideoStreamToken)
+async def create_video_job_stream_token(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Issue a short-lived stream URL for a <video> element
+    
+    Its ?token= only opens this job's stream and expires after
+    STREAM_TOKEN_EXPIRE_SECONDS, so the login token never ends up in a URL.
+    """
+    job = _get_video_job(db, job_id, current_user)
+    token = create_stream_token(current_user.id, job.id)
+    return VideoStreamToken(
+        stream_url=f"/api/predict/video/jobs/{job.id}/stream?token={token}",
+        expires_in=settings.STREAM_TOKEN_EXPIRE_SECONDS
+    )
+
+@router.get("/video/jobs/{job_id}/stream", dependencies=[Depends(verify_stream_token)])
+async def stream_video_job_result(
+    job_id: str,
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """
+    Serve a job's result video, including while it is still being written
+    
+    With progressive output the result is a fragmented MP4 that plays as it
+    grows. While the job runs, a request without a Range header (or with
+    "bytes=0-") follows the file until the job finishes; other ranges get the
+    bytes written so far. Authenticated only by the ?token= from
+    /stream-token, which was issued after checking access to this job.
+    """
+    job = db.query(VideoJob).filter(VideoJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    path = Path(job.result_path)
+    if job.status in ("failed", "cancelled") or not path.exists():
+        raise HTTPException(status_code=404, detail="Result video is not available yet")
+    
+    manager = request.app.state.video_jobs
+    growing = manager.is_running(job.id)
+    size = path.stat().st_size
+    requested = _parse_range(request.headers.get("range"))
+    headers = {"Accept-Ranges": "bytes", "Cache-Control": "no-cache"}
+    
+    if requested is None or (growing and requested == (0, None)):
+        if not growing:
+            return FileResponse(path, media_type="video/mp4", headers=headers)
+        return StreamingResponse(
+            _read_file(path, 0, follow=lambda: manager.is_running(job_id), request=request),
+            media_type="video/mp4",
+            headers={**headers, "X-Accel-Buffering": "no"}
+        )
+    
+    start, end = requested
+    if start is None:
+        start, end = max(0, size - end), size - 1
+    if start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range is beyond the bytes written so far",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    end = size - 1 if end is None else min(end, size - 1)
+    # The final length is unknown while the file grows
+    headers["Content-Range"] = f"bytes {start}-{end}/{'*' if growing else size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        _read_file(path, start, end + 1),
+        status_code=206,
+        media_type="video/mp4",
+        headers=headers
+    )
+
+@router.post("/video/jobs/{job_id}/cancel", response_model=VideoJobStatus)
+async def cancel_video_job(
+    job_id: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Cancel a queued or running video job
+    """
+    job = _get_video_job(db, job_id, current_user)
+    manager = request.app.state.video_jobs
+    job = manager.cancel(db, job)
+    return _video_job_status(job, manager)
+
+# Only the columns DetectionHistory returns (never the objects_detected blob)
+HISTORY_COLUMNS = [getattr(Detection, name) for name in DetectionHistory.model_fields]
+
+def _encode_cursor(created_at: datetime, detection_id: int) -> str:
+    """Opaque position after (created_at, id) in a newest-first history"""
+    raw = json.dumps([created_at.isoformat(), detection_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, detection_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(detection_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/history", response_model=list[DetectionHistory])
+async def get_detection_history(
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None
+):
+    """
+    Get detection history for current user, newest first
+    
+    Pages are keyset-paginated: pass the X-Next-Cursor header of one page as
+    `cursor` to get the next (the header is absent on the last page). `skip`
+    still works for old clients but gets slower the deeper it goes.
+    """
+    query = db.query(*HISTORY_COLUMNS).filter(Detection.user_id == current_user.id)
+    if cursor:
+        created_at, detection_id = _decode_cursor(cursor)
+        query = query.filter(or_(
+            Detection.created_at < created_at,
+            and_(Detection.created_at == created_at, Detection.id < detection_id)
+        ))
+    elif skip:
+        query = query.offset(skip)
+    
+    # One extra row tells whether another page exists
+    rows = query.order_by(Detection.created_at.desc(), Detection.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    
+    return rows
 
 @router.post("/webcam/frame", response_model=DetectionResponse)
 async def detect_webcam_frame(
@@ -211,50 +829,242 @@ async def detect_webcam_frame(
     file: UploadFile = File(...),
     confidence: Optional[float] = Form(0.25),
     iou: Optional[float] = Form(0.45),
+    model: Optional[str] = Form(None),
     current_user: User = Depends(get_current_user)
 ):
     """
     Detect objects in a webcam frame (streaming, no file save or DB record)
+    
+    Send Accept: application/msgpack or application/x-yolo-detections for a
+    compact columnar encoding instead of JSON.
     """
+    model_name = _resolve_model(request, model)
+    timer = StageTimer()
     try:
-        # Read image bytes directly from upload
-        image_bytes = await file.read()
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        # Read image bytes from the upload, capped at MAX_FILE_SIZE like the other endpoints
+        with timer.stage("upload_read"):
+            image_bytes = (await ingest_upload_file(file, IMAGE_KINDS)).data
+        with timer.stage("decode"):
+            nparr = np.frombuffer(image_bytes, np.uint8)
+            frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
         
         if frame is None:
+            record_error("webcam_frame", "bad_request")
             raise HTTPException(status_code=400, detail="Invalid image data")
         
         # Get YOLO service from app state
         yolo_service = request.app.state.yolo_service
         
         # Perform detection on frame (no file I/O)
-        detections, processing_time = yolo_service.detect_frame_stream(
+        detections, processing_time = await request.app.state.inference_pool.run(
+            yolo_service.detect_frame_stream,
             frame,
             confidence=confidence,
-            iou=iou
+            iou=iou,
+            model_name=model_name,
+            timer=timer
         )
         
         # Prepare response
-        detected_objects = [
-            DetectedObject(**d) for d in detections
-        ]
+        with timer.stage("serialize"):
+            response = _encoded_response(
+                request,
+                _detection_meta("webcam_frame", "webcam", model_name, processing_time),
+                detections
+            )
         
-        return DetectionResponse(
-            success=True,
-            file_name="webcam_frame",
-            file_type="webcam",
-            model_used=yolo_service.current_model,
-            objects_detected=detected_objects,
-            total_objects=len(detections),
-            processing_time=processing_time,
-            result_url=None,
-            annotated_image=None
-        )
+        record_request("webcam_frame", model_name, timer)
+        return response
     
+    except HTTPException:
+        raise
+    except InferenceQueueFull as e:
+        record_error("webcam_frame", "queue_full")
+        raise _queue_full_error(e)
     except Exception as e:
+        record_error("webcam_frame", "internal")
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
+def _unit_interval(value) -> float:
+    """A threshold clamped to [0, 1], like the HTTP endpoints' Query(ge=0, le=1)"""
+    number = float(value)
+    if math.isnan(number):
+        raise ValueError("threshold is NaN")
+    return min(max(number, 0.0), 1.0)
+
+def _apply_stream_params(state: dict, text: str, is_model_available) -> bool:
+    """Apply a {"confidence", "iou", "model"} control message; malformed ones are ignored (returns False)"""
+    try:
+        params = json.loads(text)
+    except ValueError:
+        return False
+    if not isinstance(params, dict):
+        return False
+    try:
+        thresholds = {key: _unit_interval(params[key]) for key in ("confidence", "iou") if key in params}
+    except (TypeError, ValueError):
+        return False
+    state.update(thresholds)
+    model = params.get("model")
+    if isinstance(model, str) and model and is_model_available(model):
+        state["model"] = model
+    return True
+
+@router.websocket("/webcam/ws")
+async def webcam_stream(
+    websocket: WebSocket,
+    token: str = Query(...),
+    confidence: float = Query(0.25, ge=0.0, le=1.0),
+    iou: float = Query(0.45, ge=0.0, le=1.0),
+    model: Optional[str] = Query(None),
+    wire: str = Query("json", alias="format")
+):
+    """
+    Stream webcam frames over a persistent WebSocket.
+    
+    The token is checked once on connect. Clients send binary JPEG frames and
+    receive one JSON detection message per processed frame. Only the newest
+    pending frame is kept, so a slow server drops stale frames instead of
+    building a backlog. Text messages like {"confidence": 0.5, "iou": 0.4}
+    update the thresholds (and "model" the model) for subsequent frames.
+    
+    format=msgpack or format=packed switches results to binary messages with
+    columnar arrays; the class-name table is sent with the first result and
+    again whenever the model changes.
+    """
+    # Accept before rejecting: closing during the handshake reaches the browser as 1006, not 1008
+    await websocket.accept()
+    try:
+        current_user = authenticate_token(token)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    
+    yolo_service = websocket.app.state.yolo_service
+    if wire not in available_formats() or (model and not yolo_service.is_model_available(model)):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    inference_pool = websocket.app.state.inference_pool
+    
+    state = {
+        "frame": None,
+        "frame_seq": 0,
+        "dropped_frames": 0,
+        "confidence": confidence,
+        "iou": iou,
+        "model": model or yolo_service.current_model,
+        "names_sent_for": None,
+        "closed": False
+    }
+    frame_ready = asyncio.Event()
+    
+    def decode_and_detect(image_bytes: bytes, conf: float, iou_thresh: float, model_name: str, timer: StageTimer):
+        with timer.stage("decode"):
+            frame = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise ValueError("Invalid image data")
+        return yolo_service.detect_frame_stream(
+            frame,
+            confidence=conf,
+            iou=iou_thresh,
+            model_name=model_name,
+            timer=timer
+        )
+    
+    async def receive_frames():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    # Latest frame wins: overwrite anything not yet picked up
+                    if state["frame"] is not None:
+                        state["dropped_frames"] += 1
+                    state["frame"] = message["bytes"]
+                    state["frame_seq"] += 1
+                    frame_ready.set()
+                elif message.get("text"):
+                    _apply_stream_params(state, message["text"], yolo_service.is_model_available)
+        finally:
+            state["closed"] = True
+            frame_ready.set()
+    
+    async def process_frames():
+        while True:
+            await frame_ready.wait()
+            frame_ready.clear()
+            if state["closed"]:
+                break
+            image_bytes, frame_seq, model_name = state["frame"], state["frame_seq"], state["model"]
+            state["frame"] = None
+            if image_bytes is None:
+                continue
+            
+            timer = StageTimer()
+            try:
+                detections, processing_time = await inference_pool.run(
+                    decode_and_detect,
+                    image_bytes,
+                    state["confidence"],
+                    state["iou"],
+                    model_name,
+                    timer
+                )
+            except InferenceQueueFull as e:
+                record_error("webcam_ws", "queue_full")
+                await websocket.send_json({
+                    "success": False,
+                    "frame_seq": frame_seq,
+                    "error": "busy",
+                    "retry_after": e.retry_after
+                })
+                continue
+            except Exception as e:
+                record_error("webcam_ws", "internal")
+                await websocket.send_json({
+                    "success": False,
+                    "frame_seq": frame_seq,
+                    "error": f"Detection failed: {str(e)}"
+                })
+                continue
+            
+            with timer.stage("serialize"):
+                # Binary formats carry the full class table once per model, then omit it
+                names = None
+                if wire != "json":
+                    names = {} if state["names_sent_for"] == model_name else detections.names
+                    state["names_sent_for"] = model_name
+                message = encode_detections(
+                    wire,
+                    _detection_meta(
+                        "webcam_frame",
+                        "webcam",
+                        model_name,
+                        processing_time,
+                        frame_seq=frame_seq,
+                        dropped_frames=state["dropped_frames"]
+                    ),
+                    detections,
+                    names
+                )
+            with timer.stage("send"):
+                if wire == "json":
+                    await websocket.send_text(message.decode())
+                else:
+                    await websocket.send_bytes(message)
+            record_request("webcam_ws", model_name, timer)
+    
+    receiver = asyncio.create_task(receive_frames())
+    try:
+        await process_frames()
+    except Exception:
+        # Client went away mid-send
+        pass
+    finally:
+        receiver.cancel()
+        print(f"🔌 Webcam stream closed for user {current_user.username}")
+
 @router.get("/model-info")
 async def get_model_info(request: Request):
     """
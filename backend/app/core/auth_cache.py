@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import User
+
+
+class AuthCache:
+    """
+    TTL cache of verified bearer tokens -> user column snapshots.
+
+    A hit skips the JWT decode and the users query, so no DB session is
+    opened. Entries live for `ttl_seconds` at most and never past the
+    token's own expiry. Any flush that updates or deletes a User drops
+    that user's entries, so deactivation and role changes apply on the next
+    request in this process. Other worker processes pick them up within
+    the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, token: str) -> Optional[User]:
+        """A detached copy of the cached user for `token`, if still fresh"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            values = entry[1]
+        # A fresh transient instance per request, so callers never share state
+        return User(**values)
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float] = None):
+        if not self.enabled:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        values = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (expires_at, values)
+            self._tokens_by_user.setdefault(values["id"], set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            tokens = self._tokens_by_user.pop(user_id, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            if tokens:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations
+        }
+
+    def _remove(self, token: str):
+        expires_at, values = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(values["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[values["id"]]
+
+
+auth_cache = AuthCache(settings.AUTH_CACHE_TTL, settings.AUTH_CACHE_SIZE)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_changed_users(session: Session, flush_context):
+    """Drop cached principals of users changed in this flush, and again once committed"""
+    user_ids = {obj.id for obj in list(session.dirty) + list(session.deleted) if isinstance(obj, User) and obj.id is not None}
+    for user_id in user_ids:
+        auth_cache.invalidate_user(user_id)
+    session.info.setdefault("changed_user_ids", set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session):
+    # A request that missed the cache between flush and commit may have re-cached the old row
+    for user_id in session.info.pop("changed_user_ids", ()):
+        auth_cache.invalidate_user(user_id)
@@ -23,12 +23,26 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production-min-32-chars")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    AUTH_CACHE_TTL: int = 60  # seconds a verified token skips the users lookup, 0 = off
+    AUTH_CACHE_SIZE: int = 10000
+    STREAM_TOKEN_EXPIRE_SECONDS: int = 300  # ?token= for one video job's stream, never the login token
     
     # Database
     DATABASE_URL: str = os.getenv(
         "DATABASE_URL",
         "sqlite:///./yolo_detection.db"
     )
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # OFF | NORMAL | FULL
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    
+    # Write-behind Detection records (bulk-inserted off the request path)
+    DB_WRITE_BEHIND: bool = False
+    DB_WRITE_BEHIND_INTERVAL: float = 1.0  # seconds between batch inserts
+    DB_WRITE_BEHIND_BATCH: int = 500
+    DB_WRITE_BEHIND_MAX_PENDING: int = 10000  # beyond this, requests insert synchronously
+    DB_WRITE_BEHIND_MAX_ATTEMPTS: int = 3  # failed batch inserts before rows are retried one by one
+    DB_WRITE_BEHIND_DEAD_LETTER: Path = Path("detections_dead_letter.jsonl")  # rows that could not be written
     
     # YOLO Model Settings
     DEFAULT_MODEL: str = "yolov8n.pt"
@@ -36,8 +50,71 @@ class Settings(BaseSettings):
     CONFIDENCE_THRESHOLD: float = 0.25
     IOU_THRESHOLD: float = 0.45
     
+    # Metrics (Prometheus text format at /metrics)
+    METRICS_ENABLED: bool = True
+    
+    # Model Pool (several models kept loaded, selectable per request)
+    MODEL_POOL_SIZE: int = 3
+    MODEL_POOL_MAX_MB: int = 2048
+    PRELOAD_MODELS: List[str] = []
+    MODEL_WARMUP: bool = True
+    WARMUP_IMGSZ: int = 640
+    
+    # Inference Backend ("pytorch" or "onnx"; onnx exports .pt weights once and caches them)
+    INFERENCE_BACKEND: str = "pytorch"
+    ONNX_IMGSZ: int = 640
+    ONNX_INTRA_OP_THREADS: int = 0  # 0 = onnxruntime default
+    ONNX_INTER_OP_THREADS: int = 0
+    
+    # INT8 Quantization (sample images used for calibration and the accuracy report)
+    QUANTIZATION_CALIBRATION_DIR: Path = Path("calibration")
+    QUANTIZATION_CALIBRATION_IMAGES: int = 100
+    QUANTIZATION_REPORT_IMAGES: int = 50
+    
+    # Inference Batching (coalesce concurrent image/frame requests)
+    BATCHING_ENABLED: bool = True
+    BATCH_MAX_SIZE: int = 8
+    BATCH_MAX_WAIT_MS: float = 5.0
+    
+    # Detection Result Cache (keyed on image hash, model and thresholds)
+    CACHE_ENABLED: bool = True
+    CACHE_MEMORY_MB: int = 64
+    CACHE_DISK_DIR: Optional[Path] = None  # e.g. results/.cache to enable the disk tier
+    CACHE_DISK_MB: int = 512
+    
+    # Inference Worker Pools (keep blocking detection off the event loop)
+    INFERENCE_WORKERS: int = 8  # >= BATCH_MAX_SIZE so the batcher can fill batches
+    INFERENCE_QUEUE_SIZE: int = 32
+    INFERENCE_RETRY_AFTER: int = 1  # seconds
+    VIDEO_WORKERS: int = 1
+    VIDEO_QUEUE_SIZE: int = 4
+    VIDEO_RETRY_AFTER: int = 30  # seconds
+    
+    # Video Pipeline (decode -> batched inference -> encode)
+    VIDEO_BATCH_SIZE: int = 4
+    VIDEO_QUEUE_FRAMES: int = 8  # per-stage queue bound, caps frames held in memory
+    
+    # Frame Skipping (detector on keyframes, tracker in between)
+    MAX_FRAME_STRIDE: int = 30
+    ADAPTIVE_MAX_STRIDE: int = 5  # keyframe gap for adaptive mode when motion is low
+    ADAPTIVE_MOTION_THRESHOLD: float = 0.05  # per-frame displacement / box size that forces every-frame detection
+    
+    # Background Video Jobs
+    VIDEO_JOB_WORKERS: int = 1
+    VIDEO_JOB_MAX_QUEUED: int = 20
+    VIDEO_CHECKPOINT_FRAMES: int = 300  # frames per checkpoint segment
+    VIDEO_JOB_EVENT_INTERVAL: float = 0.5  # seconds between SSE progress checks
+    
+    # Progressive Video Output (fragmented MP4 via ffmpeg, watchable while a job runs)
+    VIDEO_PROGRESSIVE_OUTPUT: bool = True  # falls back to segments when ffmpeg is missing
+    FFMPEG_PATH: str = "ffmpeg"
+    FFMPEG_PRESET: str = "veryfast"
+    VIDEO_FRAGMENT_SECONDS: float = 1.0  # keyframe / fragment interval
+    VIDEO_STREAM_POLL_INTERVAL: float = 0.25  # seconds between checks for new bytes while streaming
+    
     # File Upload Settings
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes read (and hashed) per step while copying an upload
     ALLOWED_IMAGE_EXTENSIONS: List[str] = [".jpg", ".jpeg", ".png", ".bmp", ".webp"]
     ALLOWED_VIDEO_EXTENSIONS: List[str] = [".mp4", ".avi", ".mov", ".mkv"]
     
@@ -45,6 +122,22 @@ class Settings(BaseSettings):
     UPLOAD_DIR: Path = Path("uploads")
     RESULTS_DIR: Path = Path("results")
     
+    # Annotated Image Delivery
+    IMAGE_RESPONSE_MODE: str = "base64"  # base64 | url | preview | multipart
+    RESULT_IMAGE_FORMAT: str = "jpeg"  # jpeg | webp
+    RESULT_IMAGE_QUALITY: int = 90
+    RESULT_MAX_DIMENSION: int = 0  # longest side of stored/returned results, 0 = full resolution
+    PREVIEW_MAX_DIMENSION: int = 480
+    PREVIEW_QUALITY: int = 70
+    
+    # Lazy Annotation (annotate=false stores detections only; result_url renders on first fetch)
+    ANNOTATE_BY_DEFAULT: bool = True
+    ANNOTATION_DATA_DIR: Path = Path("annotations")
+    
+    # Image persistence (written by a background writer; off = detections only)
+    PERSIST_IMAGE_FILES: bool = True
+    FILE_WRITER_QUEUE_SIZE: int = 64
+    
     # Admin Credentials (Change in production)
     ADMIN_USERNAME: str = os.getenv("ADMIN_USERNAME", "admin")
     ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD", "admin123")  # Change this!
@@ -60,3 +153,4 @@ settings = Settings()
 settings.MODELS_DIR.mkdir(exist_ok=True)
 settings.UPLOAD_DIR.mkdir(exist_ok=True)
 settings.RESULTS_DIR.mkdir(exist_ok=True)
+settings.ANNOTATION_DATA_DIR.mkdir(exist_ok=True)
@@ -0,0 +1,243 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; spans sub-millisecond NMS up to multi-second video stages
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Point-in-time value, either set directly or read from a callback at scrape time"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callbacks: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, func: Callable[[], float], **labels):
+        with self._lock:
+            self._callbacks[self._key(labels)] = func
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            callbacks = list(self._callbacks.items())
+        for key, func in callbacks:
+            try:
+                values[key] = func()
+            except Exception:
+                continue
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in values.items()]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency histogram per label set"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            base_labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{base_labels} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{base_labels} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the app's metrics and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """
+    Collects per-stage durations (seconds) for one request.
+
+    Stages are timed with `with timer.stage("decode"):` or added directly,
+    e.g. from ultralytics' per-image `Results.speed`.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.input_size: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_results_speed(self, results) -> float:
+        """Record ultralytics' preprocess/inference/postprocess (NMS) timings; returns their total"""
+        total = 0.0
+        for name, milliseconds in (getattr(results, "speed", None) or {}).items():
+            if milliseconds is not None:
+                self.add(name, milliseconds / 1000.0)
+                total += milliseconds / 1000.0
+        return total
+
+    def set_input_size(self, width: int, height: int):
+        self.input_size = size_bucket(width, height)
+
+
+def size_bucket(width: int, height: int) -> str:
+    """Coarse input-size label so histogram cardinality stays bounded"""
+    longest = max(width, height)
+    for limit in (320, 640, 1280, 1920, 3840):
+        if longest <= limit:
+            return f"<={limit}"
+    return ">3840"
+
+
+registry = MetricsRegistry()
+
+stage_duration = registry.register(Histogram(
+    "yolo_stage_duration_seconds",
+    "Time spent in each processing stage of a detection request",
+    ("endpoint", "model", "input_size", "stage")
+))
+request_duration = registry.register(Histogram(
+    "yolo_http_request_duration_seconds",
+    "End-to-end HTTP request time, including response serialization",
+    ("endpoint", "method", "status")
+))
+requests_total = registry.register(Counter(
+    "yolo_requests_total",
+    "Detection requests handled",
+    ("endpoint", "model")
+))
+errors_total = registry.register(Counter(
+    "yolo_request_errors_total",
+    "Detection requests that failed",
+    ("endpoint", "reason")
+))
+frames_processed_total = registry.register(Counter(
+    "yolo_frames_processed_total",
+    "Images and video frames run through detection",
+    ("endpoint", "model")
+))
+queue_depth = registry.register(Gauge(
+    "yolo_queue_depth",
+    "Work waiting or running in each inference queue",
+    ("queue",)
+))
+
+
+def record_request(endpoint: str, model: str, timer: StageTimer, frames: int = 1):
+    """Record a successful request's stage timings and counters"""
+    input_size = timer.input_size or "unknown"
+    for stage, seconds in timer.stages.items():
+        stage_duration.observe(seconds, endpoint=endpoint, model=model, input_size=input_size, stage=stage)
+    requests_total.inc(endpoint=endpoint, model=model)
+    frames_processed_total.inc(frames, endpoint=endpoint, model=model)
+
+
+def record_error(endpoint: str, reason: str):
+    errors_total.inc(endpoint=endpoint, reason=reason)
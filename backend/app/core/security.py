@@ -6,6 +6,9 @@ from fastapi import HTTPException, status
 
 from app.core.config import settings
 
+# Scope claim of tokens that may only be used as ?token= on a video job stream
+STREAM_TOKEN_SCOPE = "video_stream"
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
     return bcrypt.checkpw(
@@ -31,6 +34,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+def create_stream_token(user_id: int, job_id: str) -> str:
+    """Short-lived token that only authorizes streaming one video job's result"""
+    return create_access_token(
+        {"sub": str(user_id), "scope": STREAM_TOKEN_SCOPE, "job": job_id},
+        timedelta(seconds=settings.STREAM_TOKEN_EXPIRE_SECONDS)
+    )
+
 def decode_access_token(token: str) -> dict:
     """Decode and verify JWT token"""
     try:
@@ -1,18 +1,33 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response
+from fastapi import Request
 import uvicorn
 import os
+import time
+import mimetypes
 from pathlib import Path
 
-from app.api.endpoints import detection, auth, admin
+from app.api.endpoints import detection, auth, admin, analytics
 from app.core.config import settings
-from app.database import engine, Base
+from app.core import metrics
+from app.database import engine, Base, SessionLocal
 from app.services.yolo_service import YOLOService
+from app.services.inference_pool import InferencePool, InferenceQueueFull
+from app.services.video_jobs import VideoJobManager
+from app.services.file_writer import BackgroundFileWriter
+from app.services.annotation import LazyAnnotationRenderer
+from app.services.detection_writer import DetectionWriter
+from app.services.upload_ingest import BodySizeLimitMiddleware, UploadTooLarge
+from app.services import user_stats  # noqa: F401  (keeps per-user stats in step with Detection writes)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+# create_all skips indexes added to tables that already exist
+for table in Base.metadata.sorted_tables:
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
 
 # Create necessary directories
 UPLOAD_DIR = Path("uploads")
@@ -35,8 +50,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count"],
 )
 
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """Time every HTTP request end to end, including response serialization"""
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.request_duration.observe(
+        time.perf_counter() - start,
+        endpoint=route.path if route else "unmatched",
+        method=request.method,
+        status=str(response.status_code)
+    )
+    return response
+
+# Room for the multipart boundaries and form fields around an upload
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+# Counts the raw body too, so chunked uploads without a Content-Length are capped as well
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body=settings.MAX_FILE_SIZE + UPLOAD_FORM_OVERHEAD,
+    detail=str(UploadTooLarge(settings.MAX_FILE_SIZE))
+)
+
+@app.middleware("http")
+async def serve_pending_results(request: Request, call_next):
+    """Serve result files still queued in the background writer, rendering deferred annotations first"""
+    if request.method == "GET" and request.url.path.startswith("/results/") and hasattr(app.state, "file_writer"):
+        name = Path(request.url.path).name
+        data = app.state.file_writer.get_pending(settings.RESULTS_DIR / name)
+        if data is not None:
+            return Response(data, media_type=mimetypes.guess_type(name)[0] or "application/octet-stream")
+        
+        renderer = app.state.annotation_renderer
+        if renderer.is_pending(name):
+            # Renders run in the same bounded pools as detections
+            is_video = Path(name).suffix.lower() in settings.ALLOWED_VIDEO_EXTENSIONS
+            pool = app.state.video_pool if is_video else app.state.inference_pool
+            try:
+                await pool.run(renderer.render, name)
+            except InferenceQueueFull as e:
+                return JSONResponse(
+                    {"detail": "Server is busy, please retry shortly"},
+                    status_code=503,
+                    headers={"Retry-After": str(e.retry_after)}
+                )
+            except Exception as e:
+                return JSONResponse({"detail": f"Rendering failed: {str(e)}"}, status_code=500)
+    return await call_next(request)
+
 # Mount static directories
 app.mount("/results", StaticFiles(directory="results"), name="results")
 
@@ -44,6 +110,7 @@ app.mount("/results", StaticFiles(directory="results"), name="results")
 app.include_router(detection.router, prefix="/api/predict", tags=["Detection"])
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 
 # Initialize YOLO service on startup
 @app.on_event("startup")
@@ -52,14 +119,75 @@ async def startup_event():
     try:
         yolo_service = YOLOService()
         yolo_service.load_model()
+        # Warm the rest of the pool so first requests for these models are fast
+        yolo_service.registry.preload(settings.PRELOAD_MODELS)
         app.state.yolo_service = yolo_service
         print(f"✅ YOLO model loaded successfully: {yolo_service.current_model}")
         print(f"✅ Device: {yolo_service.device}")
         print(f"✅ Classes: {len(yolo_service.model.names)}")
+        
+        app.state.inference_pool = InferencePool(
+            "inference",
+            max_workers=settings.INFERENCE_WORKERS,
+            max_queue_size=settings.INFERENCE_QUEUE_SIZE,
+            retry_after=settings.INFERENCE_RETRY_AFTER
+        )
+        app.state.file_writer = BackgroundFileWriter(max_queue_size=settings.FILE_WRITER_QUEUE_SIZE)
+        app.state.annotation_renderer = LazyAnnotationRenderer(
+            settings.ANNOTATION_DATA_DIR,
+            settings.RESULTS_DIR,
+            # Uploads may still be queued in the background writer
+            read_source=lambda path: app.state.file_writer.get_pending(path) or path.read_bytes()
+        )
+        app.state.detection_writer = None
+        if settings.DB_WRITE_BEHIND:
+            app.state.detection_writer = DetectionWriter(
+                SessionLocal,
+                flush_interval=settings.DB_WRITE_BEHIND_INTERVAL,
+                max_batch=settings.DB_WRITE_BEHIND_BATCH,
+                max_pending=settings.DB_WRITE_BEHIND_MAX_PENDING,
+                max_attempts=settings.DB_WRITE_BEHIND_MAX_ATTEMPTS,
+                dead_letter_path=settings.DB_WRITE_BEHIND_DEAD_LETTER
+            )
+        app.state.video_pool = InferencePool(
+            "video",
+            max_workers=settings.VIDEO_WORKERS,
+            max_queue_size=settings.VIDEO_QUEUE_SIZE,
+            retry_after=settings.VIDEO_RETRY_AFTER
+        )
+        
+        # Background video jobs resume from their last checkpoint
+        app.state.video_jobs = VideoJobManager(
+            yolo_service,
+            workers=settings.VIDEO_JOB_WORKERS,
+            detection_writer=app.state.detection_writer
+        )
+        app.state.video_jobs.start()
+        
+        # Queue depths are read at scrape time
+        metrics.queue_depth.set_function(lambda: app.state.inference_pool.queue_depth, queue="inference")
+        metrics.queue_depth.set_function(lambda: app.state.video_pool.queue_depth, queue="video")
+        if yolo_service.batcher:
+            metrics.queue_depth.set_function(lambda: yolo_service.batcher.get_stats()["pending"], queue="batcher")
     except Exception as e:
         print(f"❌ Error loading YOLO model: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background inference workers"""
+    if hasattr(app.state, 'video_jobs'):
+        app.state.video_jobs.shutdown()
+    for pool_name in ("inference_pool", "video_pool"):
+        if hasattr(app.state, pool_name):
+            getattr(app.state, pool_name).shutdown()
+    if hasattr(app.state, 'file_writer'):
+        app.state.file_writer.shutdown()
+    if getattr(app.state, 'detection_writer', None):
+        app.state.detection_writer.shutdown()
+    if hasattr(app.state, 'yolo_service'):
+        app.state.yolo_service.shutdown()
+
 @app.get("/")
 async def root():
     """Root endpoint - API health check"""
@@ -78,6 +206,13 @@ async def health_check():
         "model": app.state.yolo_service.current_model if hasattr(app.state, 'yolo_service') else None
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Prometheus metrics: per-stage latency histograms, request/error/frame counters and queue depths"""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
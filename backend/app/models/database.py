@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -17,6 +17,7 @@ class User(Base):
     
     # Relationships
     detections = relationship("Detection", back_populates="user")
+    video_jobs = relationship("VideoJob", back_populates="user")
 
 class Detection(Base):
     __tablename__ = "detections"
@@ -44,6 +45,81 @@ class Detection(Base):
     
     # Relationships
     user = relationship("User", back_populates="detections")
+    
+    __table_args__ = (
+        # Keyset pagination of a user's history: WHERE user_id = ? AND (created_at, id) < cursor
+        Index("ix_detections_user_created_id", "user_id", "created_at", "id"),
+    )
+
+class DetectedObjectRecord(Base):
+    __tablename__ = "detected_objects"
+    
+    # One row per detected object, bulk-inserted with its Detection (see app/services/detected_objects.py)
+    id = Column(Integer, primary_key=True)
+    detection_id = Column(Integer, ForeignKey("detections.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  # denormalized for per-user queries
+    class_id = Column(Integer)  # model-specific; class_name is comparable across models
+    class_name = Column(String, nullable=False)
+    confidence = Column(Float, nullable=False)
+    x1 = Column(Float, nullable=False)
+    y1 = Column(Float, nullable=False)
+    x2 = Column(Float, nullable=False)
+    y2 = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False)  # copied from the Detection
+    
+    __table_args__ = (
+        Index("ix_detected_objects_class_created", "class_name", "created_at"),
+        Index("ix_detected_objects_user_class_created", "user_id", "class_name", "created_at"),
+    )
+
+class UserDetectionStats(Base):
+    __tablename__ = "user_detection_stats"
+    
+    # Maintained incrementally as detections are written or deleted (see app/services/user_stats.py)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    detection_count = Column(Integer, nullable=False, default=0, index=True)
+    total_objects = Column(Integer, nullable=False, default=0)
+    total_processing_time = Column(Float, nullable=False, default=0.0)  # seconds
+    last_detection_at = Column(DateTime, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class VideoJob(Base):
+    __tablename__ = "video_jobs"
+    
+    id = Column(String, primary_key=True, index=True)  # uuid4 hex
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, completed, failed, cancelled
+    
+    # File information
+    file_name = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    result_path = Column(String, nullable=False)
+    
+    # Detection settings
+    model_used = Column(String, nullable=False)
+    confidence_threshold = Column(Float, default=0.25)
+    iou_threshold = Column(Float, default=0.45)
+    frame_stride = Column(Integer, default=1)
+    tracker = Column(String, default="iou")
+    adaptive_stride = Column(Boolean, default=False)
+    
+    # Progress and checkpointing
+    total_frames = Column(Integer, default=0)  # CAP_PROP_FRAME_COUNT
+    frames_done = Column(Integer, default=0)
+    checkpoint_frame = Column(Integer, default=0)  # frames covered by completed segments
+    segments = Column(JSON, default=list)  # completed segment files, in order
+    
+    # Outcome
+    detection_id = Column(Integer, ForeignKey("detections.id"))
+    processing_time = Column(Float, default=0.0)  # seconds, summed across resumes
+    error = Column(Text)
+    
+    # Metadata
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    user = relationship("User", back_populates="video_jobs")
 
 class ModelConfig(Base):
     __tablename__ = "model_configs"
@@ -23,6 +23,10 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+class UserUpdate(BaseModel):
+    is_active: Optional[bool] = None
+    is_admin: Optional[bool] = None
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -48,6 +52,7 @@ class DetectionResponse(BaseModel):
     processing_time: float
     result_url: Optional[str] = None
     annotated_image: Optional[str] = None  # Base64 encoded for images
+    pipeline_stats: Optional[Dict[str, Any]] = None  # Per-stage throughput for videos
 
 class DetectionHistory(BaseModel):
     id: int
@@ -62,14 +67,52 @@ class DetectionHistory(BaseModel):
     class Config:
         from_attributes = True
 
+class VideoFrameDetections(BaseModel):
+    frame: int
+    time: float  # seconds from the start of the video
+    objects: List[DetectedObject]
+
+class VideoDetections(BaseModel):
+    detection_id: int
+    fps: float
+    total_frames: int
+    total_objects: int
+    frames: List[VideoFrameDetections]  # only frames with matching objects
+    truncated: bool = False  # more objects matched than the limit
+
+# Video Job Schemas
+class VideoJobStatus(BaseModel):
+    job_id: str
+    status: str  # queued, running, completed, failed, cancelled
+    file_name: str
+    model_used: str
+    frames_done: int
+    total_frames: int
+    progress: float  # 0.0 - 1.0
+    result_url: Optional[str] = None
+    stream_url: Optional[str] = None  # growing result, playable while the job runs (needs a stream token)
+    detection_id: Optional[int] = None
+    processing_time: float = 0.0
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class VideoStreamToken(BaseModel):
+    stream_url: str  # includes a ?token= valid only for this job's stream
+    expires_in: int  # seconds
+
 # Model Info Schemas
 class ModelInfo(BaseModel):
     model_name: str
     model_path: str
     description: Optional[str]
     is_active: bool
+    is_loaded: bool = False
     classes_count: int
     classes: List[str]
+    variant_of: Optional[str] = None
+    quantization: Optional[str] = None
+    report: Optional[Dict[str, Any]] = None
 
 class ModelListResponse(BaseModel):
     models: List[ModelInfo]
@@ -78,6 +121,14 @@ class ModelListResponse(BaseModel):
 class ModelSwitchRequest(BaseModel):
     model_name: str
 
+class BackendSwitchRequest(BaseModel):
+    backend: str
+
+class QuantizeRequest(BaseModel):
+    model_name: str
+    mode: str = "dynamic"  # "dynamic" or "static"
+    calibration_dir: Optional[str] = None
+
 # Admin Schemas
 class SystemStats(BaseModel):
     total_users: int
@@ -91,6 +142,25 @@ class UserStats(BaseModel):
     username: str
     total_detections: int
     last_detection: Optional[datetime]
+    total_objects: int = 0
+    total_processing_time: float = 0.0
     
     class Config:
         from_attributes = True
+
+# Analytics Schemas
+class ObjectSearchResult(BaseModel):
+    detection_id: int
+    file_name: str
+    model_used: str
+    class_name: str
+    confidence: float
+    bbox: List[float]  # [x1, y1, x2, y2]
+    created_at: datetime
+
+class ClassCount(BaseModel):
+    class_name: Optional[str] = None  # None when not grouped by class
+    period: Optional[str] = None  # e.g. "2024-05-01" when grouped by time
+    count: int
+    detections: int  # distinct images/frames the objects came from
+    avg_confidence: float
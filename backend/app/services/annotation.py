@@ -0,0 +1,185 @@
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+from app.core.config import settings
+from app.services.detection_batch import DetectionBatch
+from app.services.frame_store import FrameDetectionReader
+from app.services.yolo_service import IMAGE_FORMATS, YOLOService
+
+# Result file extension -> encoding used when rendering an image
+_IMAGE_ENCODINGS = {extension: image_format for image_format, extension in IMAGE_FORMATS.items()}
+
+
+def draw_detections(image: np.ndarray, detections: DetectionBatch) -> np.ndarray:
+    """Annotate an image with ultralytics' plotting, so lazy renders look like eager ones"""
+    if len(detections):
+        data = np.concatenate([
+            detections.boxes,
+            detections.confidences[:, None],
+            detections.class_ids[:, None].astype(np.float32)
+        ], axis=1)
+    else:
+        data = np.zeros((0, 6), dtype=np.float32)
+    results = Results(image, path="", names=dict(detections.names), boxes=torch.from_numpy(data.astype(np.float32)))
+    return results.plot()
+
+
+class LazyAnnotationRenderer:
+    """
+    Renders annotated results on first request instead of at detection time.
+
+    Requests made with annotate=false leave a render spec in `data_dir`, named
+    after the result file. The spec holds the source path and the detections
+    as columnar arrays (videos point at their per-frame sidecar instead). The first fetch of the result URL renders the file into
+    `results_dir` and removes the spec. Concurrent fetches share one render.
+    A spec whose source has gone missing is dropped instead of failing every fetch.
+    """
+
+    def __init__(self, data_dir: Path, results_dir: Path, read_source: Callable[[Path], bytes]):
+        self.data_dir = Path(data_dir)
+        self.results_dir = Path(results_dir)
+        self.read_source = read_source
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+        self.deferred = 0
+        self.rendered = 0
+
+    def _spec_path(self, result_name: str) -> Path:
+        return self.data_dir / f"{result_name}.npz"
+
+    def _save(self, result_path: Path, kind: str, source_path: Path, **arrays: np.ndarray):
+        spec_path = self._spec_path(Path(result_path).name)
+        tmp_path = spec_path.with_name(spec_path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            np.savez(f, kind=np.array(kind), source=np.array(str(source_path)), **arrays)
+        tmp_path.replace(spec_path)
+        self.deferred += 1
+
+    def defer_image(self, result_path: Path, source_path: Path, detections: DetectionBatch):
+        """Record what is needed to render an annotated image later"""
+        self._save(
+            result_path,
+            "image",
+            source_path,
+            names=np.array(json.dumps({int(k): v for k, v in detections.names.items()})),
+            boxes=detections.boxes,
+            confidences=detections.confidences,
+            class_ids=detections.class_ids
+        )
+
+    def defer_video(self, result_path: Path, source_path: Path, detections_path: Path):
+        """Point at a video's per-frame sidecar so it can be rendered later without inference"""
+        self._save(result_path, "video", source_path, detections=np.array(str(detections_path)))
+
+    def is_pending(self, result_name: str) -> bool:
+        return self._spec_path(result_name).exists()
+
+    def render(self, result_name: str) -> Optional[Path]:
+        """Render a deferred result if it has not been rendered yet; returns its path"""
+        with self._lock:
+            lock = self._locks.setdefault(result_name, threading.Lock())
+        try:
+            with lock:
+                result_path = self.results_dir / result_name
+                spec_path = self._spec_path(result_name)
+                if not spec_path.exists():
+                    return result_path if result_path.exists() else None
+
+                try:
+                    with np.load(spec_path, allow_pickle=False) as spec:
+                        kind = str(spec["kind"])
+                        source_path = Path(str(spec["source"]))
+                        if kind == "video":
+                            frames = FrameDetectionReader(Path(str(spec["detections"])))
+                        else:
+                            detections = DetectionBatch(
+                                spec["boxes"],
+                                spec["confidences"],
+                                spec["class_ids"],
+                                {int(k): v for k, v in json.loads(str(spec["names"])).items()}
+                            )
+
+                    if kind == "video":
+                        self._render_video(source_path, result_path, frames)
+                    else:
+                        self._render_image(source_path, result_path, detections)
+                except FileNotFoundError as e:
+                    # The source (or sidecar) is gone for good, so the spec can never render
+                    print(f"⚠️ Dropping deferred render of {result_name}: {e}")
+                    spec_path.unlink(missing_ok=True)
+                    return None
+
+                spec_path.unlink(missing_ok=True)
+                self.rendered += 1
+                return result_path
+        finally:
+            # Once the spec is gone later callers return early, so the lock is no longer needed
+            if not self._spec_path(result_name).exists():
+                with self._lock:
+                    self._locks.pop(result_name, None)
+
+    def discard(self, result_name: str):
+        """Drop a deferred result's spec, e.g. when its detection record is deleted"""
+        with self._lock:
+            lock = self._locks.setdefault(result_name, threading.Lock())
+        with lock:
+            self._spec_path(result_name).unlink(missing_ok=True)
+        with self._lock:
+            self._locks.pop(result_name, None)
+
+    def _render_image(self, source_path: Path, result_path: Path, detections: DetectionBatch):
+        image = cv2.imdecode(np.frombuffer(self.read_source(source_path), np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not read image: {source_path}")
+        encoded = YOLOService.encode_image(
+            draw_detections(image, detections),
+            _IMAGE_ENCODINGS.get(result_path.suffix.lower(), "jpeg"),
+            settings.RESULT_IMAGE_QUALITY,
+            settings.RESULT_MAX_DIMENSION
+        )
+        tmp_path = result_path.with_name(result_path.name + ".tmp")
+        tmp_path.write_bytes(encoded)
+        tmp_path.replace(result_path)
+
+    def _render_video(self, source_path: Path, result_path: Path, frames: FrameDetectionReader):
+        if not source_path.exists():
+            raise FileNotFoundError(f"Source video is missing: {source_path}")
+        cap = cv2.VideoCapture(str(source_path))
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {source_path}")
+        fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        # Keep the real extension so OpenCV picks the right container
+        tmp_path = result_path.with_name(f"{result_path.stem}.rendering{result_path.suffix}")
+        out = YOLOService._open_video_writer(str(tmp_path), fps, width, height)
+        empty = DetectionBatch.empty(frames.names)
+        try:
+            index = 0
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                out.write(draw_detections(frame, frames.frame(index) if index < frames.frames else empty))
+                index += 1
+        finally:
+            cap.release()
+            out.release()
+        tmp_path.replace(result_path)
+        print(f"🎨 Rendered deferred annotations: {result_path.name} ({index} frames)")
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": sum(1 for _ in self.data_dir.glob("*.npz")),
+            "deferred": self.deferred,
+            "rendered": self.rendered
+        }
@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class _PendingPrediction:
+    """A single caller's image waiting to be folded into a batch"""
+
+    __slots__ = ("image", "conf", "iou", "model", "future")
+
+    def __init__(self, image: np.ndarray, conf: float, iou: float, model: Optional[str] = None):
+        self.image = image
+        self.conf = conf
+        self.iou = iou
+        self.model = model
+        self.future: Future = Future()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-image predictions for a few milliseconds and
+    runs them as one batched forward pass.
+
+    Requests are grouped by model, IoU threshold (NMS cannot share it) and
+    image shape (mixed shapes are letterboxed to a square instead of their
+    own minimal padding) and run at the lowest confidence in the group; each
+    caller's result is then filtered back down to its own threshold. This
+    matches an unbatched predict except when an image has more candidates
+    than max_det, where the lower threshold can push some of its own boxes
+    past the cut.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[np.ndarray], float, float, Optional[str]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 5.0
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue[Optional[_PendingPrediction]]" = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="yolo-batcher", daemon=True)
+        self._thread.start()
+
+        self.batches_run = 0
+        self.images_processed = 0
+
+    def submit(self, image: np.ndarray, conf: float, iou: float, model: Optional[str] = None) -> Future:
+        """Queue an image for the next batch and return a future for its result"""
+        if self._stopped:
+            raise RuntimeError("Batcher has been shut down")
+        pending = _PendingPrediction(image, conf, iou, model)
+        self._queue.put(pending)
+        return pending.future
+
+    def predict(self, image: np.ndarray, conf: float, iou: float, model: Optional[str] = None) -> Any:
+        """Blocking helper: submit an image and wait for its result"""
+        return self.submit(image, conf, iou, model).result()
+
+    def shutdown(self):
+        """Stop the batching thread after draining queued requests"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def get_stats(self) -> dict:
+        """Batching counters for monitoring"""
+        return {
+            "batches_run": self.batches_run,
+            "images_processed": self.images_processed,
+            "avg_batch_size": (self.images_processed / self.batches_run) if self.batches_run else 0.0,
+            "pending": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+
+            batch = [first]
+            stop_after = False
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop_after = True
+                    break
+                batch.append(item)
+
+            self._dispatch(batch)
+
+            if stop_after:
+                break
+
+        # Fail anything that slipped in after shutdown
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item.future.set_exception(RuntimeError("Batcher has been shut down"))
+
+    def _dispatch(self, batch: List[_PendingPrediction]):
+        groups: Dict[Tuple[Optional[str], float, tuple], List[_PendingPrediction]] = {}
+        for pending in batch:
+            groups.setdefault((pending.model, pending.iou, pending.image.shape), []).append(pending)
+
+        for (model, iou, _), members in groups.items():
+            conf = min(p.conf for p in members)
+            try:
+                results = self.predict_batch([p.image for p in members], conf, iou, model)
+            except Exception as e:
+                for pending in members:
+                    pending.future.set_exception(e)
+                continue
+
+            self.batches_run += 1
+            self.images_processed += len(members)
+
+            for pending, result in zip(members, results):
+                if pending.conf > conf and result.boxes is not None and len(result.boxes):
+                    result = result[result.boxes.conf >= pending.conf]
+                pending.future.set_result(result)
@@ -0,0 +1,105 @@
+import argparse
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.database import Detection, DetectedObjectRecord
+from app.services.detection_batch import DetectionBatch
+
+
+def object_rows(detections: DetectionBatch) -> List[dict]:
+    """detected_objects column values for a result, straight from its columnar arrays"""
+    return [
+        {
+            "class_id": class_id,
+            "class_name": detections.names[class_id],
+            "confidence": confidence,
+            "x1": box[0],
+            "y1": box[1],
+            "x2": box[2],
+            "y2": box[3]
+        }
+        for class_id, confidence, box in zip(
+            detections.class_ids.tolist(),
+            detections.confidences.tolist(),
+            detections.boxes.tolist()
+        )
+    ]
+
+
+def with_parent(rows: List[dict], detection_id: int, user_id: int, created_at) -> List[dict]:
+    return [{**row, "detection_id": detection_id, "user_id": user_id, "created_at": created_at} for row in rows]
+
+
+def add_objects(db: Session, detection: Detection, rows: List[dict]):
+    """Bulk-insert a flushed Detection's objects in the current transaction"""
+    if rows:
+        db.execute(
+            insert(DetectedObjectRecord),
+            with_parent(rows, detection.id, detection.user_id, detection.created_at)
+        )
+
+
+def delete_objects(db: Session, detection_id: int):
+    db.query(DetectedObjectRecord)\
+        .filter(DetectedObjectRecord.detection_id == detection_id)\
+        .delete(synchronize_session=False)
+
+
+def backfill(db: Session, batch_size: int = 1000) -> int:
+    """Populate detected_objects from the objects_detected JSON of older detections; returns rows written"""
+    written = 0
+    last_id = 0
+    while True:
+        # Detections that already have rows are skipped, so the backfill can be rerun
+        has_rows = db.query(DetectedObjectRecord.id)\
+            .filter(DetectedObjectRecord.detection_id == Detection.id)\
+            .exists()
+        batch = db.query(Detection.id, Detection.user_id, Detection.created_at, Detection.objects_detected)\
+            .filter(Detection.id > last_id, ~has_rows)\
+            .order_by(Detection.id)\
+            .limit(batch_size)\
+            .all()
+        if not batch:
+            break
+        rows = []
+        for detection_id, user_id, created_at, objects in batch:
+            for obj in objects or []:
+                x1, y1, x2, y2 = obj["bbox"]
+                rows.append({
+                    "detection_id": detection_id,
+                    "user_id": user_id,
+                    "created_at": created_at,
+                    "class_id": obj.get("class_id"),
+                    "class_name": obj["class_name"],
+                    "confidence": obj["confidence"],
+                    "x1": x1,
+                    "y1": y1,
+                    "x2": x2,
+                    "y2": y2
+                })
+        if rows:
+            db.execute(insert(DetectedObjectRecord), rows)
+        db.commit()
+        written += len(rows)
+        last_id = batch[-1][0]
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the normalized detected_objects table")
+    parser.add_argument("--backfill", action="store_true", help="fill the table from existing detections' JSON")
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.error("nothing to do (use --backfill)")
+
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        written = backfill(db)
+    finally:
+        db.close()
+    print(f"✅ Wrote {written} detected objects")
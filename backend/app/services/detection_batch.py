@@ -0,0 +1,88 @@
+from typing import Dict, List, Mapping, Tuple
+
+import numpy as np
+
+
+class DetectionBatch:
+    """
+    Columnar detections for a single image or frame.
+
+    Holds an Nx4 float32 xyxy box array, a float32 confidence array, an int32
+    class-ID array and the model's shared class-name table. Built from an
+    ultralytics result with one bulk tensor transfer; per-object dicts or
+    pydantic models are only produced at the edge via `to_dicts()`.
+
+    Kept free of app imports so the desktop GUI can share it.
+    """
+
+    __slots__ = ("boxes", "confidences", "class_ids", "names")
+
+    def __init__(
+        self,
+        boxes: np.ndarray,
+        confidences: np.ndarray,
+        class_ids: np.ndarray,
+        names: Mapping[int, str]
+    ):
+        self.boxes = boxes
+        self.confidences = confidences
+        self.class_ids = class_ids
+        self.names = names
+
+    @classmethod
+    def empty(cls, names: Mapping[int, str]) -> "DetectionBatch":
+        return cls(
+            np.zeros((0, 4), dtype=np.float32),
+            np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.int32),
+            names
+        )
+
+    @classmethod
+    def from_results(cls, results) -> "DetectionBatch":
+        """Build from an ultralytics Results object"""
+        boxes = results.boxes
+        if boxes is None or len(boxes) == 0:
+            return cls.empty(results.names)
+
+        # Single device->host copy of [x1, y1, x2, y2, (track_id,) conf, cls]
+        data = boxes.data.cpu().numpy()
+        return cls(
+            np.ascontiguousarray(data[:, :4], dtype=np.float32),
+            np.ascontiguousarray(data[:, -2], dtype=np.float32),
+            data[:, -1].astype(np.int32),
+            results.names
+        )
+
+    def __len__(self) -> int:
+        return len(self.class_ids)
+
+    @property
+    def class_names(self) -> List[str]:
+        return [self.names[int(c)] for c in self.class_ids]
+
+    def filter(self, mask: np.ndarray) -> "DetectionBatch":
+        """Subset of detections selected by a boolean mask or index array"""
+        return DetectionBatch(self.boxes[mask], self.confidences[mask], self.class_ids[mask], self.names)
+
+    def to_dicts(self) -> List[dict]:
+        """Per-object dicts in the API's DetectedObject shape"""
+        return [
+            {"class_name": self.names[class_id], "confidence": confidence, "bbox": bbox}
+            for class_id, confidence, bbox in zip(
+                self.class_ids.tolist(),
+                self.confidences.tolist(),
+                self.boxes.tolist()
+            )
+        ]
+
+    def summary(self) -> Dict[str, Tuple[int, float]]:
+        """Per-class (count, mean confidence)"""
+        if not len(self):
+            return {}
+        unique, inverse, counts = np.unique(self.class_ids, return_inverse=True, return_counts=True)
+        sums = np.bincount(inverse, weights=self.confidences)
+        return {
+            self.names[int(class_id)]: (int(count), float(total / count))
+            for class_id, count, total in zip(unique, counts, sums)
+        }
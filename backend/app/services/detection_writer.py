@@ -0,0 +1,222 @@
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Deque, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.database import Detection, DetectedObjectRecord
+from app.services.detected_objects import add_objects, with_parent
+from app.services.user_stats import record_added
+
+
+class _PendingDetection:
+    """A queued Detection row, its detected_objects rows and how many inserts it has been part of that failed"""
+
+    __slots__ = ("values", "objects", "on_written", "attempts")
+
+    def __init__(self, values: dict, objects: List[dict], on_written: Optional[Callable[[int], None]] = None):
+        self.values = values
+        self.objects = objects
+        self.on_written = on_written
+        self.attempts = 0
+
+
+class DetectionWriter:
+    """
+    Write-behind queue for Detection rows.
+
+    Requests hand over the row's column values (plus its detected_objects
+    rows) and return without touching the database. A background thread bulk-inserts everything queued every
+    `flush_interval` seconds (or as soon as `max_batch` rows are waiting) in
+    a single transaction, so SQLite pays one commit per batch instead of
+    one per request. A failed batch stays queued and is retried on the next
+    tick; once `max_pending` rows are waiting, callers insert synchronously.
+    After `max_attempts` failures the batch is retried row by row, and rows
+    that still fail are dead-lettered (logged, and appended as JSON lines to
+    `dead_letter_path`) so one bad row cannot hold up the rest of the queue.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        flush_interval: float = 1.0,
+        max_batch: int = 500,
+        max_pending: int = 10000,
+        max_attempts: int = 3,
+        dead_letter_path: Optional[Path] = None
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, max_batch)
+        self.max_pending = max(self.max_batch, max_pending)
+        self.max_attempts = max(1, max_attempts)
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+
+        self._pending: Deque[_PendingDetection] = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="detection-writer", daemon=True)
+        self._thread.start()
+
+        self.written = 0
+        self.batches = 0
+        self.sync_fallbacks = 0
+        self.errors = 0
+        self.dead_lettered = 0
+        self.last_flush_seconds = 0.0
+
+    def submit(
+        self,
+        values: dict,
+        objects: Optional[List[dict]] = None,
+        on_written: Optional[Callable[[int], None]] = None
+    ):
+        """Queue a Detection row (its column values) and its detected_objects rows; `on_written` gets the new id"""
+        values.setdefault("created_at", datetime.utcnow())
+        item = _PendingDetection(values, objects or [], on_written)
+        with self._lock:
+            queued = not self._stopped and len(self._pending) < self.max_pending
+            if queued:
+                self._pending.append(item)
+                if len(self._pending) >= self.max_batch:
+                    self._wakeup.set()
+        if not queued:
+            self.sync_fallbacks += 1
+            self._insert([item])
+
+    def flush(self):
+        """Write everything queued so far"""
+        while True:
+            with self._lock:
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            if not batch:
+                return
+            try:
+                self._insert(batch)
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Could not write {len(batch)} detection records: {e}")
+                for item in batch:
+                    item.attempts += 1
+                if max(item.attempts for item in batch) < self.max_attempts:
+                    with self._lock:
+                        self._pending.extendleft(reversed(batch))
+                    return
+                self._insert_each(batch)
+
+    def _insert_each(self, batch: List[_PendingDetection]):
+        """Retry a repeatedly failing batch one row at a time, dead-lettering the rows that still fail"""
+        for item in batch:
+            try:
+                self._insert([item])
+            except Exception as e:
+                self._dead_letter(item, e)
+
+    def _dead_letter(self, item: _PendingDetection, error: Exception):
+        self.dead_lettered += 1
+        print(f"❌ Dropping detection record for user {item.values.get('user_id')} after {item.attempts} attempts: {error}")
+        if self.dead_letter_path is None:
+            return
+        try:
+            self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.dead_letter_path.open("a") as f:
+                f.write(json.dumps(
+                    {"error": str(error), "values": item.values, "objects": item.objects},
+                    default=str
+                ) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write dead letter file {self.dead_letter_path}: {e}")
+
+    def shutdown(self):
+        """Flush queued rows and stop the thread"""
+        if self._stopped:
+            return
+        with self._lock:
+            self._stopped = True
+        self._wakeup.set()
+        self._thread.join(timeout=30)
+        self.flush()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "written": self.written,
+            "batches": self.batches,
+            "sync_fallbacks": self.sync_fallbacks,
+            "errors": self.errors,
+            "dead_lettered": self.dead_lettered,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 2)
+        }
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _insert(self, items: List[_PendingDetection]):
+        started = time.perf_counter()
+        rows = [item.values for item in items]
+        db = self.session_factory()
+        try:
+            # One executemany INSERT per table inside one transaction (bulk inserts
+            # bypass the ORM flush events, so per-user stats are folded in explicitly)
+            ids = db.scalars(insert(Detection).returning(Detection.id, sort_by_parameter_order=True), rows).all()
+            object_rows = [
+                row
+                for detection_id, item in zip(ids, items)
+                for row in with_parent(item.objects, detection_id, item.values["user_id"], item.values["created_at"])
+            ]
+            if object_rows:
+                db.execute(insert(DetectedObjectRecord), object_rows)
+            record_added(db.connection(), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self.written += len(rows)
+        self.batches += 1
+        self.last_flush_seconds = time.perf_counter() - started
+
+        for detection_id, item in zip(ids, items):
+            if item.on_written:
+                try:
+                    item.on_written(detection_id)
+                except Exception as e:
+                    print(f"⚠️ Detection {detection_id} written, but its callback failed: {e}")
+
+
+def save_detection(
+    db: Session,
+    writer: Optional[DetectionWriter],
+    objects: Optional[List[dict]] = None,
+    on_written: Optional[Callable[[int], None]] = None,
+    commit: bool = True,
+    **values
+) -> Optional[Detection]:
+    """
+    Record a Detection row and its detected_objects rows, the one path every
+    detection write takes. With a write-behind `writer` the row is queued and
+    None is returned (`on_written` gets its id once inserted); otherwise it is
+    added to `db`, flushed and (unless `commit` is False) committed.
+    """
+    if writer:
+        writer.submit(values, objects, on_written)
+        return None
+    detection = Detection(**values)
+    db.add(detection)
+    db.flush()
+    add_objects(db, detection, objects or [])
+    if commit:
+        db.commit()
+    return detection
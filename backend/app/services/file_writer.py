@@ -0,0 +1,111 @@
+import queue
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+class BackgroundFileWriter:
+    """
+    Writes uploads and results to disk on a background thread.
+
+    Requests hand over bytes they already hold in memory and return without
+    waiting for the disk. Until a write lands, its bytes stay readable via
+    `get_pending` so a result URL can be served immediately. When the queue
+    is full the caller writes synchronously instead of dropping data.
+    """
+
+    def __init__(self, max_queue_size: int = 64):
+        self._queue: "queue.Queue[Optional[Tuple[Path, bytes]]]" = queue.Queue(maxsize=max(1, max_queue_size))
+        self._pending: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="file-writer", daemon=True)
+        self._thread.start()
+
+        self.written = 0
+        self.bytes_written = 0
+        self.sync_fallbacks = 0
+        self.errors = 0
+
+    def write(self, path: Path, data: bytes):
+        """Queue `data` to be written to `path`"""
+        path = Path(path)
+        if self._stopped:
+            self._write(path, data)
+            return
+        with self._lock:
+            self._pending[str(path)] = data
+        try:
+            self._queue.put_nowait((path, data))
+        except queue.Full:
+            self.sync_fallbacks += 1
+            self._write(path, data)
+
+    def get_pending(self, path: Path) -> Optional[bytes]:
+        """Bytes queued for `path` that have not reached the disk yet"""
+        with self._lock:
+            return self._pending.get(str(path))
+
+    def discard(self, path: Path):
+        """Drop a queued write, e.g. when the request it belonged to failed"""
+        with self._lock:
+            self._pending.pop(str(path), None)
+        Path(path).unlink(missing_ok=True)
+
+    def shutdown(self):
+        """Flush queued writes and stop the thread"""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(None)
+        self._thread.join(timeout=30)
+        if self._thread.is_alive():
+            return
+        # A write that raced with shutdown may have been queued behind the sentinel
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                self._write_if_wanted(*item)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "written": self.written,
+            "bytes_written": self.bytes_written,
+            "sync_fallbacks": self.sync_fallbacks,
+            "errors": self.errors
+        }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._write_if_wanted(*item)
+
+    def _write_if_wanted(self, path: Path, data: bytes):
+        # A discarded or superseded write no longer owns the pending entry
+        with self._lock:
+            still_wanted = self._pending.get(str(path)) is data
+        if still_wanted:
+            self._write(path, data)
+
+    def _write(self, path: Path, data: bytes):
+        try:
+            tmp_path = path.with_name(path.name + ".tmp")
+            tmp_path.write_bytes(data)
+            tmp_path.replace(path)
+            self.written += 1
+            self.bytes_written += len(data)
+        except OSError as e:
+            self.errors += 1
+            print(f"⚠️ Could not write {path}: {e}")
+        finally:
+            with self._lock:
+                if self._pending.get(str(path)) is data:
+                    self._pending.pop(str(path), None)
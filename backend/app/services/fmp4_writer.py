@@ -0,0 +1,75 @@
+import shutil
+import subprocess
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=1)
+def ffmpeg_path() -> Optional[str]:
+    """Resolved ffmpeg binary, or None when it is not installed"""
+    return shutil.which(settings.FFMPEG_PATH)
+
+
+class FragmentedMP4Writer:
+    """
+    cv2.VideoWriter-compatible writer that pipes frames to ffmpeg as
+    fragmented MP4.
+
+    The moov box goes first and a new fragment starts at every keyframe
+    (every VIDEO_FRAGMENT_SECONDS), so the file is playable while it is
+    still being written.
+    """
+
+    def __init__(self, output_path: str, fps: float, width: int, height: int):
+        binary = ffmpeg_path()
+        if binary is None:
+            raise RuntimeError("ffmpeg is not available")
+        self.output_path = str(output_path)
+        self.frame_size = (width, height)
+        gop = max(1, round(fps * settings.VIDEO_FRAGMENT_SECONDS))
+        self._proc = subprocess.Popen(
+            [
+                binary, "-hide_banner", "-loglevel", "error", "-y",
+                "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", str(fps),
+                "-i", "-",
+                "-an",
+                # x264 needs even dimensions for yuv420p
+                "-vf", "scale=trunc(iw/2)*2:trunc(ih/2)*2",
+                "-c:v", "libx264", "-preset", settings.FFMPEG_PRESET, "-tune", "zerolatency",
+                "-pix_fmt", "yuv420p",
+                "-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0",
+                "-movflags", "frag_keyframe+empty_moov+default_base_moof",
+                "-f", "mp4", self.output_path
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+
+    def isOpened(self) -> bool:
+        return self._proc.poll() is None
+
+    def write(self, frame: np.ndarray):
+        try:
+            self._proc.stdin.write(np.ascontiguousarray(frame).tobytes())
+        except (BrokenPipeError, ValueError):
+            raise RuntimeError(f"ffmpeg stopped: {self._error()}")
+
+    def release(self):
+        if self._proc.stdin.closed:
+            return
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        if self._proc.wait() != 0:
+            print(f"⚠️ ffmpeg exited with {self._proc.returncode}: {self._error()}")
+
+    def _error(self) -> str:
+        if self._proc.poll() is None:
+            return "still running"
+        return self._proc.stderr.read().decode(errors="replace").strip() or f"exit code {self._proc.returncode}"
@@ -0,0 +1,288 @@
+import json
+import shutil
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.services.detection_batch import DetectionBatch
+
+MAGIC = b"YFRM"
+VERSION = 1
+# magic, version, header length; the JSON header is padded so arrays start 64-byte aligned
+PREAMBLE = struct.Struct("<4sII")
+ALIGNMENT = 64
+
+# Fixed-width per-object columns (per-frame counts are kept alongside while writing)
+COLUMNS = {
+    "frame_index": ("<u4", ()),
+    "boxes": ("<f4", (4,)),
+    "confidences": ("<f4", ()),
+    "class_ids": ("<u2", ())
+}
+
+
+def _row_bytes(dtype: str, shape: tuple) -> int:
+    return np.dtype(dtype).itemsize * int(np.prod(shape or (1,)))
+
+
+def sidecar_path(result_path) -> Path:
+    """Where the per-frame detections of a result video live"""
+    return Path(result_path).with_suffix(".dets")
+
+
+def _temp_path(path: Path, column: str) -> Path:
+    return path.with_name(f"{path.name}.{column}.tmp")
+
+
+def discard_partial(path: Path):
+    """Remove the temp columns of a sidecar that will never be finished"""
+    for column in list(COLUMNS) + ["counts"]:
+        _temp_path(Path(path), column).unlink(missing_ok=True)
+
+
+class FrameDetectionWriter:
+    """
+    Streams per-frame detections of a video to a columnar sidecar file.
+
+    While processing, each column is appended to its own temp file, so memory
+    stays flat for hours of footage. `close()` assembles them behind a JSON
+    header describing each column's dtype, shape and byte offset, plus a
+    frame -> first-object offset index, so readers can memory-map it.
+
+    Temp files survive a restart: `resume_frame` truncates them back to a
+    checkpoint. If they no longer cover it, the sidecar is dropped
+    (`enabled` turns False) rather than written with a gap.
+    """
+
+    def __init__(self, path: Path, fps: float, resume_frame: int = 0):
+        self.path = Path(path)
+        self.fps = fps
+        self.names: Mapping[int, str] = {}
+        self.enabled = True
+        self._counts = array("I")
+        self._files = {}
+
+        if resume_frame and not self._load_counts(resume_frame):
+            self.enabled = False
+            self.discard()
+            return
+
+        # Open every column (and the counts) positioned right after the last kept frame
+        objects = self.object_count
+        sizes = {name: objects * _row_bytes(dtype, shape) for name, (dtype, shape) in COLUMNS.items()}
+        sizes["counts"] = len(self._counts) * self._counts.itemsize
+        for name, size in sizes.items():
+            f = self._temp_path(name).open("r+b" if resume_frame else "wb")
+            f.truncate(size)
+            f.seek(0, 2)
+            self._files[name] = f
+
+    def _load_counts(self, resume_frame: int) -> bool:
+        """Per-frame counts up to `resume_frame`, if every temp file still covers them"""
+        try:
+            counts = array("I")
+            counts.frombytes(self._temp_path("counts").read_bytes()[:resume_frame * counts.itemsize])
+            if len(counts) < resume_frame:
+                return False
+            objects = sum(counts)
+            for name, (dtype, shape) in COLUMNS.items():
+                if self._temp_path(name).stat().st_size < objects * _row_bytes(dtype, shape):
+                    return False
+        except FileNotFoundError:
+            return False
+        self._counts = counts
+        return True
+
+    @property
+    def frames(self) -> int:
+        return len(self._counts)
+
+    @property
+    def object_count(self) -> int:
+        return int(sum(self._counts))
+
+    def _temp_path(self, column: str) -> Path:
+        return _temp_path(self.path, column)
+
+    def append(self, detections: DetectionBatch):
+        """Add the next frame's detections"""
+        if not self.enabled:
+            return
+        if detections.names:
+            self.names = detections.names
+        frame = len(self._counts)
+        count = len(detections)
+        self._counts.append(count)
+        self._files["counts"].write(struct.pack("<I", count))
+        if count:
+            self._files["frame_index"].write(np.full(count, frame, dtype="<u4").tobytes())
+            self._files["boxes"].write(np.ascontiguousarray(detections.boxes, dtype="<f4").tobytes())
+            self._files["confidences"].write(np.ascontiguousarray(detections.confidences, dtype="<f4").tobytes())
+            self._files["class_ids"].write(detections.class_ids.astype("<u2").tobytes())
+
+    def flush(self):
+        """Push buffered rows to disk (called at checkpoints)"""
+        if not self.enabled:
+            return
+        for f in self._files.values():
+            if not f.closed:
+                f.flush()
+
+    def close(self) -> Optional[Path]:
+        """Assemble the sidecar and remove the temp files; returns its path"""
+        if not self.enabled:
+            return None
+        self._close_files()
+
+        objects = self.object_count
+        frame_offsets = np.zeros(len(self._counts) + 1, dtype="<i8")
+        np.cumsum(np.frombuffer(self._counts.tobytes(), dtype="<u4"), out=frame_offsets[1:])
+
+        columns = {"frame_offsets": {"dtype": "<i8", "shape": [len(frame_offsets)]}}
+        for name, (dtype, shape) in COLUMNS.items():
+            columns[name] = {"dtype": dtype, "shape": [objects, *shape]}
+
+        # Offsets are relative to the end of the header; every column starts aligned
+        position = 0
+        for column in columns.values():
+            column["offset"] = position
+            size = np.dtype(column["dtype"]).itemsize * int(np.prod(column["shape"]))
+            position += size + (-size % ALIGNMENT)
+
+        header = json.dumps({
+            "version": VERSION,
+            "fps": self.fps,
+            "frames": len(self._counts),
+            "objects": objects,
+            "names": {str(k): v for k, v in self.names.items()},
+            "columns": columns
+        }).encode()
+        header += b" " * (-(PREAMBLE.size + len(header)) % ALIGNMENT)
+
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("wb") as out:
+            out.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+            out.write(header)
+            out.write(frame_offsets.tobytes())
+            out.write(b"\0" * (-out.tell() % ALIGNMENT))
+            for name in COLUMNS:
+                with self._temp_path(name).open("rb") as column_file:
+                    shutil.copyfileobj(column_file, out, 1024 * 1024)
+                out.write(b"\0" * (-out.tell() % ALIGNMENT))
+        tmp_path.replace(self.path)
+        self.discard()
+        return self.path
+
+    def replay(self, names) -> Iterator[DetectionBatch]:
+        """Detections of the frames kept so far, in order (e.g. to redraw them after a resume)"""
+        self.flush()
+        columns = {name: self._temp_path(name).open("rb") for name in COLUMNS}
+        try:
+            for count in self._counts:
+                rows = {
+                    name: np.frombuffer(columns[name].read(count * _row_bytes(dtype, shape)), dtype=dtype)
+                    for name, (dtype, shape) in COLUMNS.items()
+                }
+                yield DetectionBatch(
+                    rows["boxes"].reshape(-1, 4),
+                    rows["confidences"],
+                    rows["class_ids"].astype(np.int32),
+                    names
+                )
+        finally:
+            for f in columns.values():
+                f.close()
+
+    def suspend(self):
+        """Close the temp column files but keep them for a later resume"""
+        self.flush()
+        self._close_files()
+
+    def discard(self):
+        """Remove the temp column files"""
+        self._close_files()
+        discard_partial(self.path)
+
+    def _close_files(self):
+        for f in self._files.values():
+            if not f.closed:
+                f.close()
+
+
+class FrameDetectionReader:
+    """Memory-mapped view of a sidecar; only the pages a query touches are read"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            magic, version, header_length = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a frame detection file: {path}")
+            header = json.loads(f.read(header_length))
+        self.version = version
+        self.fps = header["fps"] or 30.0
+        self.frames = header["frames"]
+        self.objects = header["objects"]
+        self.names = {int(k): v for k, v in header["names"].items()}
+
+        data_start = PREAMBLE.size + header_length
+        columns = {}
+        for name, column in header["columns"].items():
+            shape = tuple(column["shape"])
+            if int(np.prod(shape)) == 0:
+                # numpy cannot map a zero-length region
+                columns[name] = np.zeros(shape, dtype=column["dtype"])
+            else:
+                columns[name] = np.memmap(
+                    self.path, dtype=column["dtype"], mode="r", offset=data_start + column["offset"], shape=shape
+                )
+        self.frame_offsets = columns["frame_offsets"]
+        self.frame_index = columns["frame_index"]
+        self.boxes = columns["boxes"]
+        self.confidences = columns["confidences"]
+        self.class_ids = columns["class_ids"]
+
+    def frame_range(self, start_time: Optional[float], end_time: Optional[float]) -> Tuple[int, int]:
+        """[first, last) frame indices covering a time range in seconds"""
+        first = 0 if start_time is None else max(0, int(np.ceil(start_time * self.fps)))
+        last = self.frames if end_time is None else min(self.frames, int(np.floor(end_time * self.fps)) + 1)
+        return first, max(first, last)
+
+    def query(
+        self,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        class_ids: Optional[List[int]] = None,
+        min_confidence: Optional[float] = None
+    ) -> Tuple[np.ndarray, DetectionBatch]:
+        """
+        Detections in a time range, optionally limited to some classes and a
+        minimum confidence, with the frame index of each one
+        """
+        first, last = self.frame_range(start_time, end_time)
+        lo, hi = int(self.frame_offsets[first]), int(self.frame_offsets[last])
+        mask = np.ones(hi - lo, dtype=bool)
+        if class_ids is not None:
+            mask &= np.isin(self.class_ids[lo:hi], class_ids)
+        if min_confidence is not None:
+            mask &= self.confidences[lo:hi] >= min_confidence
+        selected = np.nonzero(mask)[0] + lo
+        return np.asarray(self.frame_index[selected]), DetectionBatch(
+            np.asarray(self.boxes[selected]),
+            np.asarray(self.confidences[selected]),
+            np.asarray(self.class_ids[selected], dtype=np.int32),
+            self.names
+        )
+
+    def frame(self, index: int) -> DetectionBatch:
+        """One frame's detections"""
+        lo, hi = int(self.frame_offsets[index]), int(self.frame_offsets[index + 1])
+        return DetectionBatch(
+            np.asarray(self.boxes[lo:hi]),
+            np.asarray(self.confidences[lo:hi]),
+            np.asarray(self.class_ids[lo:hi], dtype=np.int32),
+            self.names
+        )
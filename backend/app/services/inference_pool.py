@@ -0,0 +1,126 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+
+
+class InferenceQueueFull(Exception):
+    """Raised when an inference pool has no room for another job"""
+
+    def __init__(self, pool_name: str, retry_after: int):
+        super().__init__(f"{pool_name} queue is full")
+        self.pool_name = pool_name
+        self.retry_after = retry_after
+
+
+class InferencePool:
+    """
+    Bounded thread pool that keeps blocking YOLO work off the event loop.
+
+    At most `max_workers` jobs run at once and at most `max_queue_size` more
+    may wait; anything beyond that is rejected immediately with
+    InferenceQueueFull so callers can fast-fail instead of piling up.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue_size: int, retry_after: int = 1):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue_size = max(0, max_queue_size)
+        self.retry_after = retry_after
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix=f"{name}-worker"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0  # queued + running
+        self._running = 0
+
+        self._started = 0
+        self._completed = 0
+        self._rejected = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._recent_waits: deque = deque(maxlen=1000)
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs accepted but not yet started"""
+        with self._lock:
+            return self._pending - self._running
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs):
+        """Submit a job to the pool, raising InferenceQueueFull when at capacity"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue_size:
+                self._rejected += 1
+                raise InferenceQueueFull(self.name, self.retry_after)
+            self._pending += 1
+
+        submitted_at = time.monotonic()
+
+        def job():
+            waited = time.monotonic() - submitted_at
+            with self._lock:
+                self._running += 1
+                self._started += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+                self._recent_waits.append(waited)
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self._failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+            return result
+
+        try:
+            future = self._executor.submit(job)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # Fires on completion and on cancellation of a job that never started
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking function in the pool and await its result"""
+        return await asyncio.wrap_future(self.submit(functools.partial(func, *args, **kwargs)))
+
+    def get_stats(self) -> dict:
+        """Queue depth and wait-time statistics"""
+        with self._lock:
+            recent = np.array(self._recent_waits) if self._recent_waits else None
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "running": self._running,
+                "queue_depth": self._pending - self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": (self._total_wait / self._started * 1000.0) if self._started else 0.0,
+                "p95_wait_ms": float(np.percentile(recent, 95) * 1000.0) if recent is not None else 0.0,
+                "max_wait_ms": self._max_wait * 1000.0
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting jobs and release worker threads"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,231 @@
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from ultralytics import YOLO
+
+from app.core.config import settings
+from app.services.onnx_backend import check_backend, configure_session, export_onnx
+
+
+def resolve_model_path(model_name: str) -> Path:
+    """Find a model file in MODELS_DIR, falling back to the working directory"""
+    full_model_path = settings.MODELS_DIR / model_name
+    if not full_model_path.exists():
+        full_model_path = Path(model_name)
+    if not full_model_path.exists():
+        raise FileNotFoundError(f"Model file not found: {model_name}")
+    return full_model_path
+
+
+class LoadedModel:
+    """A YOLO model resident in the registry together with its own predict lock"""
+
+    def __init__(self, name: str, backend: str, path: Path, model: YOLO, size_bytes: int, version: str):
+        self.name = name
+        self.backend = backend
+        self.path = path
+        self.model = model
+        self.size_bytes = size_bytes
+        self.version = version  # changes when the weights file changes
+        self.lock = threading.Lock()  # ultralytics predictors are not thread-safe
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+    @property
+    def names(self) -> Dict[int, str]:
+        return self.model.names
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "backend": self.backend,
+            "path": str(self.path),
+            "size_mb": round(self.size_bytes / (1024 * 1024), 1),
+            "classes_count": len(self.names),
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used
+        }
+
+
+class ModelRegistry:
+    """
+    Keeps up to `max_models` YOLO models loaded in an LRU bounded by both
+    count and estimated memory.
+
+    Models are loaded on first use (or preloaded on startup) and warmed up
+    with a dummy inference so the first real request does not pay for
+    predictor setup. Pinned models, such as the default, are never evicted.
+
+    Entries are keyed by (model, backend): with the "onnx" backend a .pt
+    model is exported once and served through onnxruntime instead.
+    """
+
+    def __init__(
+        self,
+        device: str,
+        max_models: int,
+        max_memory_bytes: int,
+        warmup: bool = True,
+        backend: str = "pytorch"
+    ):
+        check_backend(backend)
+        self.device = device
+        self.backend = backend
+        self.max_models = max(1, max_models)
+        self.max_memory_bytes = max_memory_bytes
+        self.warmup = warmup
+
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[Tuple[str, str], LoadedModel]" = OrderedDict()
+        self._loading: Dict[Tuple[str, str], threading.Lock] = {}
+        self._pinned: set = set()
+
+        self.loads = 0
+        self.evictions = 0
+
+    def peek(self, name: str, backend: Optional[str] = None) -> Optional[LoadedModel]:
+        """Return a loaded model without loading or touching LRU order"""
+        with self._lock:
+            return self._models.get((name, backend or self.backend))
+
+    def get(self, name: str, backend: Optional[str] = None) -> LoadedModel:
+        """Return a loaded model, loading (and evicting others) if needed"""
+        key = (name, backend or self.backend)
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                entry.last_used = time.time()
+                return entry
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        # One loader per model; others wait and then find it loaded
+        with load_lock:
+            try:
+                with self._lock:
+                    entry = self._models.get(key)
+                    if entry is not None:
+                        return entry
+                entry = self._load(*key)
+                with self._lock:
+                    self._models[key] = entry
+                    self._evict()
+                return entry
+            finally:
+                # Also on a failed load, so the key does not keep a stale lock
+                with self._lock:
+                    if self._loading.get(key) is load_lock:
+                        self._loading.pop(key)
+
+    def set_backend(self, backend: str):
+        """Serve subsequent requests from `backend`; other entries age out of the LRU"""
+        check_backend(backend)
+        with self._lock:
+            self.backend = backend
+
+    def pin(self, name: str):
+        with self._lock:
+            self._pinned.add(name)
+
+    def unpin(self, name: str):
+        with self._lock:
+            self._pinned.discard(name)
+
+    def preload(self, names: List[str]):
+        """Load models up front so their first request is warm"""
+        for name in names:
+            try:
+                self.get(name)
+                print(f"✅ Preloaded model: {name}")
+            except Exception as e:
+                print(f"⚠️ Could not preload model {name}: {e}")
+
+    def evict(self, name: str):
+        """Drop a model (all backends) from memory, e.g. after its weights changed"""
+        with self._lock:
+            for key in [key for key in self._models if key[0] == name]:
+                self._models.pop(key)
+
+    def loaded_models(self) -> List[dict]:
+        with self._lock:
+            return [
+                {**entry.to_dict(), "pinned": self._is_pinned(entry)}
+                for entry in self._models.values()
+            ]
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "loaded": len(self._models),
+                "max_models": self.max_models,
+                "memory_bytes": sum(e.size_bytes for e in self._models.values()),
+                "max_memory_bytes": self.max_memory_bytes,
+                "loads": self.loads,
+                "evictions": self.evictions
+            }
+
+    def _load(self, name: str, backend: str) -> LoadedModel:
+        path = resolve_model_path(name)
+        stat = path.stat()
+        warmup_image = np.zeros((settings.WARMUP_IMGSZ, settings.WARMUP_IMGSZ, 3), dtype=np.uint8)
+
+        # Exported/quantized .onnx variants always run through onnxruntime
+        if backend == "onnx" or path.suffix == ".onnx":
+            artifact = path if path.suffix == ".onnx" else export_onnx(path, settings.ONNX_IMGSZ)
+            model = YOLO(str(artifact), task="detect")
+            # The predictor (and its session) only exists after a first predict,
+            # which doubles as the warmup unless the session is then swapped
+            model.predict(warmup_image, verbose=False)
+            warmed_up = not configure_session(
+                model, artifact, settings.ONNX_INTRA_OP_THREADS, settings.ONNX_INTER_OP_THREADS
+            )
+            size_bytes = artifact.stat().st_size
+        else:
+            warmed_up = False
+            model = YOLO(str(path))
+
+            # Move model to appropriate device
+            if self.device == "cuda":
+                model.to('cuda')
+
+            size_bytes = self._estimate_size(model)
+
+        if self.warmup and not warmed_up:
+            model.predict(warmup_image, verbose=False)
+
+        with self._lock:
+            self.loads += 1
+        version = f"{name}:{backend}@{stat.st_mtime_ns}:{stat.st_size}"
+        return LoadedModel(name, backend, path, model, size_bytes, version=version)
+
+    @staticmethod
+    def _estimate_size(model: YOLO) -> int:
+        torch_model = getattr(model, "model", None)
+        if torch_model is None or not hasattr(torch_model, "parameters"):
+            return 0
+        tensors = list(torch_model.parameters()) + list(torch_model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def _is_pinned(self, entry: LoadedModel) -> bool:
+        # Pins follow the active backend so a switched-away entry can age out
+        return entry.name in self._pinned and entry.backend == self.backend
+
+    def _evict(self):
+        # Caller holds self._lock
+        def over_budget():
+            memory = sum(e.size_bytes for e in self._models.values())
+            return len(self._models) > self.max_models or memory > self.max_memory_bytes
+
+        for key, entry in list(self._models.items()):
+            if not over_budget():
+                break
+            if self._is_pinned(entry) or len(self._models) == 1:
+                continue
+            self._models.pop(key)
+            self.evictions += 1
+            print(f"♻️ Evicted model from pool: {entry.name} ({entry.backend})")
@@ -0,0 +1,84 @@
+import hashlib
+import shutil
+import tempfile
+from pathlib import Path
+
+from ultralytics import YOLO
+
+BACKENDS = ("pytorch", "onnx")
+
+
+def file_hash(path: Path, length: int = 16) -> str:
+    """Short sha256 of a weights file, used to key exported artifacts"""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def onnx_artifact_path(weights_path: Path, imgsz: int) -> Path:
+    """Where the ONNX export of `weights_path` at `imgsz` is cached"""
+    return weights_path.with_name(f"{weights_path.stem}-{file_hash(weights_path)}-{imgsz}.onnx")
+
+
+def export_onnx(weights_path: Path, imgsz: int) -> Path:
+    """
+    Export PyTorch weights to ONNX once and reuse the artifact afterwards.
+
+    The artifact sits next to the weights and is keyed by the weights' hash
+    and the input size, so replacing the .pt file triggers a fresh export.
+    Batch and spatial axes are dynamic so batched predicts keep working.
+    """
+    artifact = onnx_artifact_path(weights_path, imgsz)
+    if artifact.exists():
+        return artifact
+
+    print(f"📦 Exporting {weights_path.name} to ONNX (imgsz={imgsz})...")
+    # Ultralytics writes <stem>.onnx next to the weights, so export a copy in a
+    # scratch dir rather than overwrite a user's own <stem>.onnx
+    with tempfile.TemporaryDirectory(prefix=".onnx-export-", dir=artifact.parent) as workdir:
+        source = Path(workdir) / weights_path.name
+        shutil.copy2(weights_path, source)
+        exported = YOLO(str(source)).export(format="onnx", imgsz=imgsz, dynamic=True, verbose=False)
+        if artifact.exists():
+            return artifact  # a concurrent export got there first
+        Path(exported).replace(artifact)
+    print(f"✅ ONNX artifact cached: {artifact}")
+    return artifact
+
+
+def configure_session(model: YOLO, onnx_path: Path, intra_op_threads: int, inter_op_threads: int) -> bool:
+    """
+    Replace the predictor's onnxruntime session with one using our thread settings.
+
+    Ultralytics builds its session with default options, so once the
+    predictor exists its session is swapped for a CPU session honouring the
+    configured intra/inter-op thread counts (0 keeps onnxruntime's default).
+    Returns whether the session was replaced.
+    """
+    if not intra_op_threads and not inter_op_threads:
+        return False
+
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    options.inter_op_num_threads = inter_op_threads
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    backend = model.predictor.model
+    backend.session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+    backend.output_names = [output.name for output in backend.session.get_outputs()]
+    return True
+
+
+def check_backend(backend: str):
+    """Validate a backend name and that its runtime is importable"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    if backend == "onnx":
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            raise ValueError("The onnx backend requires the onnxruntime package")
@@ -0,0 +1,252 @@
+import json
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from app.core.config import settings
+from app.services.detection_batch import DetectionBatch
+from app.services.onnx_backend import export_onnx, file_hash
+from app.services.tracking import box_iou
+
+QUANTIZATION_MODES = ("dynamic", "static")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def variant_path(weights_path: Path, mode: str, imgsz: int) -> Path:
+    """Where the INT8 variant of `weights_path` is cached (always under MODELS_DIR)"""
+    return settings.MODELS_DIR / f"{weights_path.stem}-{file_hash(weights_path)}-{imgsz}-int8-{mode}.onnx"
+
+
+def report_path(artifact: Path) -> Path:
+    return artifact.with_suffix(".json")
+
+
+def sample_images(folder: Path, limit: int) -> List[Path]:
+    """Up to `limit` images from a calibration folder, in a stable order"""
+    if not folder.is_dir():
+        return []
+    images = sorted(p for p in folder.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    return images[:limit]
+
+
+def letterbox(image: np.ndarray, imgsz: int) -> np.ndarray:
+    """Resize keeping aspect ratio and pad to imgsz x imgsz, as ultralytics preprocessing does"""
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    resized = cv2.resize(image, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top = (imgsz - resized.shape[0]) // 2
+    left = (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    return canvas
+
+
+class ImageFolderCalibrationReader:
+    """Feeds letterboxed sample images to onnxruntime's static quantizer"""
+
+    def __init__(self, images: List[Path], input_name: str, imgsz: int):
+        self.images = images
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._iterator: Optional[Iterator[dict]] = None
+
+    def _batches(self) -> Iterator[dict]:
+        for path in self.images:
+            image = cv2.imread(str(path))
+            if image is None:
+                continue
+            # BGR HWC uint8 -> RGB NCHW float in [0, 1]
+            tensor = letterbox(image, self.imgsz)[:, :, ::-1].transpose(2, 0, 1)[None]
+            yield {self.input_name: np.ascontiguousarray(tensor, dtype=np.float32) / 255.0}
+
+    def get_next(self) -> Optional[dict]:
+        if self._iterator is None:
+            self._iterator = self._batches()
+        return next(self._iterator, None)
+
+    def rewind(self):
+        self._iterator = None
+
+
+def quantize_model(
+    weights_path: Path,
+    mode: str = "dynamic",
+    calibration_dir: Optional[Path] = None,
+    imgsz: Optional[int] = None
+) -> Path:
+    """
+    Produce (or reuse) an INT8 ONNX variant of a PyTorch model.
+
+    "dynamic" quantizes weights ahead of time and activations on the fly;
+    "static" also fixes activation ranges from the calibration images.
+    """
+    from onnx import load_model, save_model
+    from onnxruntime import InferenceSession
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode '{mode}'. Choose from: {', '.join(QUANTIZATION_MODES)}")
+
+    imgsz = imgsz or settings.ONNX_IMGSZ
+    artifact = variant_path(weights_path, mode, imgsz)
+    if artifact.exists():
+        return artifact
+
+    fp32_path = export_onnx(weights_path, imgsz)
+    tmp_path = artifact.with_suffix(".onnx.tmp")
+    print(f"🧮 Quantizing {weights_path.name} to INT8 ({mode})...")
+
+    if mode == "static":
+        images = sample_images(calibration_dir or settings.QUANTIZATION_CALIBRATION_DIR, settings.QUANTIZATION_CALIBRATION_IMAGES)
+        if not images:
+            raise ValueError("Static quantization needs sample images in the calibration folder")
+        input_name = InferenceSession(str(fp32_path), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        quantize_static(
+            str(fp32_path),
+            str(tmp_path),
+            ImageFolderCalibrationReader(images, input_name, imgsz),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8
+        )
+    else:
+        quantize_dynamic(str(fp32_path), str(tmp_path), weight_type=QuantType.QUInt8)
+
+    # Keep ultralytics' export metadata (class names, stride, imgsz) on the variant
+    fp32_model, int8_model = load_model(str(fp32_path)), load_model(str(tmp_path))
+    del int8_model.metadata_props[:]
+    int8_model.metadata_props.extend(fp32_model.metadata_props)
+    save_model(int8_model, str(tmp_path))
+
+    tmp_path.replace(artifact)
+    print(f"✅ INT8 variant cached: {artifact}")
+    return artifact
+
+
+def _time_predictions(model: YOLO, images: List[np.ndarray], conf: float, iou: float):
+    model.predict(images[0], conf=conf, iou=iou, verbose=False)  # warmup
+    latencies, detections = [], []
+    for image in images:
+        start = time.perf_counter()
+        result = model.predict(image, conf=conf, iou=iou, verbose=False)[0]
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        detections.append(DetectionBatch.from_results(result))
+    return np.array(latencies), detections
+
+
+def _latency_summary(latencies: np.ndarray) -> dict:
+    return {
+        "mean_ms": round(float(latencies.mean()), 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2)
+    }
+
+
+def compare_models(
+    weights_path: Path,
+    variant: Path,
+    images: List[Path],
+    conf: float,
+    iou: float,
+    match_iou: float = 0.5
+) -> dict:
+    """
+    Latency and detection agreement of an INT8 variant against its FP32 original.
+
+    Each FP32 detection is greedily matched to the variant's highest-IoU box;
+    the report gives the mean IoU of matched pairs, the share of FP32 boxes
+    matched at `match_iou`, and how many matches kept the same class.
+    """
+    frames = [frame for frame in (cv2.imread(str(p)) for p in images) if frame is not None]
+    if not frames:
+        raise ValueError("Accuracy report needs sample images in the calibration folder")
+
+    fp32_latency, fp32_detections = _time_predictions(YOLO(str(weights_path)), frames, conf, iou)
+    int8_latency, int8_detections = _time_predictions(YOLO(str(variant), task="detect"), frames, conf, iou)
+
+    reference_boxes = matched = same_class = 0
+    matched_ious: List[float] = []
+    for reference, candidate in zip(fp32_detections, int8_detections):
+        reference_boxes += len(reference)
+        ious = box_iou(reference.boxes, candidate.boxes)
+        used = set()
+        for ref_idx in np.argsort(-reference.confidences):
+            if not ious.shape[1]:
+                break
+            order = [c for c in np.argsort(-ious[ref_idx]) if c not in used]
+            if not order or ious[ref_idx, order[0]] < match_iou:
+                continue
+            best = int(order[0])
+            used.add(best)
+            matched += 1
+            matched_ious.append(float(ious[ref_idx, best]))
+            same_class += int(reference.class_ids[ref_idx] == candidate.class_ids[best])
+
+    fp32_summary = _latency_summary(fp32_latency)
+    int8_summary = _latency_summary(int8_latency)
+    return {
+        "images": len(frames),
+        "fp32": fp32_summary,
+        "int8": int8_summary,
+        "speedup": round(fp32_summary["mean_ms"] / max(int8_summary["mean_ms"], 1e-6), 2),
+        "fp32_detections": reference_boxes,
+        "int8_detections": sum(len(d) for d in int8_detections),
+        "box_match_rate": round(matched / reference_boxes, 4) if reference_boxes else 1.0,
+        "mean_box_iou": round(float(np.mean(matched_ious)), 4) if matched_ious else None,
+        "class_match_rate": round(same_class / matched, 4) if matched else None
+    }
+
+
+def build_variant(
+    weights_path: Path,
+    mode: str = "dynamic",
+    calibration_dir: Optional[Path] = None,
+    conf: float = 0.25,
+    iou: float = 0.45
+) -> dict:
+    """Quantize a model and write its accuracy/latency report next to the artifact"""
+    calibration_dir = calibration_dir or settings.QUANTIZATION_CALIBRATION_DIR
+    # Checked up front so a missing report never leaves an unreported artifact behind
+    images = sample_images(calibration_dir, settings.QUANTIZATION_REPORT_IMAGES)
+    if not images:
+        raise ValueError("Accuracy report needs sample images in the calibration folder")
+
+    existed = variant_path(weights_path, mode, settings.ONNX_IMGSZ).exists()
+    artifact = quantize_model(weights_path, mode, calibration_dir)
+    try:
+        report = compare_models(weights_path, artifact, images, conf, iou)
+    except Exception:
+        if not existed:
+            artifact.unlink(missing_ok=True)
+        raise
+    report.update({
+        "variant": artifact.name,
+        "variant_of": weights_path.name,
+        "quantization": f"int8-{mode}",
+        "size_mb": round(artifact.stat().st_size / (1024 * 1024), 1),
+        "created_at": time.time()
+    })
+    report_path(artifact).write_text(json.dumps(report, indent=2))
+    return report
+
+
+def list_variants() -> List[dict]:
+    """Quantized variants under MODELS_DIR with their reports, if any"""
+    variants = []
+    for artifact in sorted(settings.MODELS_DIR.glob("*-int8-*.onnx")):
+        try:
+            report = json.loads(report_path(artifact).read_text())
+        except (FileNotFoundError, ValueError):
+            report = None
+        variants.append({
+            "name": artifact.name,
+            "path": str(artifact),
+            "variant_of": report["variant_of"] if report else None,
+            "quantization": report["quantization"] if report else "int8",
+            "report": report
+        })
+    return variants
@@ -0,0 +1,214 @@
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from app.services.detection_batch import DetectionBatch
+
+
+class CachedDetection:
+    """Detections plus the encoded annotated image for one (image, model, thresholds, encoding) key"""
+
+    __slots__ = ("detections", "annotated_image", "processing_time")
+
+    def __init__(self, detections: DetectionBatch, annotated_image: bytes, processing_time: float):
+        self.detections = detections
+        self.annotated_image = annotated_image
+        self.processing_time = processing_time
+
+    @property
+    def size_bytes(self) -> int:
+        d = self.detections
+        return len(self.annotated_image) + d.boxes.nbytes + d.confidences.nbytes + d.class_ids.nbytes + 256
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        d = self.detections
+        np.savez(
+            buffer,
+            boxes=d.boxes,
+            confidences=d.confidences,
+            class_ids=d.class_ids,
+            names=np.frombuffer(json.dumps({int(k): v for k, v in d.names.items()}).encode(), dtype=np.uint8),
+            annotated_image=np.frombuffer(self.annotated_image, dtype=np.uint8),
+            processing_time=np.array(self.processing_time)
+        )
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CachedDetection":
+        with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+            names = {int(k): v for k, v in json.loads(arrays["names"].tobytes()).items()}
+            detections = DetectionBatch(arrays["boxes"], arrays["confidences"], arrays["class_ids"], names)
+            return cls(detections, arrays["annotated_image"].tobytes(), float(arrays["processing_time"]))
+
+
+class DetectionCache:
+    """
+    Content-addressed cache of image detection results.
+
+    Keys hash the image bytes together with the model name, thresholds and
+    the annotated image's encoding.
+    A size-bounded in-memory LRU sits in front of an optional size-bounded
+    on-disk tier, and concurrent misses for the same key are merged so only
+    one of them runs inference (single-flight).
+    """
+
+    def __init__(self, max_memory_bytes: int, disk_dir: Optional[Path] = None, max_disk_bytes: int = 0):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir and max_disk_bytes > 0 else None
+        self.max_disk_bytes = max_disk_bytes
+        self._disk_bytes = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(entry.stat().st_size for entry in self.disk_dir.glob("*.npz"))
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, CachedDetection]" = OrderedDict()
+        self._memory_bytes = 0
+        self._inflight: dict = {}
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+
+    @staticmethod
+    def content_hash(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, model_name: str, confidence: float, iou: float, encoding: str = "") -> str:
+        return hashlib.sha256(f"{content_hash}|{model_name}|{confidence:.4f}|{iou:.4f}|{encoding}".encode()).hexdigest()
+
+    def get_or_compute(self, key: str, compute: Callable[[], CachedDetection]) -> Tuple[CachedDetection, bool]:
+        """Return (value, cache_hit), running `compute` at most once per key at a time"""
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value, True
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = Future()
+                self._inflight[key] = inflight
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            return inflight.result(), True
+
+        try:
+            value = self._read_disk(key)
+            hit = value is not None
+            if hit:
+                with self._lock:
+                    self.disk_hits += 1
+            else:
+                value = compute()
+                with self._lock:
+                    self.misses += 1
+                self._write_disk(key, value)
+            self._store_memory(key, value)
+            inflight.set_result(value)
+            return value, hit
+        except BaseException as e:
+            inflight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self):
+        """Drop every entry, e.g. after the model changes"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.disk_dir:
+            for entry in self.disk_dir.glob("*.npz"):
+                entry.unlink(missing_ok=True)
+            with self._lock:
+                self._disk_bytes = 0
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "hit_rate": ((self.hits + self.disk_hits) / lookups) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "disk_enabled": self.disk_dir is not None
+            }
+
+    def _store_memory(self, key: str, value: CachedDetection):
+        size = value.size_bytes
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = value
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted.size_bytes
+
+    def _read_disk(self, key: str) -> Optional[CachedDetection]:
+        if not self.disk_dir:
+            return None
+        path = self.disk_dir / f"{key}.npz"
+        try:
+            value = CachedDetection.from_bytes(path.read_bytes())
+        except (FileNotFoundError, ValueError, KeyError, OSError):
+            return None
+        path.touch()  # mtime doubles as the disk tier's LRU clock
+        return value
+
+    def _write_disk(self, key: str, value: CachedDetection):
+        if not self.disk_dir:
+            return
+        data = value.to_bytes()
+        if len(data) > self.max_disk_bytes:
+            return
+        tmp_path = self.disk_dir / f"{key}.tmp"
+        tmp_path.write_bytes(data)
+        tmp_path.replace(self.disk_dir / f"{key}.npz")
+        with self._lock:
+            self._disk_bytes += len(data)
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        total = 0
+        for entry in self.disk_dir.glob("*.npz"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+        # Evict down to 90% so a full tier is not rescanned on every write
+        target = int(self.max_disk_bytes * 0.9)
+        for _, size, entry in sorted(entries):
+            if total <= target:
+                break
+            entry.unlink(missing_ok=True)
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
@@ -0,0 +1,318 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+from ultralytics.engine.results import Results
+
+from app.services.detection_batch import DetectionBatch
+
+TRACKER_TYPES = ("iou", "kalman")
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU between Nx4 and Mx4 xyxy boxes"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def _xyxy_to_cxcywh(boxes: np.ndarray) -> np.ndarray:
+    return np.stack([
+        (boxes[:, 0] + boxes[:, 2]) / 2,
+        (boxes[:, 1] + boxes[:, 3]) / 2,
+        boxes[:, 2] - boxes[:, 0],
+        boxes[:, 3] - boxes[:, 1]
+    ], axis=1)
+
+
+def _cxcywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    half_w, half_h = boxes[:, 2] / 2, boxes[:, 3] / 2
+    return np.stack([
+        boxes[:, 0] - half_w,
+        boxes[:, 1] - half_h,
+        boxes[:, 0] + half_w,
+        boxes[:, 1] + half_h
+    ], axis=1)
+
+
+class BoxTracker(ABC):
+    """
+    Carries detector boxes forward between keyframes.
+
+    Keyframe detections are associated to existing tracks greedily by IoU
+    within the same class. Unmatched detections start new tracks and tracks
+    the detector no longer sees are dropped, so keyframes stay authoritative.
+    Subclasses decide how a track's state is predicted and corrected.
+    """
+
+    def __init__(self, iou_threshold: float = 0.3):
+        self.iou_threshold = iou_threshold
+        self.states = np.zeros((0, 8), dtype=np.float32)  # cx, cy, w, h, vcx, vcy, vw, vh
+        self.confs = np.zeros(0, dtype=np.float32)
+        self.classes = np.zeros(0, dtype=np.float32)
+        self.frames_since_update = 0
+
+    def boxes(self) -> np.ndarray:
+        return _cxcywh_to_xyxy(self.states[:, :4])
+
+    def update(self, boxes: np.ndarray, confs: np.ndarray, classes: np.ndarray):
+        """Correct tracks with keyframe detections"""
+        # The keyframe is one frame past the last prediction, so bring the tracks up to it first
+        self.predict()
+        boxes = boxes.astype(np.float32).reshape(-1, 4)
+        measurements = _xyxy_to_cxcywh(boxes)
+        matched = self._associate(boxes, classes)
+
+        self._begin_update(len(boxes))
+        new_states = np.zeros((len(boxes), 8), dtype=np.float32)
+        for det_idx, measurement in enumerate(measurements):
+            track_idx = matched.get(det_idx)
+            if track_idx is None:
+                new_states[det_idx] = self._new_track(det_idx, measurement)
+            else:
+                new_states[det_idx] = self._correct(det_idx, track_idx, measurement)
+        self._end_update()
+
+        self.states = new_states
+        self.confs = confs.astype(np.float32)
+        self.classes = classes.astype(np.float32)
+        self.frames_since_update = 0
+
+    def predict(self) -> np.ndarray:
+        """Advance every track by one frame and return xyxy boxes"""
+        self.states = self._advance(self.states)
+        self.frames_since_update += 1
+        return self.boxes()
+
+    def motion(self) -> float:
+        """Largest per-frame center displacement relative to box size"""
+        if not len(self.states):
+            return 0.0
+        speed = np.hypot(self.states[:, 4], self.states[:, 5])
+        size = np.sqrt(np.maximum(self.states[:, 2] * self.states[:, 3], 1.0))
+        return float((speed / size).max())
+
+    def _associate(self, boxes: np.ndarray, classes: np.ndarray) -> Dict[int, int]:
+        if not len(self.states) or not len(boxes):
+            return {}
+        ious = box_iou(boxes, self.boxes())
+        ious[classes[:, None] != self.classes[None, :]] = 0.0
+        matched: Dict[int, int] = {}
+        used_tracks = set()
+        for flat in np.argsort(-ious, axis=None):
+            det_idx, track_idx = divmod(int(flat), ious.shape[1])
+            if ious[det_idx, track_idx] < self.iou_threshold:
+                break
+            if det_idx in matched or track_idx in used_tracks:
+                continue
+            matched[det_idx] = track_idx
+            used_tracks.add(track_idx)
+        return matched
+
+    def _begin_update(self, n_detections: int):
+        pass
+
+    def _end_update(self):
+        pass
+
+    def _new_track(self, det_idx: int, measurement: np.ndarray) -> np.ndarray:
+        state = np.zeros(8, dtype=np.float32)
+        state[:4] = measurement
+        return state
+
+    @abstractmethod
+    def _advance(self, states: np.ndarray) -> np.ndarray:
+        """States one frame later"""
+
+    @abstractmethod
+    def _correct(self, det_idx: int, track_idx: int, measurement: np.ndarray) -> np.ndarray:
+        """New state of a matched track given its keyframe measurement (cx, cy, w, h)"""
+
+
+class IoUTracker(BoxTracker):
+    """IoU association with constant-velocity extrapolation"""
+
+    def _advance(self, states: np.ndarray) -> np.ndarray:
+        states = states.copy()
+        states[:, :4] += states[:, 4:]
+        return states
+
+    def _correct(self, det_idx: int, track_idx: int, measurement: np.ndarray) -> np.ndarray:
+        # Velocity from the last observed box (the current state is extrapolated)
+        elapsed = self.frames_since_update
+        observed = self.states[track_idx, :4] - self.states[track_idx, 4:] * self.frames_since_update
+        state = np.zeros(8, dtype=np.float32)
+        state[:4] = measurement
+        state[4:] = (measurement - observed) / elapsed
+        return state
+
+
+class KalmanTracker(BoxTracker):
+    """IoU association with a per-track constant-velocity Kalman filter"""
+
+    def __init__(self, iou_threshold: float = 0.3, process_noise: float = 1e-2, measurement_noise: float = 1e-1):
+        super().__init__(iou_threshold)
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.covariances = np.zeros((0, 8, 8), dtype=np.float32)
+        self._next_covariances = self.covariances
+
+        self._F = np.eye(8, dtype=np.float32)
+        self._F[:4, 4:] = np.eye(4, dtype=np.float32)
+        self._H = np.eye(4, 8, dtype=np.float32)
+
+    def _scale(self, measurement: np.ndarray) -> float:
+        return max(float(measurement[2] * measurement[3]) ** 0.5, 1.0)
+
+    def _begin_update(self, n_detections: int):
+        self._next_covariances = np.zeros((n_detections, 8, 8), dtype=np.float32)
+
+    def _end_update(self):
+        self.covariances = self._next_covariances
+
+    def _new_track(self, det_idx: int, measurement: np.ndarray) -> np.ndarray:
+        # Velocity is unknown for a fresh track, so start it with a wide prior
+        std = np.array([1, 1, 1, 1, 10, 10, 10, 10], dtype=np.float32) * self._scale(measurement) * self.measurement_noise
+        self._next_covariances[det_idx] = np.diag(std ** 2)
+        return super()._new_track(det_idx, measurement)
+
+    def _advance(self, states: np.ndarray) -> np.ndarray:
+        if len(states):
+            scale = np.sqrt(np.maximum(states[:, 2] * states[:, 3], 1.0))
+            Q = np.eye(8, dtype=np.float32)[None] * ((self.process_noise * scale) ** 2)[:, None, None]
+            self.covariances = self._F @ self.covariances @ self._F.T + Q
+        return states @ self._F.T
+
+    def _correct(self, det_idx: int, track_idx: int, measurement: np.ndarray) -> np.ndarray:
+        x = self.states[track_idx]
+        P = self.covariances[track_idx]
+        R = np.eye(4, dtype=np.float32) * (self.measurement_noise * self._scale(measurement)) ** 2
+        S = self._H @ P @ self._H.T + R
+        K = P @ self._H.T @ np.linalg.inv(S)
+        self._next_covariances[det_idx] = (np.eye(8, dtype=np.float32) - K @ self._H) @ P
+        return (x + K @ (measurement - self._H @ x)).astype(np.float32)
+
+
+def create_tracker(tracker_type: str) -> BoxTracker:
+    """Build a tracker by name"""
+    if tracker_type == "iou":
+        return IoUTracker()
+    if tracker_type == "kalman":
+        return KalmanTracker()
+    raise ValueError(f"Unknown tracker '{tracker_type}'. Choose from: {', '.join(TRACKER_TYPES)}")
+
+
+class StridedDetector:
+    """
+    Runs the detector only on keyframes and fills the frames in between with
+    tracker predictions.
+
+    With a fixed stride every Nth frame is a keyframe. In adaptive mode the
+    gap shrinks as tracked objects move faster (relative to their size), down
+    to detecting every frame when motion exceeds `motion_threshold`.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[np.ndarray]], List[Any]],
+        names: Dict[int, str],
+        stride: int,
+        tracker_type: str = "iou",
+        adaptive: bool = False,
+        motion_threshold: float = 0.05
+    ):
+        self.predict_batch = predict_batch
+        self.names = names
+        self.stride = max(1, stride)
+        self.tracker = create_tracker(tracker_type)
+        self.adaptive = adaptive
+        self.motion_threshold = motion_threshold
+
+        self.index = 0
+        self.last_key: Optional[int] = None
+        self.keyframes = 0
+        self.frame_shape = None
+
+    def _interval(self) -> int:
+        if not self.adaptive:
+            return self.stride
+        motion = self.tracker.motion()
+        if motion <= 0:
+            return self.stride
+        return int(min(self.stride, max(1, self.stride * self.motion_threshold / motion)))
+
+    def _is_keyframe(self, index: int) -> bool:
+        return self.last_key is None or index - self.last_key >= self._interval()
+
+    def needs_frame(self, offset: int) -> bool:
+        """Whether the frame at `offset` from the start must be fully decoded"""
+        # Adaptive keyframes depend on motion seen so far, so every frame may be one
+        return self.adaptive or offset % self.stride == 0
+
+    def _observe(self, index: int, result):
+        detections = DetectionBatch.from_results(result)
+        self.tracker.update(detections.boxes, detections.confidences, detections.class_ids)
+        self.last_key = index
+        self.keyframes += 1
+
+    def _tracked_result(self, frame: Optional[np.ndarray]):
+        boxes = self.tracker.predict()
+        data = np.concatenate([
+            boxes,
+            self.tracker.confs[:, None],
+            self.tracker.classes[:, None]
+        ], axis=1) if len(boxes) else np.zeros((0, 6), dtype=np.float32)
+        if frame is None:
+            # Frame was only grabbed; a zero-stride view carries the shape without allocating
+            frame = np.broadcast_to(np.zeros(1, dtype=np.uint8), self.frame_shape)
+        return Results(frame, path="", names=self.names, boxes=torch.from_numpy(data.astype(np.float32)))
+
+    def process(self, frames: List[Optional[np.ndarray]]) -> List[Any]:
+        """Produce one result per frame, detecting only on keyframes"""
+        for frame in frames:
+            if frame is not None and self.frame_shape is None:
+                self.frame_shape = frame.shape
+
+        outputs: List[Any] = []
+        if self.adaptive:
+            for frame in frames:
+                index = self.index
+                self.index += 1
+                if self._is_keyframe(index):
+                    result = self.predict_batch([frame])[0]
+                    self._observe(index, result)
+                    outputs.append(result)
+                else:
+                    outputs.append(self._tracked_result(frame))
+            return outputs
+
+        # Fixed stride: keyframes are known up front, so detect them as one batch
+        key_positions = []
+        last_key = self.last_key
+        for offset in range(len(frames)):
+            index = self.index + offset
+            if last_key is None or index - last_key >= self.stride:
+                key_positions.append(offset)
+                last_key = index
+        key_results = dict(zip(
+            key_positions,
+            self.predict_batch([frames[p] for p in key_positions]) if key_positions else []
+        ))
+
+        for offset, frame in enumerate(frames):
+            index = self.index
+            self.index += 1
+            if offset in key_results:
+                self._observe(index, key_results[offset])
+                outputs.append(key_results[offset])
+            else:
+                outputs.append(self._tracked_result(frame))
+        return outputs
@@ -0,0 +1,183 @@
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+
+IMAGE_KINDS = ("jpeg", "png", "bmp", "webp")
+VIDEO_KINDS = ("mp4", "mov", "avi", "mkv")
+
+# Box types that can open a QuickTime file that has no leading ftyp box
+_QUICKTIME_BOXES = (b"moov", b"mdat", b"wide", b"free", b"skip", b"pnot")
+
+
+class UploadTooLarge(Exception):
+    """Raised once an upload grows past the size limit"""
+
+    def __init__(self, limit: int):
+        super().__init__(f"File exceeds the {limit // (1024 * 1024)}MB upload limit")
+        self.limit = limit
+
+
+class _BodyLimitExceeded(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware capping request bodies at `max_body` bytes.
+
+    A declared Content-Length over the cap is refused up front; chunked or
+    mis-declared bodies are counted as they are received and answered with
+    413 the moment they pass it, before the rest is spooled to disk.
+    """
+
+    def __init__(self, app, max_body: int, detail: str):
+        self.app = app
+        self.max_body = max_body
+        self.detail = detail
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_body:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body:
+                    if not response_started and not rejected:
+                        rejected = True
+                        await self._reject(scope, receive, send)
+                    raise _BodyLimitExceeded()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if rejected:
+                return  # Whatever error the app makes of the aborted read, the 413 has been sent
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except _BodyLimitExceeded:
+            if not rejected:
+                raise
+
+    async def _reject(self, scope, receive, send):
+        await JSONResponse({"detail": self.detail}, status_code=413)(scope, receive, send)
+
+
+class IngestedUpload:
+    """An upload read in a single pass: its size, sha256, sniffed kind and (when not streamed to disk) bytes"""
+
+    __slots__ = ("path", "data", "size", "sha256", "kind")
+
+    def __init__(self, path: Optional[Path], data: Optional[bytes], size: int, sha256: str, kind: Optional[str]):
+        self.path = path
+        self.data = data
+        self.size = size
+        self.sha256 = sha256
+        self.kind = kind
+
+
+def sniff_kind(head: bytes) -> Optional[str]:
+    """Identify a container from its first bytes (None if unknown)"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith(b"BM"):
+        return "bmp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "avi"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "mkv"  # EBML, also covers webm
+    if head[4:8] == b"ftyp":
+        return "mov" if head[8:12] == b"qt  " else "mp4"
+    if head[4:8] in _QUICKTIME_BOXES:
+        return "mov"
+    return None
+
+
+async def ingest_upload(
+    upload_file: UploadFile,
+    destination: Optional[Path] = None,
+    max_size: Optional[int] = None,
+    chunk_size: int = 1024 * 1024
+) -> IngestedUpload:
+    """
+    Read an upload chunk by chunk, hashing and size-checking as it goes.
+
+    With a `destination` chunks are written straight to disk from the thread
+    pool (a partial file is removed on failure); without one the bytes are
+    kept in memory. Raises UploadTooLarge as soon as `max_size` is passed.
+
+    Starlette has already spooled the multipart body by the time an endpoint
+    runs, so this is a second pass over the upload; it is the only one,
+    though, since hashing, sniffing and copying share it.
+    BodySizeLimitMiddleware is what caps the first pass.
+    """
+    if max_size is not None and upload_file.size is not None and upload_file.size > max_size:
+        raise UploadTooLarge(max_size)
+
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+    chunks = []
+    out = await run_in_threadpool(destination.open, "wb") if destination else None
+
+    def consume(chunk: bytes):
+        # hashlib releases the GIL for large buffers, so this overlaps with the event loop
+        digest.update(chunk)
+        if out:
+            out.write(chunk)
+
+    try:
+        while True:
+            chunk = await upload_file.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise UploadTooLarge(max_size)
+            if len(head) < 16:
+                head += chunk[:16 - len(head)]
+            if out:
+                await run_in_threadpool(consume, chunk)
+            else:
+                consume(chunk)
+                chunks.append(chunk)
+    except BaseException:
+        if out:
+            out.close()
+            destination.unlink(missing_ok=True)
+        raise
+    if out:
+        await run_in_threadpool(out.close)
+
+    return IngestedUpload(
+        destination,
+        None if destination else b"".join(chunks),
+        size,
+        digest.hexdigest(),
+        sniff_kind(head)
+    )
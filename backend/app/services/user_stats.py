@@ -0,0 +1,142 @@
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Mapping
+
+from sqlalchemy import event, func, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.models.database import Detection, UserDetectionStats
+
+
+def _totals(rows: Iterable[Mapping]) -> dict:
+    """Per-user count, objects, processing time and latest timestamp of some detections"""
+    totals = defaultdict(lambda: {"count": 0, "objects": 0, "time": 0.0, "last": None})
+    for row in rows:
+        entry = totals[row["user_id"]]
+        entry["count"] += 1
+        entry["objects"] += row.get("total_objects") or 0
+        entry["time"] += row.get("processing_time") or 0.0
+        created_at = row.get("created_at")
+        if created_at and (entry["last"] is None or created_at > entry["last"]):
+            entry["last"] = created_at
+    return totals
+
+
+def _upsert_insert(connection: Connection):
+    """INSERT .. ON CONFLICT for the dialects that support it"""
+    if connection.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    return dialect_insert(UserDetectionStats)
+
+
+def _greatest(connection: Connection, a, b):
+    """Larger of two SQL expressions, ignoring NULLs"""
+    if connection.dialect.name == "sqlite":
+        # SQLite's multi-argument max() is scalar but returns NULL if either side is NULL
+        return func.max(func.coalesce(a, b), func.coalesce(b, a))
+    return func.greatest(a, b)
+
+
+def record_added(connection: Connection, rows: Iterable[Mapping]):
+    """Fold newly written detections into the per-user stats (one upsert per user)"""
+    table = UserDetectionStats.__table__
+    now = datetime.utcnow()
+    for user_id, totals in _totals(rows).items():
+        statement = _upsert_insert(connection).values(
+            user_id=user_id,
+            detection_count=totals["count"],
+            total_objects=totals["objects"],
+            total_processing_time=totals["time"],
+            last_detection_at=totals["last"],
+            updated_at=now
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.user_id],
+            set_={
+                "detection_count": table.c.detection_count + statement.excluded.detection_count,
+                "total_objects": table.c.total_objects + statement.excluded.total_objects,
+                "total_processing_time": table.c.total_processing_time + statement.excluded.total_processing_time,
+                "last_detection_at": _greatest(connection, table.c.last_detection_at, statement.excluded.last_detection_at),
+                "updated_at": now
+            }
+        )
+        connection.execute(statement)
+
+
+def record_removed(connection: Connection, rows: Iterable[Mapping]):
+    """Subtract deleted detections; the latest timestamp is re-read since it may have been the one removed"""
+    table = UserDetectionStats.__table__
+    for user_id, totals in _totals(rows).items():
+        latest = select(func.max(Detection.created_at)).where(Detection.user_id == user_id).scalar_subquery()
+        connection.execute(
+            update(table)
+            .where(table.c.user_id == user_id)
+            .values(
+                detection_count=_greatest(connection, table.c.detection_count - totals["count"], 0),
+                total_objects=table.c.total_objects - totals["objects"],
+                total_processing_time=table.c.total_processing_time - totals["time"],
+                last_detection_at=latest,
+                updated_at=datetime.utcnow()
+            )
+        )
+
+
+def _row(detection: Detection) -> dict:
+    return {
+        "user_id": detection.user_id,
+        "total_objects": detection.total_objects,
+        "processing_time": detection.processing_time,
+        "created_at": detection.created_at
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _track_detection_changes(session: Session, flush_context):
+    """Keep stats in the same transaction as every ORM insert/delete of a Detection"""
+    added = [_row(obj) for obj in session.new if isinstance(obj, Detection)]
+    removed = [_row(obj) for obj in session.deleted if isinstance(obj, Detection)]
+    if added:
+        record_added(session.connection(), added)
+    if removed:
+        record_removed(session.connection(), removed)
+
+
+def backfill(db: Session) -> int:
+    """Rebuild the whole stats table from the detections table; returns the number of users"""
+    db.execute(UserDetectionStats.__table__.delete())
+    aggregate = select(
+        Detection.user_id,
+        func.count(Detection.id),
+        func.coalesce(func.sum(Detection.total_objects), 0),
+        func.coalesce(func.sum(Detection.processing_time), 0.0),
+        func.max(Detection.created_at),
+        func.current_timestamp()
+    ).group_by(Detection.user_id)
+    db.execute(insert(UserDetectionStats).from_select(
+        ["user_id", "detection_count", "total_objects", "total_processing_time", "last_detection_at", "updated_at"],
+        aggregate
+    ))
+    db.commit()
+    return db.query(func.count(UserDetectionStats.user_id)).scalar()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the per-user detection statistics table")
+    parser.add_argument("--backfill", action="store_true", help="rebuild the table from existing detections")
+    args = parser.parse_args()
+    if not args.backfill:
+        parser.error("nothing to do (use --backfill)")
+
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        users = backfill(db)
+    finally:
+        db.close()
+    print(f"✅ Rebuilt detection stats for {users} users")
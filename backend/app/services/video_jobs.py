@@ -0,0 +1,312 @@
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import cv2
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.metrics import StageTimer, record_request, record_error
+from app.database import SessionLocal
+from app.models.database import VideoJob
+from app.services.detection_writer import save_detection
+from app.services.frame_store import discard_partial, sidecar_path
+from app.services.inference_pool import InferenceQueueFull
+from app.services.video_pipeline import VideoCancelled
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class VideoJobManager:
+    """
+    Database-backed queue of background video detection jobs.
+
+    Worker threads claim queued jobs from the `video_jobs` table and run them
+    through YOLOService.detect_video in checkpoint segments (or one growing
+    fragmented MP4 with progressive output). Every checkpoint is recorded on
+    the job row, so after a restart a job resumes from its last checkpointed
+    frame instead of starting over.
+    """
+
+    def __init__(self, yolo_service, workers: int = 1, detection_writer=None):
+        self.yolo_service = yolo_service
+        self.workers = max(1, workers)
+        self.detection_writer = detection_writer
+
+        self._wakeup = threading.Condition()
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._cancel_events: Dict[str, threading.Event] = {}
+        self._user_cancelled: Set[str] = set()
+        self._progress: Dict[str, Tuple[int, int]] = {}
+
+    def start(self):
+        """Re-queue jobs interrupted by a previous shutdown and start workers"""
+        db = SessionLocal()
+        try:
+            resumed = db.query(VideoJob)\
+                .filter(VideoJob.status == "running")\
+                .update({"status": "queued"}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if resumed:
+            print(f"🔁 Resuming {resumed} interrupted video job(s) from checkpoint")
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"video-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def shutdown(self):
+        """Stop workers; running jobs checkpoint and go back to the queue"""
+        self._stopping.set()
+        for event in list(self._cancel_events.values()):
+            event.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=10)
+
+    def submit(
+        self,
+        db: Session,
+        user_id: int,
+        file_name: str,
+        file_path: Path,
+        result_path: Path,
+        confidence: float,
+        iou: float,
+        frame_stride: int = 1,
+        tracker: str = "iou",
+        adaptive_stride: bool = False,
+        model_name: Optional[str] = None
+    ) -> VideoJob:
+        """Queue a video for background detection"""
+        queued = db.query(func.count(VideoJob.id))\
+            .filter(VideoJob.status == "queued")\
+            .scalar()
+        if queued >= settings.VIDEO_JOB_MAX_QUEUED:
+            raise InferenceQueueFull("video-jobs", settings.VIDEO_RETRY_AFTER)
+
+        cap = cv2.VideoCapture(str(file_path))
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"Could not open video: {file_name}")
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        finally:
+            cap.release()
+
+        job = VideoJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            status="queued",
+            file_name=file_name,
+            file_path=str(file_path),
+            result_path=str(result_path),
+            model_used=model_name or self.yolo_service.current_model,
+            confidence_threshold=confidence,
+            iou_threshold=iou,
+            frame_stride=frame_stride,
+            tracker=tracker,
+            adaptive_stride=adaptive_stride,
+            total_frames=total_frames,
+            frames_done=0,
+            checkpoint_frame=0,
+            segments=[]
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        with self._wakeup:
+            self._wakeup.notify()
+        return job
+
+    def cancel(self, db: Session, job: VideoJob) -> VideoJob:
+        """Cancel a queued or running job"""
+        if job.status in TERMINAL_STATUSES:
+            return job
+
+        claimed = db.query(VideoJob)\
+            .filter(VideoJob.id == job.id, VideoJob.status == "queued")\
+            .update({"status": "cancelled"}, synchronize_session=False)
+        db.commit()
+        if claimed:
+            self._cleanup_files(job.file_path, job.segments or [], job.result_path)
+        else:
+            # Running: the worker notices the event and finishes the bookkeeping
+            self._user_cancelled.add(job.id)
+            event = self._cancel_events.get(job.id)
+            if event:
+                event.set()
+
+        db.refresh(job)
+        return job
+
+    def get_progress(self, job: VideoJob) -> Tuple[int, int]:
+        """Live (frames_done, total_frames), falling back to the persisted checkpoint"""
+        return self._progress.get(job.id, (job.frames_done or 0, job.total_frames or 0))
+
+    def is_running(self, job_id: str) -> bool:
+        """Whether a worker is processing the job in this process right now"""
+        return job_id in self._progress
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            job_id = self._claim_next()
+            if job_id is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=5)
+                continue
+            self._run(job_id)
+
+    def _claim_next(self) -> Optional[str]:
+        db = SessionLocal()
+        try:
+            candidates = db.query(VideoJob.id)\
+                .filter(VideoJob.status == "queued")\
+                .order_by(VideoJob.created_at)\
+                .limit(5)\
+                .all()
+            for (job_id,) in candidates:
+                # Conditional update so two workers never claim the same job
+                claimed = db.query(VideoJob)\
+                    .filter(VideoJob.id == job_id, VideoJob.status == "queued")\
+                    .update({"status": "running"}, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    return job_id
+            return None
+        finally:
+            db.close()
+
+    def _save_checkpoint(self, job_id: str, segment_path: Optional[str], frames: int):
+        db = SessionLocal()
+        try:
+            job = db.query(VideoJob).filter(VideoJob.id == job_id).first()
+            if segment_path:
+                # Progressive output has no segments, just checkpointed frames
+                job.segments = list(job.segments or []) + [segment_path]
+            job.checkpoint_frame = (job.checkpoint_frame or 0) + frames
+            job.frames_done = job.checkpoint_frame
+            db.commit()
+        finally:
+            db.close()
+
+    def _link_detection(self, job_id: str, detection_id: int):
+        db = SessionLocal()
+        try:
+            db.query(VideoJob)\
+                .filter(VideoJob.id == job_id)\
+                .update({"detection_id": detection_id}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _run(self, job_id: str):
+        cancel_event = threading.Event()
+        self._cancel_events[job_id] = cancel_event
+        if self._stopping.is_set():
+            cancel_event.set()
+
+        db = SessionLocal()
+        try:
+            job = db.query(VideoJob).filter(VideoJob.id == job_id).first()
+            start_frame = job.checkpoint_frame or 0
+            self._progress[job_id] = (start_frame, job.total_frames or 0)
+
+            def on_progress(done: int, total: int):
+                self._progress[job_id] = (done, total)
+            
+            timer = StageTimer()
+            run_started = time.time()
+
+            try:
+                frames_processed, processing_time, stats = self.yolo_service.detect_video(
+                    job.file_path,
+                    job.result_path,
+                    confidence=job.confidence_threshold,
+                    iou=job.iou_threshold,
+                    start_frame=start_frame,
+                    segments=job.segments or [],
+                    on_segment=lambda path, frames: self._save_checkpoint(job_id, path, frames),
+                    on_progress=on_progress,
+                    cancel_event=cancel_event,
+                    frame_stride=job.frame_stride or 1,
+                    tracker=job.tracker or "iou",
+                    adaptive_stride=bool(job.adaptive_stride),
+                    model_name=job.model_used,
+                    timer=timer,
+                    detections_path=str(sidecar_path(job.result_path))
+                )
+            except VideoCancelled:
+                db.refresh(job)
+                # Kept so the time of a resumed job adds up across runs
+                job.processing_time = (job.processing_time or 0.0) + (time.time() - run_started)
+                if self._stopping.is_set() and job_id not in self._user_cancelled:
+                    job.status = "queued"
+                    print(f"⏸️ Video job {job_id} checkpointed at frame {job.checkpoint_frame}")
+                else:
+                    job.status = "cancelled"
+                    self._cleanup_files(job.file_path, job.segments or [], job.result_path)
+                db.commit()
+                return
+            except Exception as e:
+                db.refresh(job)
+                job.status = "failed"
+                job.error = str(e)
+                job.processing_time = (job.processing_time or 0.0) + (time.time() - run_started)
+                db.commit()
+                record_error("video_job", "internal")
+                self._cleanup_files(job.file_path, job.segments or [], job.result_path)
+                print(f"❌ Video job {job_id} failed: {e}")
+                return
+
+            db.refresh(job)
+            total_time = (job.processing_time or 0.0) + processing_time
+            detection_record = save_detection(
+                db,
+                self.detection_writer,
+                on_written=lambda detection_id: self._link_detection(job_id, detection_id),
+                commit=False,
+                user_id=job.user_id,
+                file_name=job.file_name,
+                file_type="video",
+                file_path=job.file_path,
+                result_path=job.result_path,
+                model_used=job.model_used,
+                confidence_threshold=job.confidence_threshold,
+                objects_detected=[],  # Per-frame detections live in the sidecar next to the result
+                total_objects=stats.get("objects", 0),
+                processing_time=total_time
+            )
+
+            job.status = "completed"
+            job.frames_done = frames_processed
+            job.checkpoint_frame = frames_processed
+            job.segments = []
+            job.processing_time = total_time
+            # With write-behind the id is linked once the row is inserted
+            job.detection_id = detection_record.id if detection_record else None
+            db.commit()
+            record_request("video_job", job.model_used, timer, frames=frames_processed - start_frame)
+        finally:
+            db.close()
+            self._cancel_events.pop(job_id, None)
+            self._user_cancelled.discard(job_id)
+            self._progress.pop(job_id, None)
+
+    @staticmethod
+    def _cleanup_files(file_path: str, segments: List[str], result_path: Optional[str] = None):
+        for path in [file_path, *segments]:
+            if path:
+                Path(path).unlink(missing_ok=True)
+        if result_path:
+            # Partial progressive output and per-frame detection columns left behind for a resume
+            Path(result_path).unlink(missing_ok=True)
+            discard_partial(sidecar_path(result_path))
@@ -0,0 +1,286 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+import cv2
+import numpy as np
+
+_END = object()
+
+
+class VideoCancelled(Exception):
+    """Raised when a video run is stopped through its cancel event"""
+
+
+class StageStats:
+    """Frame count and busy time for one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.frames = 0
+        self.busy_time = 0.0
+        self.max_queue = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "stage": self.name,
+            "frames": self.frames,
+            "busy_seconds": round(self.busy_time, 3),
+            "fps": round(self.frames / self.busy_time, 2) if self.busy_time > 0 else 0.0,
+            "max_queue": self.max_queue
+        }
+
+
+class VideoPipeline:
+    """
+    Three-stage video pipeline: a decoder thread, batched inference on the
+    calling thread and an annotate/encode thread.
+
+    Stages are linked by bounded FIFO queues, so memory is capped at roughly
+    2 * queue_size frames and output order always matches input order.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[Optional[np.ndarray]]], List[Any]],
+        batch_size: int = 4,
+        queue_size: int = 8
+    ):
+        self.predict_batch = predict_batch
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+
+    def run(
+        self,
+        cap: cv2.VideoCapture,
+        writer: Any,
+        on_frame: Optional[Callable[[int], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        retrieve_frame: Optional[Callable[[int], bool]] = None,
+        on_result: Optional[Callable[[Any], None]] = None
+    ) -> dict:
+        """
+        Process every remaining frame from `cap` into `writer`, returning
+        per-stage stats. `on_frame` receives the running count of encoded
+        frames; setting `cancel_event` stops the run with VideoCancelled.
+        
+        When `retrieve_frame(offset)` returns False the frame is only grabbed
+        (no full decode) and passed downstream as None; this is only useful
+        when `writer` is None, since annotated output needs every frame.
+        `on_result` sees each frame's result, in order, on the encode stage.
+        """
+        decode_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        encode_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        decode_stats = StageStats("decode")
+        infer_stats = StageStats("inference")
+        encode_stats = StageStats("encode")
+
+        def put(q: queue.Queue, item, stats: Optional[StageStats] = None):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    if stats is not None:
+                        stats.max_queue = max(stats.max_queue, q.qsize())
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+            return _END
+
+        def decoder():
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    if retrieve_frame is None:
+                        ret, frame = cap.read()
+                    else:
+                        ret, frame = cap.grab(), None
+                        if ret and retrieve_frame(decode_stats.frames):
+                            ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                    decode_stats.busy_time += time.perf_counter() - started
+                    decode_stats.frames += 1
+                    if not put(decode_q, frame, decode_stats):
+                        return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                put(decode_q, _END)
+
+        def encoder():
+            try:
+                while True:
+                    results = get(encode_q)
+                    if results is _END:
+                        break
+                    started = time.perf_counter()
+                    if on_result is not None:
+                        on_result(results)
+                    if writer is not None:
+                        writer.write(results.plot())
+                    encode_stats.busy_time += time.perf_counter() - started
+                    encode_stats.frames += 1
+                    if on_frame:
+                        on_frame(encode_stats.frames)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+
+        decode_thread = threading.Thread(target=decoder, name="video-decode", daemon=True)
+        encode_thread = threading.Thread(target=encoder, name="video-encode", daemon=True)
+        decode_thread.start()
+        encode_thread.start()
+
+        wall_start = time.perf_counter()
+        try:
+            finished = False
+            while not finished and not stop.is_set():
+                if cancel_event is not None and cancel_event.is_set():
+                    raise VideoCancelled()
+                frame = get(decode_q)
+                if frame is _END:
+                    break
+                batch = [frame]
+                # Top up the batch with whatever is already decoded
+                while len(batch) < self.batch_size:
+                    try:
+                        frame = decode_q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if frame is _END:
+                        finished = True
+                        break
+                    batch.append(frame)
+
+                started = time.perf_counter()
+                results = self.predict_batch(batch)
+                infer_stats.busy_time += time.perf_counter() - started
+                infer_stats.frames += len(batch)
+
+                for result in results:
+                    if not put(encode_q, result, infer_stats):
+                        break
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(encode_q, _END)
+            encode_thread.join()
+            stop.set()
+            decode_thread.join()
+
+        if errors:
+            raise errors[0]
+        if cancel_event is not None and cancel_event.is_set() and encode_stats.frames < decode_stats.frames:
+            raise VideoCancelled()
+
+        wall_time = time.perf_counter() - wall_start
+        return {
+            "frames": encode_stats.frames,
+            "wall_seconds": round(wall_time, 3),
+            "fps": round(encode_stats.frames / wall_time, 2) if wall_time > 0 else 0.0,
+            "batch_size": self.batch_size,
+            "stages": [decode_stats.to_dict(), infer_stats.to_dict(), encode_stats.to_dict()]
+        }
+
+
+class SegmentedVideoWriter:
+    """
+    Video writer that rolls over to a new file every `segment_frames` frames.
+
+    Each closed segment is a complete, playable file, reported through
+    `on_segment(path, frames)` so callers can checkpoint progress that
+    survives a restart.
+    """
+
+    def __init__(
+        self,
+        open_writer: Callable[[str], Any],
+        path_for_index: Callable[[int], str],
+        segment_frames: int,
+        start_index: int = 0,
+        on_segment: Optional[Callable[[str, int], None]] = None
+    ):
+        self.open_writer = open_writer
+        self.path_for_index = path_for_index
+        self.segment_frames = max(1, segment_frames)
+        self.on_segment = on_segment
+
+        self.next_index = start_index
+        self.paths: List[str] = []
+        self._writer = None
+        self._path: Optional[str] = None
+        self._frames = 0
+
+    def write(self, frame: np.ndarray):
+        if self._writer is None:
+            self._path = self.path_for_index(self.next_index)
+            self._writer = self.open_writer(self._path)
+            self.next_index += 1
+            self._frames = 0
+        self._writer.write(frame)
+        self._frames += 1
+        if self._frames >= self.segment_frames:
+            self._close_segment()
+
+    def release(self):
+        if self._writer is not None:
+            self._close_segment()
+
+    def _close_segment(self):
+        self._writer.release()
+        self.paths.append(self._path)
+        if self.on_segment:
+            self.on_segment(self._path, self._frames)
+        self._writer = None
+        self._path = None
+        self._frames = 0
+
+
+class CheckpointedVideoWriter:
+    """
+    Single-file counterpart of SegmentedVideoWriter for outputs that cannot
+    be split, such as a progressive fragmented MP4. Every `checkpoint_frames`
+    frames (and on release) it reports `on_checkpoint(None, frames)`.
+    """
+
+    def __init__(
+        self,
+        writer: Any,
+        checkpoint_frames: int,
+        on_checkpoint: Optional[Callable[[Optional[str], int], None]] = None
+    ):
+        self.writer = writer
+        self.checkpoint_frames = max(1, checkpoint_frames)
+        self.on_checkpoint = on_checkpoint
+        self.paths: List[str] = []
+        self._frames = 0
+
+    def write(self, frame: np.ndarray):
+        self.writer.write(frame)
+        self._frames += 1
+        if self._frames >= self.checkpoint_frames:
+            self._checkpoint()
+
+    def release(self):
+        self.writer.release()
+        if self._frames:
+            self._checkpoint()
+
+    def _checkpoint(self):
+        if self.on_checkpoint:
+            self.on_checkpoint(None, self._frames)
+        self._frames = 0
@@ -0,0 +1,112 @@
+import json
+import struct
+from typing import Mapping, Optional
+
+import numpy as np
+
+from app.services.detection_batch import DetectionBatch
+
+try:
+    import msgpack
+except ImportError:  # optional; clients asking for it get JSON instead
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+PACKED_MEDIA_TYPE = "application/x-yolo-detections"
+
+WIRE_FORMATS = {
+    "json": JSON_MEDIA_TYPE,
+    "msgpack": MSGPACK_MEDIA_TYPE,
+    "packed": PACKED_MEDIA_TYPE
+}
+_ACCEPTED_MEDIA_TYPES = {
+    JSON_MEDIA_TYPE: "json",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    "application/x-msgpack": "msgpack",
+    PACKED_MEDIA_TYPE: "packed"
+}
+
+# 16 bytes: magic, version, 3 reserved bytes, object count, metadata length
+PACKED_HEADER = struct.Struct("<4sBxxxII")
+PACKED_MAGIC = b"YDET"
+PACKED_VERSION = 1
+
+
+def available_formats() -> list:
+    return [fmt for fmt in WIRE_FORMATS if fmt != "msgpack" or msgpack is not None]
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the wire format for an Accept header (highest q wins, JSON by default)"""
+    best, best_q = "json", 0.0
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        fmt = _ACCEPTED_MEDIA_TYPES.get(media_type.lower())
+        if fmt is None or fmt not in available_formats():
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def class_table(detections: DetectionBatch) -> dict:
+    """Names of the classes present in a result, keyed by class ID"""
+    return {int(class_id): detections.names[int(class_id)] for class_id in np.unique(detections.class_ids)}
+
+
+def encode_detections(
+    fmt: str,
+    meta: dict,
+    detections: DetectionBatch,
+    names: Optional[Mapping[int, str]] = None
+) -> bytes:
+    """
+    Serialize a detection result.
+
+    `meta` holds the scalar response fields (model_used, processing_time...).
+    "json" keeps the DetectionResponse shape with one object per detection.
+    "msgpack" and "packed" send columnar little-endian arrays instead: float32
+    xyxy boxes, float32 confidences and uint16 class IDs, plus a class-name
+    table. The table is `names` when given, else the classes present in the
+    result; pass an empty dict to omit it (e.g. a stream that already sent it).
+    """
+    if fmt == "json":
+        body = {
+            **meta,
+            "objects_detected": detections.to_dicts(),
+            "total_objects": len(detections)
+        }
+        return json.dumps(body, separators=(",", ":")).encode()
+
+    names = class_table(detections) if names is None else names
+    boxes = np.ascontiguousarray(detections.boxes, dtype="<f4").tobytes()
+    confidences = np.ascontiguousarray(detections.confidences, dtype="<f4").tobytes()
+    class_ids = detections.class_ids.astype("<u2").tobytes()
+
+    if fmt == "msgpack":
+        body = {
+            **meta,
+            "total_objects": len(detections),
+            "names": {int(k): v for k, v in names.items()},
+            "boxes": boxes,
+            "confidences": confidences,
+            "class_ids": class_ids
+        }
+        return msgpack.packb(body, use_bin_type=True)
+
+    if fmt == "packed":
+        # Metadata is JSON, padded to 4 bytes so the float arrays stay aligned
+        metadata = json.dumps({**meta, "names": {str(k): v for k, v in names.items()}}, separators=(",", ":")).encode()
+        metadata += b" " * (-len(metadata) % 4)
+        header = PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, len(detections), len(metadata))
+        return b"".join((header, metadata, boxes, confidences, class_ids))
+
+    raise ValueError(f"Unknown wire format '{fmt}'")
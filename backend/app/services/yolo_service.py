@@ -3,131 +3,340 @@ import torch
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import Optional, Tuple, List
+from typing import Callable, Optional, Tuple, List
+import threading
 import time
 import base64
 
 from app.core.config import settings
+from app.core.metrics import StageTimer
+from app.services.batching import MicroBatcher
+from app.services.video_pipeline import VideoPipeline, VideoCancelled, SegmentedVideoWriter, CheckpointedVideoWriter
+from app.services.tracking import StridedDetector
+from app.services.detection_batch import DetectionBatch
+from app.services.frame_store import FrameDetectionWriter
+from app.services.fmp4_writer import FragmentedMP4Writer, ffmpeg_path
+from app.services.result_cache import DetectionCache, CachedDetection
+from app.services.model_registry import ModelRegistry, LoadedModel, resolve_model_path
+from app.services.quantization import build_variant, list_variants
+
+# Annotated image encodings and their file extensions
+IMAGE_FORMATS = {"jpeg": ".jpg", "webp": ".webp"}
 
 class YOLOService:
     def __init__(self):
-        self.model: Optional[YOLO] = None
         self.current_model: str = settings.DEFAULT_MODEL
         self.device: str = "cuda" if torch.cuda.is_available() else "cpu"
         self.confidence_threshold: float = settings.CONFIDENCE_THRESHOLD
         self.iou_threshold: float = settings.IOU_THRESHOLD
         
-    def load_model(self, model_path: Optional[str] = None):
-        """Load YOLO model"""
-        if model_path:
-            self.current_model = model_path
-        
-        # Check if model file exists in models directory
-        full_model_path = settings.MODELS_DIR / self.current_model
+        # Warm LRU pool of loaded models; requests may pick any of them
+        self.registry = ModelRegistry(
+            self.device,
+            max_models=settings.MODEL_POOL_SIZE,
+            max_memory_bytes=settings.MODEL_POOL_MAX_MB * 1024 * 1024,
+            warmup=settings.MODEL_WARMUP,
+            backend=settings.INFERENCE_BACKEND
+        )
+        
+        # Content-addressed cache of image results (keys carry the weights version)
+        self.cache: Optional[DetectionCache] = None
+        if settings.CACHE_ENABLED:
+            self.cache = DetectionCache(
+                max_memory_bytes=settings.CACHE_MEMORY_MB * 1024 * 1024,
+                disk_dir=settings.CACHE_DISK_DIR,
+                max_disk_bytes=settings.CACHE_DISK_MB * 1024 * 1024
+            )
+        
+        # Coalesces concurrent single-image requests into batched forward passes
+        self.batcher: Optional[MicroBatcher] = None
+        if settings.BATCHING_ENABLED:
+            self.batcher = MicroBatcher(
+                self._predict_batch,
+                max_batch_size=settings.BATCH_MAX_SIZE,
+                max_wait_ms=settings.BATCH_MAX_WAIT_MS
+            )
+    
+    @property
+    def model(self) -> Optional[YOLO]:
+        """The default model, if loaded"""
+        entry = self.registry.peek(self.current_model)
+        return entry.model if entry else None
+    
+    def shutdown(self):
+        """Stop background workers owned by the service"""
+        if self.batcher:
+            self.batcher.shutdown()
+    
+    def get_model(self, model_name: Optional[str] = None) -> LoadedModel:
+        """Resolve a model from the pool (the default model when not given)"""
+        return self.registry.get(model_name or self.current_model)
+    
+    def is_model_available(self, model_name: str) -> bool:
+        """Whether a model is loaded or its weights file exists"""
+        if self.registry.peek(model_name):
+            return True
+        try:
+            resolve_model_path(model_name)
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def _predict_batch(self, images: List[np.ndarray], conf: float, iou: float, model_name: Optional[str] = None) -> list:
+        """Run one forward pass over a list of images"""
+        entry = self.get_model(model_name)
+        with entry.lock:
+            return entry.model.predict(
+                images,
+                conf=conf,
+                iou=iou,
+                verbose=False
+            )
+    
+    def _predict(self, image: np.ndarray, conf: float, iou: float, model_name: Optional[str] = None):
+        """Predict a single image, going through the micro-batcher when enabled"""
+        model_name = model_name or self.current_model
+        if self.batcher:
+            return self.batcher.predict(image, conf, iou, model_name)
+        return self._predict_batch([image], conf, iou, model_name)[0]
+    
+    def _timed_predict(self, image: np.ndarray, conf: float, iou: float, model_name: str, timer: StageTimer):
+        """Predict and record preprocess/inference/NMS plus time spent waiting for a batch slot"""
+        start = time.perf_counter()
+        results = self._predict(image, conf, iou, model_name)
+        model_seconds = timer.add_results_speed(results)
+        timer.add("batch_wait", max(0.0, time.perf_counter() - start - model_seconds))
+        return results
         
-        # If not in models directory, check root directory (for existing models)
-        if not full_model_path.exists():
-            full_model_path = Path(self.current_model)
+    def load_model(self, model_path: Optional[str] = None):
+        """Load YOLO model and make it the default"""
+        model_name = model_path or self.current_model
         
-        if not full_model_path.exists():
-            raise FileNotFoundError(f"Model file not found: {self.current_model}")
+        # Weights may have changed on disk, so an explicit load always reloads
+        self.registry.evict(model_name)
+        entry = self.registry.get(model_name)
         
-        self.model = YOLO(str(full_model_path))
+        previous = self.current_model
+        self.registry.pin(model_name)
+        self.current_model = model_name
+        if previous != model_name:
+            self.registry.unpin(previous)
         
-        # Move model to appropriate device
-        if self.device == "cuda":
-            self.model.to('cuda')
+        return {
+            "model": self.current_model,
+            "backend": entry.backend,
+            "device": self.device,
+            "classes": len(entry.names)
+        }
+    
+    def set_backend(self, backend: str):
+        """Switch the inference backend ("pytorch" or "onnx") and warm the default model on it"""
+        previous = self.registry.backend
+        self.registry.set_backend(backend)
+        try:
+            entry = self.registry.get(self.current_model)
+        except Exception:
+            self.registry.set_backend(previous)
+            raise
         
         return {
             "model": self.current_model,
+            "backend": entry.backend,
             "device": self.device,
-            "classes": len(self.model.names)
+            "classes": len(entry.names)
         }
     
-    def get_model_info(self) -> dict:
+    def get_model_info(self, model_name: Optional[str] = None) -> dict:
         """Get current model information"""
-        if not self.model:
+        entry = self.registry.peek(model_name or self.current_model)
+        if not entry:
             return None
         
         return {
-            "model_name": self.current_model,
+            "model_name": entry.name,
+            "backend": entry.backend,
             "device": self.device,
-            "classes_count": len(self.model.names),
-            "classes": list(self.model.names.values())
+            "classes_count": len(entry.names),
+            "classes": list(entry.names.values())
         }
     
     def detect_image(
         self,
         image_path: str,
         confidence: Optional[float] = None,
-        iou: Optional[float] = None
-    ) -> Tuple[List[dict], np.ndarray, float]:
+        iou: Optional[float] = None,
+        model_name: Optional[str] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Tuple[DetectionBatch, np.ndarray, float]:
         """
         Perform object detection on an image
         
         Returns:
-            - List of detected objects with details
+            - Detected objects as a columnar DetectionBatch
             - Annotated image as numpy array
             - Processing time
         """
-        if not self.model:
-            raise RuntimeError("Model not loaded")
+        # Loads the model into the pool on first use
+        entry = self.get_model(model_name)
         
         conf = confidence if confidence is not None else self.confidence_threshold
         iou_thresh = iou if iou is not None else self.iou_threshold
         
+        timer = timer or StageTimer()
         start_time = time.time()
         
         # Read image
-        image = cv2.imread(str(image_path))
+        with timer.stage("decode"):
+            image = cv2.imread(str(image_path))
         if image is None:
             raise ValueError(f"Could not read image: {image_path}")
+        timer.set_input_size(image.shape[1], image.shape[0])
         
         # Perform detection
-        results = self.model.predict(
-            image,
-            conf=conf,
-            iou=iou_thresh,
-            verbose=False
-        )[0]
-        
-        # Extract detections
-        detections = []
-        if results.boxes is not None:
-            for box in results.boxes:
-                cls_id = int(box.cls[0])
-                confidence_score = float(box.conf[0])
-                bbox = box.xyxy[0].cpu().numpy().tolist()
-                
-                detections.append({
-                    "class_name": self.model.names[cls_id],
-                    "confidence": confidence_score,
-                    "bbox": bbox
-                })
+        results = self._timed_predict(image, conf, iou_thresh, entry.name, timer)
+        
+        # Extract detections (one bulk transfer into columnar arrays)
+        with timer.stage("extract"):
+            detections = DetectionBatch.from_results(results)
         
         # Get annotated image
-        annotated_image = results.plot()
+        with timer.stage("plot"):
+            annotated_image = results.plot()
         
         processing_time = time.time() - start_time
         
         return detections, annotated_image, processing_time
     
+    def detect_image_bytes(
+        self,
+        image_bytes: bytes,
+        confidence: Optional[float] = None,
+        iou: Optional[float] = None,
+        content_hash: Optional[str] = None,
+        model_name: Optional[str] = None,
+        timer: Optional[StageTimer] = None,
+        image_format: Optional[str] = None,
+        quality: Optional[int] = None,
+        max_dimension: Optional[int] = None,
+        annotate: bool = True
+    ) -> Tuple[DetectionBatch, Optional[bytes], float, bool]:
+        """
+        Perform object detection on an encoded image held in memory
+        
+        Identical (image, model, thresholds, encoding) requests are answered
+        from the result cache, and concurrent duplicates share a single inference.
+        The annotated image is encoded as `image_format` ("jpeg" or "webp"),
+        defaulting to the RESULT_IMAGE_* settings. With `annotate` off the
+        plot/encode steps are skipped and no image is returned.
+        
+        Returns:
+            - Detected objects as a columnar DetectionBatch
+            - Annotated image as encoded bytes (None when not annotated)
+            - Processing time
+            - Whether the result came from the cache
+        """
+        # Loads the model into the pool on first use
+        entry = self.get_model(model_name)
+        
+        conf = confidence if confidence is not None else self.confidence_threshold
+        iou_thresh = iou if iou is not None else self.iou_threshold
+        
+        image_format = image_format or settings.RESULT_IMAGE_FORMAT
+        quality = quality or settings.RESULT_IMAGE_QUALITY
+        max_dimension = settings.RESULT_MAX_DIMENSION if max_dimension is None else max_dimension
+        
+        timer = timer or StageTimer()
+        start_time = time.time()
+        
+        def compute() -> CachedDetection:
+            with timer.stage("decode"):
+                image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError("Could not decode image")
+            timer.set_input_size(image.shape[1], image.shape[0])
+            results = self._timed_predict(image, conf, iou_thresh, entry.name, timer)
+            with timer.stage("extract"):
+                detections = DetectionBatch.from_results(results)
+            if not annotate:
+                return CachedDetection(detections, b"", time.time() - start_time)
+            with timer.stage("plot"):
+                annotated = results.plot()
+            with timer.stage("encode"):
+                annotated_image = self.encode_image(annotated, image_format, quality, max_dimension)
+            return CachedDetection(detections, annotated_image, time.time() - start_time)
+        
+        if self.cache:
+            lookup_start = time.perf_counter()
+            key = DetectionCache.make_key(
+                content_hash or DetectionCache.content_hash(image_bytes),
+                entry.version,
+                conf,
+                iou_thresh,
+                encoding=f"{image_format}:{quality}:{max_dimension}" if annotate else "none"
+            )
+            cached, cache_hit = self.cache.get_or_compute(key, compute)
+            if cache_hit:
+                timer.add("cache_hit", time.perf_counter() - lookup_start)
+        else:
+            cached, cache_hit = compute(), False
+        
+        processing_time = time.time() - start_time
+        
+        return cached.detections, cached.annotated_image or None, processing_time, cache_hit
+    
     def detect_video(
         self,
         video_path: str,
         output_path: str,
         confidence: Optional[float] = None,
-        iou: Optional[float] = None
-    ) -> Tuple[int, float]:
+        iou: Optional[float] = None,
+        start_frame: int = 0,
+        segments: Optional[List[str]] = None,
+        on_segment: Optional[Callable[[str, int], None]] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        cancel_event: Optional[threading.Event] = None,
+        frame_stride: int = 1,
+        tracker: str = "iou",
+        adaptive_stride: bool = False,
+        model_name: Optional[str] = None,
+        timer: Optional[StageTimer] = None,
+        annotate: bool = True,
+        detections_path: Optional[str] = None
+    ) -> Tuple[int, float, dict]:
         """
         Perform object detection on a video
         
+        With `frame_stride` > 1 (or `adaptive_stride`) the detector only runs
+        on keyframes and boxes on the frames in between come from `tracker`
+        ("iou" or "kalman"); adaptive mode shortens the gap when motion is high.
+        
+        When `on_segment` is given the output is written in checkpoint
+        segments of VIDEO_CHECKPOINT_FRAMES frames; each closed segment is
+        reported so the caller can persist it, and a later call with
+        `start_frame`/`segments` resumes from that point. Segments are merged
+        into `output_path` once the whole video is done.
+        
+        With VIDEO_PROGRESSIVE_OUTPUT (and ffmpeg installed) checkpointed runs
+        instead write a fragmented MP4 straight to `output_path`, so it can be
+        watched while it grows. A resumed run redraws the frames before
+        `start_frame` from the sidecar (no inference) and then carries on.
+        
+        With `detections_path` every frame's detections are written to a
+        columnar sidecar there (see frame_store), kept in step with the
+        checkpoints so a resumed run continues it; `stats["objects"]` is the
+        total they hold. With `annotate` off nothing is written to
+        `output_path` and the sidecar alone describes the result.
+        
         Returns:
             - Total frames processed
             - Processing time
+            - Per-stage pipeline throughput
         """
-        if not self.model:
-            raise RuntimeError("Model not loaded")
+        if not annotate and on_segment:
+            raise ValueError("Checkpoint segments need annotated output")
+        
+        # Loads the model into the pool on first use
+        entry = self.get_model(model_name)
         
         conf = confidence if confidence is not None else self.confidence_threshold
         iou_thresh = iou if iou is not None else self.iou_threshold
@@ -146,10 +355,168 @@ class YOLOService:
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        timer = timer or StageTimer()
+        timer.set_input_size(width, height)
         
         print(f"📹 Video properties: {width}x{height} @ {fps}fps, {total_frames} frames")
         
-        # Create video writer with browser-compatible codec
+        detections = None
+        if detections_path:
+            detections = FrameDetectionWriter(Path(detections_path), fps, resume_frame=start_frame)
+        
+        def checkpoint(path: str, frames: int):
+            # Sidecar rows for the segment are on disk before the checkpoint is recorded
+            if detections:
+                detections.flush()
+            on_segment(path, frames)
+        
+        segments = list(segments or [])
+        # Runs that already left segments behind finish the same way
+        progressive = bool(
+            on_segment and detections and not segments
+            and settings.VIDEO_PROGRESSIVE_OUTPUT and ffmpeg_path()
+        )
+        replayed = False
+        if not annotate:
+            out = None
+        elif progressive:
+            writer = FragmentedMP4Writer(output_path, fps, width, height)
+            if start_frame:
+                try:
+                    with timer.stage("replay"):
+                        self._replay_frames(cap, writer, detections, entry.names, start_frame)
+                except Exception:
+                    writer.release()
+                    cap.release()
+                    raise
+                replayed = True
+            out = CheckpointedVideoWriter(writer, settings.VIDEO_CHECKPOINT_FRAMES, on_checkpoint=checkpoint)
+        elif on_segment:
+            out = SegmentedVideoWriter(
+                lambda path: self._open_video_writer(path, fps, width, height),
+                lambda index: f"{output_path}.part{index:04d}.mp4",
+                segment_frames=settings.VIDEO_CHECKPOINT_FRAMES,
+                start_index=len(segments),
+                on_segment=checkpoint
+            )
+        else:
+            out = self._open_video_writer(output_path, fps, width, height)
+        
+        if not replayed:
+            # Skip frames already covered by a checkpoint (grab avoids a full decode)
+            for _ in range(start_frame):
+                if not cap.grab():
+                    break
+        
+        predict_frames = lambda frames: self._predict_batch(frames, conf, iou_thresh, entry.name)
+        strided = None
+        if frame_stride > 1 or adaptive_stride:
+            strided = StridedDetector(
+                predict_frames,
+                entry.names,
+                stride=frame_stride if frame_stride > 1 else settings.ADAPTIVE_MAX_STRIDE,
+                tracker_type=tracker,
+                adaptive=adaptive_stride,
+                motion_threshold=settings.ADAPTIVE_MOTION_THRESHOLD
+            )
+            predict_frames = strided.process
+        
+        # Overlap decode, batched inference and annotate/encode on separate stages
+        pipeline = VideoPipeline(
+            predict_frames,
+            batch_size=settings.VIDEO_BATCH_SIZE,
+            queue_size=settings.VIDEO_QUEUE_FRAMES
+        )
+        
+        on_result = None
+        if detections:
+            on_result = lambda results: detections.append(DetectionBatch.from_results(results))
+        
+        on_frame = None
+        if on_progress:
+            on_frame = lambda done: on_progress(start_frame + done, total_frames)
+        
+        try:
+            stats = pipeline.run(
+                cap,
+                out,
+                on_frame=on_frame,
+                cancel_event=cancel_event,
+                # Skipped frames are only grabbed when no annotated output needs their pixels
+                retrieve_frame=strided.needs_frame if strided and out is None else None,
+                on_result=on_result
+            )
+        except VideoCancelled:
+            # Temp columns stay behind for the resumed run
+            if detections:
+                detections.suspend()
+            raise
+        except Exception:
+            if detections:
+                detections.discard()
+            raise
+        finally:
+            cap.release()
+            if out is not None:
+                out.release()
+        
+        # Stage busy time overlaps across threads, so these add up to more than wall time
+        for stage in stats["stages"]:
+            timer.add(f"video_{stage['stage']}", stage["busy_seconds"])
+        
+        if on_segment and not progressive:
+            segments.extend(out.paths)
+            with timer.stage("concat"):
+                self._concat_segments(segments, output_path, fps, width, height)
+        
+        if strided:
+            stats["keyframes"] = strided.keyframes
+        if detections and detections.close():
+            stats["objects"] = detections.object_count
+        
+        processing_time = time.time() - start_time
+        stage_summary = ", ".join(f"{st['stage']} {st['fps']}fps" for st in stats["stages"])
+        print(f"🎞️ Pipeline: {stats['frames']} frames @ {stats['fps']}fps ({stage_summary})")
+        
+        return start_frame + stats["frames"], processing_time, stats
+    
+    @staticmethod
+    def _replay_frames(cap: cv2.VideoCapture, writer, detections: FrameDetectionWriter, names, start_frame: int):
+        """Redraw already processed frames from their stored detections"""
+        # Imported here since the annotation module builds on this one
+        from app.services.annotation import draw_detections
+        
+        if not detections.enabled or detections.frames < start_frame:
+            raise ValueError("Cannot resume progressive output: per-frame detections are missing")
+        for batch in detections.replay(names):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            writer.write(draw_detections(frame, batch))
+    
+    def _concat_segments(self, segments: List[str], output_path: str, fps: int, width: int, height: int):
+        """Join checkpoint segments into the final result video and remove them"""
+        out = self._open_video_writer(output_path, fps, width, height)
+        try:
+            for segment in segments:
+                cap = cv2.VideoCapture(segment)
+                try:
+                    while True:
+                        ret, frame = cap.read()
+                        if not ret:
+                            break
+                        out.write(frame)
+                finally:
+                    cap.release()
+        finally:
+            out.release()
+        
+        for segment in segments:
+            Path(segment).unlink(missing_ok=True)
+    
+    @staticmethod
+    def _open_video_writer(output_path: str, fps: int, width: int, height: int) -> cv2.VideoWriter:
+        """Create a video writer, preferring a browser-compatible codec"""
         # Use H.264 (avc1) for best browser compatibility
         try:
             fourcc = cv2.VideoWriter_fourcc(*'avc1')
@@ -164,91 +531,91 @@ class YOLOService:
             out = cv2.VideoWriter(str(output_path), fourcc, fps, (width, height))
             if not out.isOpened():
                 raise RuntimeError("Could not initialize video writer")
-        
-        frame_count = 0
-        
-        try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                
-                # Perform detection on frame
-                results = self.model.predict(
-                    frame,
-                    conf=conf,
-                    iou=iou_thresh,
-                    verbose=False
-                )[0]
-                
-                # Get annotated frame
-                annotated_frame = results.plot()
-                
-                # Write frame
-                out.write(annotated_frame)
-                frame_count += 1
-        
-        finally:
-            cap.release()
-            out.release()
-        
-        processing_time = time.time() - start_time
-        
-        return frame_count, processing_time
+        return out
     
     def detect_frame_stream(
         self,
         frame: np.ndarray,
         confidence: Optional[float] = None,
-        iou: Optional[float] = None
-    ) -> Tuple[List[dict], float]:
+        iou: Optional[float] = None,
+        model_name: Optional[str] = None,
+        timer: Optional[StageTimer] = None
+    ) -> Tuple[DetectionBatch, float]:
         """
         Perform object detection on a single frame for streaming (no file I/O)
         
         Returns:
-            - List of detected objects with details
+            - Detected objects as a columnar DetectionBatch
             - Processing time
         """
-        if not self.model:
-            raise RuntimeError("Model not loaded")
+        # Loads the model into the pool on first use
+        entry = self.get_model(model_name)
         
         conf = confidence if confidence is not None else self.confidence_threshold
         iou_thresh = iou if iou is not None else self.iou_threshold
         
+        timer = timer or StageTimer()
+        timer.set_input_size(frame.shape[1], frame.shape[0])
         start_time = time.time()
         
         # Perform detection
-        results = self.model.predict(
-            frame,
-            conf=conf,
-            iou=iou_thresh,
-            verbose=False
-        )[0]
-        
-        # Extract detections
-        detections = []
-        if results.boxes is not None:
-            for box in results.boxes:
-                cls_id = int(box.cls[0])
-                confidence_score = float(box.conf[0])
-                bbox = box.xyxy[0].cpu().numpy().tolist()
-                
-                detections.append({
-                    "class_name": self.model.names[cls_id],
-                    "confidence": confidence_score,
-                    "bbox": bbox
-                })
+        results = self._timed_predict(frame, conf, iou_thresh, entry.name, timer)
+        
+        # Extract detections (one bulk transfer into columnar arrays)
+        with timer.stage("extract"):
+            detections = DetectionBatch.from_results(results)
         
         processing_time = time.time() - start_time
         
         return detections, processing_time
 
     @staticmethod
-    def encode_image_to_base64(image: np.ndarray) -> str:
-        """Encode image to base64 string"""
+    def encode_image(
+        image: np.ndarray,
+        image_format: str = "jpeg",
+        quality: Optional[int] = None,
+        max_dimension: int = 0
+    ) -> bytes:
+        """Encode image as JPEG or WebP, downscaling so its longest side fits `max_dimension` (0 = keep)"""
+        if max_dimension and max(image.shape[:2]) > max_dimension:
+            scale = max_dimension / max(image.shape[:2])
+            size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        
+        if image_format == "webp":
+            params = [cv2.IMWRITE_WEBP_QUALITY, quality] if quality else []
+        else:
+            params = [cv2.IMWRITE_JPEG_QUALITY, quality] if quality else []
+        _, buffer = cv2.imencode(IMAGE_FORMATS[image_format], image, params)
+        return buffer.tobytes()
+    
+    @classmethod
+    def make_preview(cls, image_bytes: bytes, max_dimension: int, quality: int, image_format: str = "jpeg") -> bytes:
+        """Downscaled re-encode of an already encoded annotated image"""
+        image = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        return cls.encode_image(image, image_format, quality, max_dimension)
+    
+    @staticmethod
+    def encode_jpeg(image: np.ndarray) -> bytes:
+        """Encode image to JPEG bytes"""
         _, buffer = cv2.imencode('.jpg', image)
-        img_base64 = base64.b64encode(buffer).decode('utf-8')
-        return f"data:image/jpeg;base64,{img_base64}"
+        return buffer.tobytes()
+    
+    @staticmethod
+    def to_data_uri(image_bytes: bytes, image_format: str = "jpeg") -> str:
+        """Wrap encoded image bytes in a base64 data URI"""
+        img_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        return f"data:image/{image_format};base64,{img_base64}"
+    
+    @classmethod
+    def jpeg_to_base64(cls, jpeg_bytes: bytes) -> str:
+        """Wrap JPEG bytes in a base64 data URI"""
+        return cls.to_data_uri(jpeg_bytes, "jpeg")
+    
+    @classmethod
+    def encode_image_to_base64(cls, image: np.ndarray) -> str:
+        """Encode image to base64 string"""
+        return cls.jpeg_to_base64(cls.encode_jpeg(image))
     
     def list_available_models(self) -> List[dict]:
         """List all available YOLO models"""
@@ -259,7 +626,8 @@ class YOLOService:
             models.append({
                 "name": model_file.name,
                 "path": str(model_file),
-                "is_current": model_file.name == self.current_model
+                "is_current": model_file.name == self.current_model,
+                "is_loaded": self.registry.peek(model_file.name) is not None
             })
         
         # Also check root directory for existing models
@@ -268,7 +636,30 @@ class YOLOService:
                 models.append({
                     "name": model_file.name,
                     "path": str(model_file),
-                    "is_current": model_file.name == self.current_model
+                    "is_current": model_file.name == self.current_model,
+                    "is_loaded": self.registry.peek(model_file.name) is not None
                 })
         
+        # Quantized INT8 variants (servable by name like any other model)
+        for variant in list_variants():
+            models.append({
+                **variant,
+                "is_current": variant["name"] == self.current_model,
+                "is_loaded": self.registry.peek(variant["name"]) is not None
+            })
+        
         return models
+    
+    def quantize_model(self, model_name: str, mode: str = "dynamic", calibration_dir: Optional[str] = None) -> dict:
+        """Build an INT8 variant of a .pt model and return its accuracy/latency report"""
+        weights_path = resolve_model_path(model_name)
+        if weights_path.suffix != ".pt":
+            raise ValueError("Only PyTorch (.pt) models can be quantized")
+        
+        return build_variant(
+            weights_path,
+            mode=mode,
+            calibration_dir=Path(calibration_dir) if calibration_dir else None,
+            conf=self.confidence_threshold,
+            iou=self.iou_threshold
+        )
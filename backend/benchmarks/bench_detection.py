@@ -0,0 +1,344 @@
+"""
+Reproducible benchmarks for the detection service and HTTP endpoints.
+
+Generates seeded synthetic images and videos at several resolutions, times
+YOLOService.detect_image / detect_frame_stream / detect_video directly and
+the /api/predict endpoints in-process through FastAPI's TestClient, and
+writes p50/p95/p99 latency, throughput and peak RSS as JSON.
+
+Run from the backend directory:
+
+    python benchmarks/bench_detection.py                       # full run
+    python benchmarks/bench_detection.py --save-baseline       # store baseline
+    python benchmarks/bench_detection.py --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+import psutil
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+RESOLUTIONS = {"480p": (640, 480), "720p": (1280, 720), "1080p": (1920, 1080)}
+
+
+# ---------------------------------------------------------------------------
+# Synthetic media
+# ---------------------------------------------------------------------------
+
+def synthetic_frame(rng: np.random.Generator, width: int, height: int, t: float = 0.0) -> np.ndarray:
+    """Noisy background with moving rectangles and circles"""
+    frame = rng.integers(0, 60, size=(height, width, 3), dtype=np.uint8)
+    shape_rng = np.random.default_rng(width * height)  # same shapes in every frame
+    for i in range(8):
+        color = tuple(int(c) for c in shape_rng.integers(80, 255, size=3))
+        cx = int((shape_rng.random() * width + t * 40 * (i + 1)) % width)
+        cy = int(shape_rng.random() * height)
+        size = int(shape_rng.integers(min(width, height) // 12, min(width, height) // 4))
+        if i % 2:
+            cv2.circle(frame, (cx, cy), size // 2, color, -1)
+        else:
+            cv2.rectangle(frame, (cx, cy), (cx + size, cy + size), color, -1)
+    return frame
+
+
+def generate_media(out_dir: Path, resolutions: List[str], video_frames: int, seed: int) -> Dict[str, dict]:
+    """Write one image and one short video per resolution"""
+    media = {}
+    for name in resolutions:
+        width, height = RESOLUTIONS[name]
+        rng = np.random.default_rng(seed)
+        image = synthetic_frame(rng, width, height)
+        image_path = out_dir / f"bench_{name}.jpg"
+        cv2.imwrite(str(image_path), image)
+
+        video_path = out_dir / f"bench_{name}.mp4"
+        writer = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*"mp4v"), 30, (width, height))
+        for i in range(video_frames):
+            writer.write(synthetic_frame(rng, width, height, t=i / 30))
+        writer.release()
+
+        media[name] = {"image": image_path, "frame": image, "video": video_path}
+    return media
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+class PeakRSS:
+    """Samples this process's RSS in the background and keeps the maximum"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = self.process.memory_info().rss
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.process.memory_info().rss)
+
+
+def measure(
+    name: str,
+    resolution: str,
+    func: Callable[[], Any],
+    iterations: int,
+    warmup: int,
+    units: Optional[Callable[[Any], int]] = None
+) -> dict:
+    """
+    Time `func` over `iterations` runs after `warmup` untimed runs.
+
+    `units` maps a call's return value to a unit count (e.g. frames) so
+    throughput is reported in units per second instead of calls per second.
+    """
+    for _ in range(warmup):
+        func()
+
+    latencies, total_units = [], 0
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            output = func()
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            total_units += units(output) if units else 1
+        wall = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    result = {
+        "name": name,
+        "resolution": resolution,
+        "iterations": iterations,
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "throughput": round(total_units / wall, 3),
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1)
+    }
+    print(f"  {name:<28} {resolution:>6}  p50 {result['p50_ms']:>9.2f}ms  p95 {result['p95_ms']:>9.2f}ms  "
+          f"p99 {result['p99_ms']:>9.2f}ms  {result['throughput']:>8.2f}/s  rss {result['peak_rss_mb']}MB")
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Suites
+# ---------------------------------------------------------------------------
+
+def bench_service(media: Dict[str, dict], args, work_dir: Path) -> List[dict]:
+    from app.services.yolo_service import YOLOService
+
+    print("⏱️ Service benchmarks")
+    service = YOLOService()
+    service.load_model(args.model)
+    results = []
+    try:
+        for resolution, item in media.items():
+            results.append(measure(
+                "service.detect_image", resolution,
+                lambda: service.detect_image(str(item["image"])),
+                args.iterations, args.warmup
+            ))
+            results.append(measure(
+                "service.detect_frame_stream", resolution,
+                lambda: service.detect_frame_stream(item["frame"]),
+                args.iterations, args.warmup
+            ))
+            output = work_dir / f"out_{resolution}.mp4"
+            results.append(measure(
+                "service.detect_video", resolution,
+                lambda: service.detect_video(str(item["video"]), str(output)),
+                args.video_iterations, 1,
+                units=lambda out: out[0]  # frames per second
+            ))
+    finally:
+        service.shutdown()
+    return results
+
+
+def bench_http(media: Dict[str, dict], args) -> List[dict]:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    print("⏱️ HTTP benchmarks (in-process ASGI)")
+    results = []
+    with TestClient(app) as client:
+        suffix = uuid.uuid4().hex[:8]
+        response = client.post("/api/auth/register", json={
+            "username": f"bench_{suffix}",
+            "email": f"bench_{suffix}@example.com",
+            "password": "benchmark"
+        })
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        form = {"model": args.model} if args.model else {}
+
+        def post(path: str, file_path: Path, content_type: str):
+            data = file_path.read_bytes()
+            def call():
+                r = client.post(path, headers=headers, data=form, files={"file": (file_path.name, data, content_type)})
+                r.raise_for_status()
+                return r.json()
+            return call
+
+        for resolution, item in media.items():
+            results.append(measure(
+                "http.predict_image", resolution,
+                post("/api/predict/image", item["image"], "image/jpeg"),
+                args.iterations, args.warmup
+            ))
+            results.append(measure(
+                "http.predict_webcam_frame", resolution,
+                post("/api/predict/webcam/frame", item["image"], "image/jpeg"),
+                args.iterations, args.warmup
+            ))
+            results.append(measure(
+                "http.predict_video", resolution,
+                post("/api/predict/video", item["video"], "video/mp4"),
+                args.video_iterations, 1,
+                units=lambda body: body["total_objects"]  # frames for video responses
+            ))
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def environment_info(args) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import torch
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "cuda": torch.cuda.is_available(),
+        "config": {
+            "model": args.model,
+            "resolutions": args.resolutions,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "video_frames": args.video_frames,
+            "video_iterations": args.video_iterations,
+            "seed": args.seed,
+            "cache": args.with_cache
+        }
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print per-case deltas against a baseline; return True if anything regressed"""
+    base_cases = {(r["name"], r["resolution"]): r for r in baseline["results"]}
+    regressed = False
+    print(f"\n📊 Compared with baseline ({baseline['environment'].get('git_commit')}, threshold {threshold:.0%})")
+    for result in current["results"]:
+        base = base_cases.get((result["name"], result["resolution"]))
+        if not base:
+            print(f"  {result['name']:<28} {result['resolution']:>6}  (new)")
+            continue
+        p95_delta = result["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        tput_delta = result["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+        flag = ""
+        if p95_delta > threshold or tput_delta < -threshold:
+            flag = "  ⚠️ REGRESSION"
+            regressed = True
+        elif p95_delta < -threshold or tput_delta > threshold:
+            flag = "  ✅ improved"
+        print(f"  {result['name']:<28} {result['resolution']:>6}  p95 {p95_delta:+7.1%}  "
+              f"throughput {tput_delta:+7.1%}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the YOLO detection service and API")
+    parser.add_argument("--model", default=None, help="Model to benchmark (default: DEFAULT_MODEL)")
+    parser.add_argument("--resolutions", nargs="+", default=list(RESOLUTIONS), choices=list(RESOLUTIONS))
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--video-frames", type=int, default=60)
+    parser.add_argument("--video-iterations", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--suite", choices=["all", "service", "http"], default="all")
+    parser.add_argument("--with-cache", action="store_true", help="Keep the result cache on (off by default)")
+    parser.add_argument("--output", type=Path, default=None, help="JSON output path")
+    parser.add_argument("--baseline", type=Path, default=None, help="Baseline JSON to diff against")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write results to {DEFAULT_BASELINE}")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix="yolo-bench-"))
+
+    # Isolate the run: throwaway database and file dirs, and no cache hits skewing repeat requests
+    os.environ["DATABASE_URL"] = f"sqlite:///{work_dir / 'bench.db'}"
+    os.environ["UPLOAD_DIR"] = str(work_dir / "uploads")
+    os.environ["RESULTS_DIR"] = str(work_dir / "results")
+    if not args.with_cache:
+        os.environ["CACHE_ENABLED"] = "false"
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    print(f"🎬 Generating synthetic media in {work_dir}")
+    media = generate_media(work_dir, args.resolutions, args.video_frames, args.seed)
+
+    results = []
+    if args.suite in ("all", "service"):
+        results += bench_service(media, args, work_dir)
+    if args.suite in ("all", "http"):
+        results += bench_http(media, args)
+
+    report = {"environment": environment_info(args), "results": results}
+    output = args.output or BENCH_DIR / "results" / f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\n💾 Results written to {output}")
+
+    if args.save_baseline:
+        DEFAULT_BASELINE.write_text(json.dumps(report, indent=2))
+        print(f"💾 Baseline updated: {DEFAULT_BASELINE}")
+
+    if args.baseline:
+        regressed = compare(report, json.loads(args.baseline.read_text()), args.threshold)
+        if regressed and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
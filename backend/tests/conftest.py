@@ -0,0 +1,23 @@
+import pytest
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Sessions on a fresh SQLite database with every table and one user (id 1)"""
+    pytest.importorskip("sqlalchemy")
+    pytest.importorskip("pydantic_settings")
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from app.database import Base
+    from app.models.database import User
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    db = factory()
+    db.add(User(id=1, username="alice", email="alice@example.com", hashed_password="x"))
+    db.commit()
+    db.close()
+    yield factory
+    engine.dispose()
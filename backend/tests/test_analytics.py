@@ -0,0 +1,134 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.api.endpoints import analytics
+from app.database import get_db
+from app.models.database import Detection, DetectedObjectRecord, User
+from app.services.detected_objects import backfill
+
+
+def _object(class_name, confidence, class_id=0):
+    return {"class_id": class_id, "class_name": class_name, "confidence": confidence, "bbox": [0, 0, 10, 10]}
+
+
+DETECTIONS = [
+    # id, user, created_at, objects
+    (1, 1, datetime(2024, 1, 1, 10, 15), [_object("person", 0.9), _object("person", 0.6), _object("car", 0.8, 2)]),
+    (2, 1, datetime(2024, 1, 1, 14, 30), [_object("car", 0.95, 2)]),
+    (3, 1, datetime(2024, 1, 2, 9, 0), [_object("person", 0.7)]),
+    (4, 2, datetime(2024, 1, 1, 10, 0), [_object("person", 0.99)]),
+    (5, 1, datetime(2024, 1, 3, 9, 0), None),
+]
+
+
+def _seed(db):
+    db.add(User(id=2, username="bob", email="bob@example.com", hashed_password="x", is_admin=True))
+    for detection_id, user_id, created_at, objects in DETECTIONS:
+        db.add(Detection(
+            id=detection_id, user_id=user_id, file_name=f"{detection_id}.jpg", file_type="image",
+            model_used="yolov8n.pt", objects_detected=objects, total_objects=len(objects or []),
+            processing_time=0.1, created_at=created_at
+        ))
+    db.commit()
+
+
+@pytest.fixture
+def client(session_factory):
+    db = session_factory()
+    _seed(db)
+    assert backfill(db) == 6
+    users = {user.id: user for user in db.query(User)}
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(analytics.router, prefix="/api/analytics")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: users[1]
+    return TestClient(app)
+
+
+def test_backfill_is_batched_and_rerunnable(session_factory):
+    db = session_factory()
+    try:
+        _seed(db)
+        assert backfill(db, batch_size=2) == 6
+        assert backfill(db) == 0
+
+        rows = db.query(DetectedObjectRecord).filter(DetectedObjectRecord.detection_id == 1).all()
+        assert sorted((row.class_name, row.confidence) for row in rows) == [("car", 0.8), ("person", 0.6), ("person", 0.9)]
+        assert {(row.user_id, row.created_at, row.class_id) for row in rows if row.class_name == "car"} == {(1, datetime(2024, 1, 1, 10, 15), 2)}
+        assert (rows[0].x1, rows[0].y2) == (0, 10)
+    finally:
+        db.close()
+
+
+def test_object_search_filters(client):
+    body = client.get("/api/analytics/objects", params={"class_name": "person", "min_confidence": 0.65}).json()
+    assert [(o["detection_id"], o["confidence"]) for o in body] == [(3, 0.7), (1, 0.9)]
+    assert body[0]["bbox"] == [0, 0, 10, 10]
+
+    body = client.get("/api/analytics/objects", params={"start": "2024-01-01T12:00:00", "end": "2024-01-02T00:00:00"}).json()
+    assert [o["detection_id"] for o in body] == [2]
+
+    body = client.get("/api/analytics/objects", params=[("class_name", "car"), ("class_name", "person"), ("limit", 2), ("skip", 1)]).json()
+    assert [o["detection_id"] for o in body] == [2, 1]
+
+
+def test_all_users_is_admin_only(client, session_factory):
+    assert {o["detection_id"] for o in client.get("/api/analytics/objects", params={"all_users": True}).json()} == {1, 2, 3}
+
+    db = session_factory()
+    admin = db.get(User, 2)
+    db.close()
+    client.app.dependency_overrides[get_current_user] = lambda: admin
+    assert {o["detection_id"] for o in client.get("/api/analytics/objects").json()} == {4}
+    assert {o["detection_id"] for o in client.get("/api/analytics/objects", params={"all_users": True}).json()} == {1, 2, 3, 4}
+
+
+def test_detection_search_min_count(client):
+    body = client.get("/api/analytics/detections", params={"class_name": "person"}).json()
+    assert [d["id"] for d in body] == [3, 1]
+
+    body = client.get("/api/analytics/detections", params={"class_name": "person", "min_count": 2}).json()
+    assert [d["id"] for d in body] == [1]
+
+    # min_count applies after the confidence filter
+    body = client.get("/api/analytics/detections", params={"class_name": "person", "min_count": 2, "min_confidence": 0.8}).json()
+    assert body == []
+
+    assert client.get("/api/analytics/detections", params={"min_count": 0}).status_code == 422
+
+
+def test_counts_group_by(client):
+    body = client.get("/api/analytics/counts").json()
+    assert [(c["class_name"], c["period"], c["count"], c["detections"]) for c in body] == [("car", None, 2, 2), ("person", None, 3, 2)]
+    assert body[1]["avg_confidence"] == pytest.approx((0.9 + 0.6 + 0.7) / 3, abs=1e-4)
+
+    body = client.get("/api/analytics/counts", params={"group_by": "day"}).json()
+    assert [(c["class_name"], c["period"], c["count"]) for c in body] == [(None, "2024-01-02", 1), (None, "2024-01-01", 4)]
+
+    body = client.get("/api/analytics/counts", params={"group_by": "class_hour", "class_name": "person"}).json()
+    assert [(c["period"], c["count"]) for c in body] == [("2024-01-02 09:00", 1), ("2024-01-01 10:00", 2)]
+
+    body = client.get("/api/analytics/counts", params={"group_by": "class_day", "min_confidence": 0.85, "end": "2024-01-02T00:00:00"}).json()
+    assert [(c["class_name"], c["period"], c["count"]) for c in body] == [("car", "2024-01-01", 1), ("person", "2024-01-01", 1)]
+
+
+def test_counts_rejects_unknown_group_by(client):
+    response = client.get("/api/analytics/counts", params={"group_by": "week"})
+    assert response.status_code == 400
+    assert "class_day" in response.json()["detail"]
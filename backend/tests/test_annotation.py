@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+
+import cv2
+
+from app.services.annotation import LazyAnnotationRenderer
+from app.services.detection_batch import DetectionBatch
+
+
+def _detections():
+    return DetectionBatch(
+        np.array([[4, 4, 40, 40]], dtype=np.float32),
+        np.array([0.9], dtype=np.float32),
+        np.array([0], dtype=np.int32),
+        {0: "person"}
+    )
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    data_dir, results_dir = tmp_path / "annotations", tmp_path / "results"
+    data_dir.mkdir()
+    results_dir.mkdir()
+    return tmp_path, data_dir, results_dir
+
+
+def _source_image(path):
+    image = np.full((64, 64, 3), 200, dtype=np.uint8)
+    path.write_bytes(cv2.imencode(".jpg", image)[1].tobytes())
+    return path
+
+
+def test_renders_on_first_fetch_only(dirs):
+    tmp_path, data_dir, results_dir = dirs
+    source = _source_image(tmp_path / "upload.jpg")
+    reads = []
+    renderer = LazyAnnotationRenderer(data_dir, results_dir, lambda p: reads.append(p) or p.read_bytes())
+
+    renderer.defer_image(results_dir / "result.jpg", source, _detections())
+    assert renderer.is_pending("result.jpg")
+    assert not (results_dir / "result.jpg").exists()
+
+    result = renderer.render("result.jpg")
+    assert result == results_dir / "result.jpg"
+    assert cv2.imread(str(result)).shape == (64, 64, 3)
+    assert not renderer.is_pending("result.jpg")
+
+    assert renderer.render("result.jpg") == result
+    assert reads == [source]
+    assert renderer.get_stats() == {"pending": 0, "deferred": 1, "rendered": 1}
+
+
+def test_missing_source_drops_the_spec(dirs):
+    tmp_path, data_dir, results_dir = dirs
+    renderer = LazyAnnotationRenderer(data_dir, results_dir, lambda p: p.read_bytes())
+    renderer.defer_image(results_dir / "result.jpg", tmp_path / "deleted.jpg", _detections())
+
+    assert renderer.render("result.jpg") is None
+    assert not renderer.is_pending("result.jpg")
+    assert not (results_dir / "result.jpg").exists()
+
+
+def test_missing_video_source_drops_the_spec(dirs):
+    tmp_path, data_dir, results_dir = dirs
+    renderer = LazyAnnotationRenderer(data_dir, results_dir, lambda p: p.read_bytes())
+    renderer.defer_video(results_dir / "result.mp4", tmp_path / "deleted.mp4", tmp_path / "result.dets")
+
+    assert renderer.render("result.mp4") is None
+    assert not renderer.is_pending("result.mp4")
+
+
+def test_discard_removes_a_pending_render(dirs):
+    tmp_path, data_dir, results_dir = dirs
+    source = _source_image(tmp_path / "upload.jpg")
+    renderer = LazyAnnotationRenderer(data_dir, results_dir, lambda p: p.read_bytes())
+    renderer.defer_image(results_dir / "result.jpg", source, _detections())
+
+    renderer.discard("result.jpg")
+    assert not renderer.is_pending("result.jpg")
+    assert renderer.render("result.jpg") is None
+
+
+def test_admin_delete_discards_the_deferred_render(dirs, session_factory):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_current_admin_user
+    from app.api.endpoints import admin
+    from app.database import get_db
+    from app.models.database import Detection, User
+
+    tmp_path, data_dir, results_dir = dirs
+    source = _source_image(tmp_path / "upload.jpg")
+    renderer = LazyAnnotationRenderer(data_dir, results_dir, lambda p: p.read_bytes())
+    renderer.defer_image(results_dir / "result.jpg", source, _detections())
+
+    db = session_factory()
+    db.add(Detection(
+        id=1, user_id=1, file_name="upload.jpg", file_type="image", model_used="yolov8n.pt",
+        file_path=str(source), result_path=str(results_dir / "result.jpg"), objects_detected=[]
+    ))
+    db.commit()
+    user = db.get(User, 1)
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    app.state.annotation_renderer = renderer
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_admin_user] = lambda: user
+
+    assert TestClient(app).delete("/api/admin/detection/1").status_code == 200
+    assert not renderer.is_pending("result.jpg")
+    assert not source.exists()
@@ -0,0 +1,120 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("jose")
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import func, inspect
+
+from app.api import deps
+from app.api.deps import get_current_user
+from app.api.endpoints import admin
+from app.core import auth_cache as auth_cache_module
+from app.core.auth_cache import AuthCache
+from app.core.security import create_access_token
+from app.database import get_db
+from app.models.database import Detection, User
+
+
+@pytest.fixture
+def cache(monkeypatch, session_factory):
+    cache = AuthCache(ttl_seconds=300, max_entries=100)
+    # The flush listeners and authenticate_token both look the cache up by module global
+    monkeypatch.setattr(auth_cache_module, "auth_cache", cache)
+    monkeypatch.setattr(deps, "auth_cache", cache)
+    monkeypatch.setattr(admin, "auth_cache", cache)
+    monkeypatch.setattr(deps, "SessionLocal", session_factory)
+    return cache
+
+
+@pytest.fixture
+def client(session_factory, cache):
+    db = session_factory()
+    db.get(User, 1).is_admin = True
+    db.add(User(id=2, username="bob", email="bob@example.com", hashed_password="x"))
+    db.commit()
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    app.dependency_overrides[get_db] = override_db
+
+    @app.post("/api/record")
+    async def record(current_user: User = Depends(get_current_user), db=Depends(get_db)):
+        # What the detection endpoints do with the principal: copy its id onto new rows
+        db.add(Detection(user_id=current_user.id, file_name="a.jpg", file_type="image", model_used="yolov8n.pt", objects_detected=[]))
+        db.commit()
+        return {"transient": inspect(current_user).transient}
+
+    return TestClient(app)
+
+
+def _auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def test_deactivation_applies_to_the_next_request(client, cache):
+    admin_headers, bob_headers = _auth(1), _auth(2)
+    assert client.post("/api/record", headers=bob_headers).status_code == 200
+    assert client.post("/api/record", headers=bob_headers).status_code == 200
+    assert cache.hits == 1
+
+    response = client.patch("/api/admin/users/2", json={"is_active": False}, headers=admin_headers)
+    assert response.status_code == 200
+    assert cache.invalidations >= 1
+
+    response = client.post("/api/record", headers=bob_headers)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_demotion_applies_to_the_next_request(client, cache):
+    admin_headers = _auth(1)
+    assert client.patch("/api/admin/users/2", json={"is_admin": True}, headers=admin_headers).status_code == 200
+    bob_headers = _auth(2)
+    assert client.get("/api/admin/users", headers=bob_headers).status_code == 200
+    assert client.get("/api/admin/users", headers=bob_headers).status_code == 200
+
+    assert client.patch("/api/admin/users/2", json={"is_admin": False}, headers=admin_headers).status_code == 200
+    assert client.get("/api/admin/users", headers=bob_headers).status_code == 403
+
+
+def test_cached_user_never_reaches_a_session(client, cache, session_factory):
+    headers = _auth(2)
+    client.post("/api/record", headers=headers)
+    response = client.post("/api/record", headers=headers)
+    assert cache.hits == 1
+    assert response.json() == {"transient": True}
+
+    db = session_factory()
+    try:
+        # A transient User attached by cascade would have been flushed as a second bob
+        assert db.query(func.count(User.id)).scalar() == 2
+        assert db.query(func.count(Detection.id)).filter(Detection.user_id == 2).scalar() == 2
+    finally:
+        db.close()
+
+    cached = cache.get(headers["Authorization"].split()[1])
+    assert inspect(cached).transient
+    assert cached is not cache.get(headers["Authorization"].split()[1])
+
+
+def test_entries_expire_and_respect_the_token_expiry(cache, session_factory):
+    db = session_factory()
+    user = db.get(User, 1)
+    db.close()
+
+    cache.put("short", user, token_expires_at=0)
+    assert cache.get("short") is None
+    cache.put("fresh", user)
+    assert cache.get("fresh").username == "alice"
+    cache.invalidate_user(1)
+    assert cache.get("fresh") is None
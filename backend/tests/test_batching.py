@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from app.services.batching import MicroBatcher
+
+
+class FakeBoxes:
+    def __init__(self, conf):
+        self.conf = np.asarray(conf, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.conf)
+
+
+class FakeResult:
+    """Enough of an ultralytics Results for the batcher: boxes.conf and boolean indexing"""
+
+    def __init__(self, conf):
+        self.boxes = FakeBoxes(conf)
+
+    def __getitem__(self, mask):
+        return FakeResult(self.boxes.conf[mask])
+
+
+class RecordingPredictor:
+    def __init__(self, conf=(0.1, 0.3, 0.6, 0.9), fail=False):
+        self.calls = []
+        self.conf = conf
+        self.fail = fail
+
+    def __call__(self, images, conf, iou, model):
+        self.calls.append(([image.shape for image in images], conf, iou, model))
+        if self.fail:
+            raise RuntimeError("predict failed")
+        return [FakeResult([c for c in self.conf if c >= conf]) for _ in images]
+
+
+def _image(height=480, width=640):
+    return np.zeros((height, width, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def predictor():
+    return RecordingPredictor()
+
+
+@pytest.fixture
+def batcher(predictor):
+    batcher = MicroBatcher(predictor, max_batch_size=8, max_wait_ms=200)
+    yield batcher
+    batcher.shutdown()
+
+
+def _submit_together(batcher, requests):
+    # Well inside the 200ms collection window, so they all land in one batch
+    futures = [batcher.submit(*request) for request in requests]
+    return [future.result(timeout=5) for future in futures]
+
+
+def test_results_are_filtered_to_each_callers_confidence(batcher, predictor):
+    low, high = _submit_together(batcher, [(_image(), 0.2, 0.45), (_image(), 0.7, 0.45)])
+
+    assert list(low.boxes.conf) == pytest.approx([0.3, 0.6, 0.9])
+    assert list(high.boxes.conf) == pytest.approx([0.9])
+    assert predictor.calls == [([(480, 640, 3)] * 2, 0.2, 0.45, None)]
+
+
+def test_groups_by_model_iou_and_shape(batcher, predictor):
+    _submit_together(batcher, [
+        (_image(), 0.25, 0.45),
+        (_image(), 0.25, 0.45),
+        (_image(720, 1280), 0.25, 0.45),
+        (_image(), 0.25, 0.6),
+        (_image(), 0.25, 0.45, "other.pt"),
+    ])
+
+    groups = sorted((shapes, iou, model or "") for shapes, _, iou, model in predictor.calls)
+    assert groups == sorted([
+        ([(480, 640, 3)] * 2, 0.45, ""),
+        ([(720, 1280, 3)], 0.45, ""),
+        ([(480, 640, 3)], 0.6, ""),
+        ([(480, 640, 3)], 0.45, "other.pt"),
+    ])
+
+
+def test_failure_reaches_every_caller_in_the_group():
+    predictor = RecordingPredictor(fail=True)
+    batcher = MicroBatcher(predictor, max_batch_size=4, max_wait_ms=1)
+    try:
+        with pytest.raises(RuntimeError, match="predict failed"):
+            batcher.predict(_image(), 0.25, 0.45)
+    finally:
+        batcher.shutdown()
+
+
+def test_submit_after_shutdown_is_refused(batcher):
+    batcher.shutdown()
+    with pytest.raises(RuntimeError):
+        batcher.submit(_image(), 0.25, 0.45)
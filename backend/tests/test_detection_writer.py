@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+
+from app.models.database import Detection, DetectedObjectRecord
+from app.services.detection_writer import DetectionWriter
+
+
+def _row(file_name):
+    return {
+        "user_id": 1,
+        "file_name": file_name,
+        "file_type": "image",
+        "model_used": "yolov8n.pt",
+        "objects_detected": [],
+        "total_objects": 1,
+        "processing_time": 0.01
+    }
+
+
+OBJECT = {"class_id": 0, "class_name": "person", "confidence": 0.9, "x1": 0, "y1": 0, "x2": 10, "y2": 10}
+
+
+def test_bad_row_is_dead_lettered_and_queue_keeps_flowing(session_factory, tmp_path):
+    dead_letter = tmp_path / "dead.jsonl"
+    writer = DetectionWriter(session_factory, flush_interval=3600, max_attempts=2, dead_letter_path=dead_letter)
+    try:
+        writer.submit(_row("a.jpg"))
+        writer.submit(_row(None))  # violates NOT NULL, fails the whole batch
+        writer.submit(_row("c.jpg"), [OBJECT])
+
+        writer.flush()
+        assert writer.get_stats()["pending"] == 3  # first failure: batch stays queued
+
+        writer.flush()
+        stats = writer.get_stats()
+        assert stats["pending"] == 0
+        assert stats["dead_lettered"] == 1
+
+        writer.submit(_row("d.jpg"))
+        writer.flush()
+        assert writer.get_stats()["pending"] == 0
+    finally:
+        writer.shutdown()
+
+    db = session_factory()
+    try:
+        names = sorted(name for (name,) in db.query(Detection.file_name))
+        assert names == ["a.jpg", "c.jpg", "d.jpg"]
+        assert db.query(DetectedObjectRecord).count() == 1
+    finally:
+        db.close()
+
+    lines = dead_letter.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["values"]["file_name"] is None
+
+
+def test_failed_batch_is_retried_before_dead_lettering(session_factory):
+    writer = DetectionWriter(session_factory, flush_interval=3600, max_attempts=3)
+    try:
+        writer.submit(_row(None))
+        writer.flush()
+        writer.flush()
+        assert writer.get_stats()["pending"] == 1
+        assert writer.get_stats()["dead_lettered"] == 0
+        writer.flush()
+        assert writer.get_stats()["pending"] == 0
+        assert writer.get_stats()["dead_lettered"] == 1
+    finally:
+        writer.shutdown()
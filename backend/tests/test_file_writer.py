@@ -0,0 +1,110 @@
+import threading
+
+from app.services.file_writer import BackgroundFileWriter
+
+
+class GatedWriter(BackgroundFileWriter):
+    """Holds the background thread on its first write until `gate` is set"""
+
+    def __init__(self, *args, **kwargs):
+        self.gate = threading.Event()
+        self.order = []
+        super().__init__(*args, **kwargs)
+
+    def _write(self, path, data):
+        if threading.current_thread() is self._thread:
+            self.gate.wait(5)
+        self.order.append(data)
+        super()._write(path, data)
+
+
+def test_queued_bytes_are_served_until_written(tmp_path):
+    writer = GatedWriter()
+    try:
+        writer.write(tmp_path / "a.jpg", b"a")
+        assert writer.get_pending(tmp_path / "a.jpg") == b"a"
+        assert not (tmp_path / "a.jpg").exists()
+    finally:
+        writer.gate.set()
+        writer.shutdown()
+    assert (tmp_path / "a.jpg").read_bytes() == b"a"
+    assert writer.get_pending(tmp_path / "a.jpg") is None
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_writes_land_in_order_and_the_last_write_to_a_path_wins(tmp_path):
+    writer = GatedWriter()
+    writer.write(tmp_path / "a.jpg", b"first")
+    writer.write(tmp_path / "b.jpg", b"b")
+    writer.write(tmp_path / "a.jpg", b"second")
+    writer.gate.set()
+    writer.shutdown()
+
+    # The first a.jpg write may already be in flight; the superseded one is never written after the newer one
+    assert writer.order[-2:] == [b"b", b"second"]
+    assert (tmp_path / "a.jpg").read_bytes() == b"second"
+    assert writer.get_stats()["pending"] == 0
+
+
+def test_discarded_writes_never_reach_the_disk(tmp_path):
+    writer = GatedWriter()
+    writer.write(tmp_path / "held.jpg", b"held")
+    writer.write(tmp_path / "failed.jpg", b"failed")
+    writer.discard(tmp_path / "failed.jpg")
+    assert writer.get_pending(tmp_path / "failed.jpg") is None
+    writer.gate.set()
+    writer.shutdown()
+
+    assert not (tmp_path / "failed.jpg").exists()
+    assert (tmp_path / "held.jpg").exists()
+
+
+def test_shutdown_flushes_everything_queued(tmp_path):
+    writer = GatedWriter(max_queue_size=64)
+    paths = [tmp_path / f"{index}.jpg" for index in range(20)]
+    for index, path in enumerate(paths):
+        writer.write(path, bytes([index]))
+    assert writer.get_stats()["pending"] == 20
+
+    writer.gate.set()
+    writer.shutdown()
+    assert [path.read_bytes() for path in paths] == [bytes([index]) for index in range(20)]
+    assert writer.get_stats()["written"] == 20
+
+    # After shutdown writes go straight to disk
+    writer.write(tmp_path / "late.jpg", b"late")
+    assert (tmp_path / "late.jpg").read_bytes() == b"late"
+
+
+def test_writes_queued_behind_the_shutdown_sentinel_are_flushed(tmp_path):
+    writer = BackgroundFileWriter()
+    writer.shutdown()
+    # Simulate a write() that passed the stopped check just before shutdown
+    writer._pending[str(tmp_path / "raced.jpg")] = b"raced"
+    writer._queue.put((tmp_path / "raced.jpg", b"raced"))
+    writer._stopped = False
+    writer.shutdown()
+    assert (tmp_path / "raced.jpg").read_bytes() == b"raced"
+
+
+def test_full_queue_falls_back_to_a_synchronous_write(tmp_path):
+    writer = GatedWriter(max_queue_size=1)
+    try:
+        writer.write(tmp_path / "a.jpg", b"a")  # taken by the thread, which then blocks
+        while writer._queue.qsize():
+            pass
+        writer.write(tmp_path / "b.jpg", b"b")  # fills the queue
+        writer.write(tmp_path / "c.jpg", b"c")  # no room: written by the caller
+        assert (tmp_path / "c.jpg").read_bytes() == b"c"
+        assert writer.get_stats()["sync_fallbacks"] == 1
+    finally:
+        writer.gate.set()
+        writer.shutdown()
+    assert (tmp_path / "b.jpg").read_bytes() == b"b"
+
+
+def test_failed_write_is_counted_and_released(tmp_path):
+    writer = BackgroundFileWriter()
+    writer.write(tmp_path / "missing-dir" / "a.jpg", b"a")
+    writer.shutdown()
+    assert writer.get_stats() == {"pending": 0, "written": 0, "bytes_written": 0, "sync_fallbacks": 0, "errors": 1}
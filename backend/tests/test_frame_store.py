@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+from app.services.detection_batch import DetectionBatch
+from app.services.frame_store import FrameDetectionReader, FrameDetectionWriter, discard_partial
+
+NAMES = {0: "person", 2: "car"}
+
+
+def _frame(*objects):
+    """DetectionBatch from (class_id, confidence) pairs; boxes encode the confidence for easy checking"""
+    if not objects:
+        return DetectionBatch.empty(NAMES)
+    class_ids, confidences = zip(*objects)
+    return DetectionBatch(
+        np.array([[c * 100] * 4 for c in confidences], dtype=np.float32),
+        np.array(confidences, dtype=np.float32),
+        np.array(class_ids, dtype=np.int32),
+        NAMES
+    )
+
+
+def _temp_files(path):
+    return sorted(p.name for p in path.parent.glob(path.name + ".*.tmp"))
+
+
+def test_round_trip_and_query(tmp_path):
+    path = tmp_path / "result.dets"
+    writer = FrameDetectionWriter(path, fps=10)
+    writer.append(_frame((0, 0.9), (2, 0.4)))
+    writer.append(_frame())
+    writer.append(_frame((2, 0.7)))
+    assert writer.close() == path
+    assert _temp_files(path) == []
+
+    reader = FrameDetectionReader(path)
+    assert (reader.frames, reader.objects, reader.fps) == (3, 3, 10)
+    assert reader.names == NAMES
+    assert len(reader.frame(1)) == 0
+    np.testing.assert_array_equal(reader.frame(2).class_ids, [2])
+
+    frames, cars = reader.query(class_ids=[2])
+    np.testing.assert_array_equal(frames, [0, 2])
+    np.testing.assert_allclose(cars.confidences, [0.4, 0.7])
+
+    frames, confident = reader.query(start_time=0.1, min_confidence=0.5)
+    np.testing.assert_array_equal(frames, [2])
+    np.testing.assert_allclose(confident.boxes, [[70] * 4], rtol=1e-6)
+
+
+def test_resume_truncates_back_to_the_checkpoint(tmp_path):
+    path = tmp_path / "result.dets"
+    writer = FrameDetectionWriter(path, fps=10)
+    writer.append(_frame((0, 0.9)))
+    writer.append(_frame((2, 0.8), (2, 0.6)))
+    writer.flush()  # checkpoint after frame 2
+    writer.append(_frame((0, 0.1)))  # past the checkpoint, redone on resume
+    writer.suspend()
+
+    resumed = FrameDetectionWriter(path, fps=10, resume_frame=2)
+    assert resumed.enabled
+    assert (resumed.frames, resumed.object_count) == (2, 3)
+    replayed = list(resumed.replay(NAMES))
+    assert [len(batch) for batch in replayed] == [1, 2]
+    np.testing.assert_allclose(replayed[1].confidences, [0.8, 0.6])
+
+    resumed.append(_frame((0, 0.5)))
+    resumed.close()
+
+    reader = FrameDetectionReader(path)
+    assert (reader.frames, reader.objects) == (3, 4)
+    np.testing.assert_allclose(reader.frame(2).confidences, [0.5])
+    np.testing.assert_array_equal(reader.frame_index, [0, 1, 1, 2])
+
+
+def test_resume_without_enough_temp_data_drops_the_sidecar(tmp_path):
+    path = tmp_path / "result.dets"
+    writer = FrameDetectionWriter(path, fps=10)
+    writer.append(_frame((0, 0.9)))
+    writer.suspend()
+
+    resumed = FrameDetectionWriter(path, fps=10, resume_frame=5)
+    assert not resumed.enabled
+    resumed.append(_frame((0, 0.9)))
+    assert resumed.close() is None
+    assert _temp_files(path) == []
+    assert not path.exists()
+
+
+def test_discard_partial_removes_every_temp_column(tmp_path):
+    path = tmp_path / "result.dets"
+    writer = FrameDetectionWriter(path, fps=10)
+    writer.append(_frame((0, 0.9)))
+    writer.suspend()
+    assert len(_temp_files(path)) == 5
+
+    discard_partial(path)
+    assert _temp_files(path) == []
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "result.dets"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        FrameDetectionReader(path)
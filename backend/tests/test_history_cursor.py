@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("ultralytics")
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.api.endpoints import detection
+from app.api.endpoints.detection import _decode_cursor, _encode_cursor
+from app.database import get_db
+from app.models.database import Detection, User
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = _encode_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert _decode_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "bnVsbA", "WzEsMl0", "WyJub3QgYSBkYXRlIiwgMV0"])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        _decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_pages_cover_every_row_once_including_timestamp_ties(session_factory):
+    # Pairs of rows share a created_at so the id tie-break is exercised
+    start = datetime(2024, 1, 1)
+    db = session_factory()
+    for i in range(7):
+        db.add(Detection(
+            user_id=1, file_name=f"{i}.jpg", file_type="image", model_used="yolov8n.pt",
+            objects_detected=[], processing_time=0.1, created_at=start + timedelta(seconds=i // 2)
+        ))
+    db.commit()
+    user = db.get(User, 1)
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(detection.router, prefix="/api/predict")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: user
+
+    seen, cursor = [], None
+    with TestClient(app) as client:
+        for _ in range(10):
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/api/predict/history", params=params)
+            assert response.status_code == 200
+            seen += [row["id"] for row in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import wait
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from app.services.inference_pool import InferencePool, InferenceQueueFull
+from app.services.model_registry import LoadedModel
+from app.services.yolo_service import YOLOService
+
+
+class _RecordingModel:
+    """Stands in for a YOLO model and records how many predicts overlap"""
+
+    names = {0: "person"}
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def predict(self, images, **kwargs):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return [None] * len(images)
+
+
+class _Service:
+    def __init__(self, entry):
+        self.entry = entry
+
+    def get_model(self, model_name=None):
+        return self.entry
+
+
+def test_pool_workers_never_predict_on_one_model_concurrently():
+    model = _RecordingModel()
+    service = _Service(LoadedModel("fake.pt", "pytorch", Path("fake.pt"), model, 0, "1"))
+    pool = InferencePool("test", max_workers=4, max_queue_size=16)
+    try:
+        futures = [pool.submit(YOLOService._predict_batch, service, [object()], 0.25, 0.45) for _ in range(8)]
+        wait(futures)
+        assert all(f.result() == [None] for f in futures)
+    finally:
+        pool.shutdown(wait=True)
+    assert model.max_active == 1
+
+
+def test_pool_rejects_beyond_capacity():
+    release = threading.Event()
+    pool = InferencePool("test", max_workers=1, max_queue_size=1, retry_after=3)
+    try:
+        pool.submit(release.wait)
+        pool.submit(release.wait)
+        with pytest.raises(InferenceQueueFull) as rejected:
+            pool.submit(release.wait)
+        assert rejected.value.retry_after == 3
+        assert pool.get_stats()["rejected"] == 1
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
@@ -0,0 +1,95 @@
+import pytest
+
+from app.core.metrics import Counter, Gauge, Histogram, MetricsRegistry, StageTimer, size_bucket
+
+
+def test_counter_renders_help_type_and_one_sample_per_label_set():
+    counter = Counter("jobs_total", "Jobs handled", ("endpoint", "model"))
+    counter.inc(endpoint="image", model="n")
+    counter.inc(2, endpoint="image", model="n")
+    counter.inc(endpoint="video", model="s")
+
+    assert counter.render() == [
+        "# HELP jobs_total Jobs handled",
+        "# TYPE jobs_total counter",
+        'jobs_total{endpoint="image",model="n"} 3.0',
+        'jobs_total{endpoint="video",model="s"} 1.0',
+    ]
+
+
+def test_unlabelled_metrics_have_no_braces():
+    counter = Counter("up_total", "Up")
+    counter.inc(5)
+    assert counter.render()[-1] == "up_total 5.0"
+
+
+def test_label_values_are_escaped():
+    counter = Counter("errors_total", "Errors", ("reason",))
+    counter.inc(reason='bad "model"\\path\nline two')
+    assert counter.render()[-1] == 'errors_total{reason="bad \\"model\\"\\\\path\\nline two"} 1.0'
+
+
+def test_missing_labels_render_empty():
+    counter = Counter("errors_total", "Errors", ("endpoint", "reason"))
+    counter.inc(endpoint="image")
+    assert counter.render()[-1] == 'errors_total{endpoint="image",reason=""} 1.0'
+
+
+def test_histogram_buckets_are_cumulative_and_upper_inclusive():
+    histogram = Histogram("latency_seconds", "Latency", ("stage",), buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value, stage="nms")
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{stage="nms",le="0.1"} 2',
+        'latency_seconds_bucket{stage="nms",le="0.5"} 3',
+        'latency_seconds_bucket{stage="nms",le="1.0"} 3',
+        'latency_seconds_bucket{stage="nms",le="+Inf"} 4',
+        'latency_seconds_sum{stage="nms"} 2.45',
+        'latency_seconds_count{stage="nms"} 4',
+    ]
+
+
+def test_unlabelled_histogram():
+    histogram = Histogram("wait_seconds", "Wait", buckets=(1.0,))
+    histogram.observe(0.25)
+    assert histogram.render()[2:] == [
+        'wait_seconds_bucket{le="1.0"} 1',
+        'wait_seconds_bucket{le="+Inf"} 1',
+        "wait_seconds_sum 0.25",
+        "wait_seconds_count 1",
+    ]
+
+
+def test_gauge_callbacks_are_read_at_scrape_time_and_failures_skipped():
+    depth = {"value": 1}
+    gauge = Gauge("queue_depth", "Queue depth", ("queue",))
+    gauge.set(7, queue="static")
+    gauge.set_function(lambda: depth["value"], queue="live")
+    gauge.set_function(lambda: 1 / 0, queue="broken")
+
+    depth["value"] = 4
+    assert gauge.render()[2:] == ['queue_depth{queue="static"} 7', 'queue_depth{queue="live"} 4']
+
+
+def test_registry_joins_metrics_with_a_trailing_newline():
+    registry = MetricsRegistry()
+    registry.register(Counter("a_total", "A")).inc()
+    registry.register(Gauge("b", "B")).set(1.5)
+    assert registry.render() == "# HELP a_total A\n# TYPE a_total counter\na_total 1.0\n# HELP b B\n# TYPE b gauge\nb 1.5\n"
+
+
+def test_stage_timer_accumulates_ultralytics_speeds():
+    class FakeResults:
+        speed = {"preprocess": 2.0, "inference": 10.0, "postprocess": None}
+
+    timer = StageTimer()
+    assert timer.add_results_speed(FakeResults()) == pytest.approx(0.012)
+    timer.add("inference", 0.003)
+    assert timer.stages == {"preprocess": pytest.approx(0.002), "inference": pytest.approx(0.013)}
+
+    timer.set_input_size(1280, 720)
+    assert timer.input_size == "<=1280"
+    assert size_bucket(4000, 10) == ">3840"
@@ -0,0 +1,75 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("ultralytics")
+pytest.importorskip("pydantic_settings")
+
+from app.services.model_registry import LoadedModel, ModelRegistry
+
+
+class FlakyRegistry(ModelRegistry):
+    """_load stand-in: fails while `failures` > 0, otherwise returns a 1-byte model after `delay`"""
+
+    def __init__(self, failures=0, delay=0.0):
+        super().__init__("cpu", max_models=2, max_memory_bytes=1 << 30, warmup=False)
+        self.failures = failures
+        self.delay = delay
+        self.attempts = 0
+
+    def _load(self, name, backend):
+        self.attempts += 1
+        time.sleep(self.delay)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("corrupt weights")
+        with self._lock:
+            self.loads += 1
+        return LoadedModel(name, backend, None, object(), 1, version=name)
+
+
+def test_failed_load_releases_its_loading_slot():
+    registry = FlakyRegistry(failures=1)
+    with pytest.raises(RuntimeError):
+        registry.get("yolov8n.pt")
+    assert registry._loading == {}
+
+    assert registry.get("yolov8n.pt").name == "yolov8n.pt"
+    assert registry._loading == {}
+    assert (registry.attempts, registry.get_stats()["loads"]) == (2, 1)
+
+
+def test_concurrent_gets_load_once():
+    registry = FlakyRegistry(delay=0.05)
+    entries = []
+    threads = [threading.Thread(target=lambda: entries.append(registry.get("yolov8n.pt"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.attempts == 1
+    assert len({id(entry) for entry in entries}) == 1
+    assert registry._loading == {}
+
+
+def test_waiters_retry_after_a_failed_load():
+    registry = FlakyRegistry(failures=1, delay=0.05)
+    outcomes = []
+
+    def get():
+        try:
+            outcomes.append(registry.get("yolov8n.pt").name)
+        except RuntimeError:
+            outcomes.append("failed")
+
+    threads = [threading.Thread(target=get) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(outcomes) == ["failed"] + ["yolov8n.pt"] * 3
+    assert registry.get_stats()["loads"] == 1
+    assert registry._loading == {}
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("ultralytics")
+pytest.importorskip("pydantic_settings")
+
+from app.core.config import settings
+from app.services import model_registry, onnx_backend
+from app.services.model_registry import ModelRegistry
+
+
+class FakeYOLO:
+    """Stands in for ultralytics.YOLO: export writes <stem>.onnx next to the weights, predicts are counted"""
+
+    predicts = 0
+
+    def __init__(self, path, task=None):
+        self.path = path
+        self.names = {0: "person"}
+
+    def export(self, format, imgsz, dynamic, verbose):
+        exported = Path(self.path).with_suffix(".onnx")
+        exported.write_bytes(b"exported")
+        return str(exported)
+
+    def predict(self, image, verbose=False):
+        FakeYOLO.predicts += 1
+
+
+@pytest.fixture
+def fake_yolo(monkeypatch):
+    FakeYOLO.predicts = 0
+    monkeypatch.setattr(onnx_backend, "YOLO", FakeYOLO)
+    monkeypatch.setattr(model_registry, "YOLO", FakeYOLO)
+    return FakeYOLO
+
+
+def test_export_leaves_a_users_onnx_alone(tmp_path, fake_yolo):
+    weights = tmp_path / "yolov8n.pt"
+    weights.write_bytes(b"weights")
+    users_model = tmp_path / "yolov8n.onnx"
+    users_model.write_bytes(b"mine")
+
+    artifact = onnx_backend.export_onnx(weights, 640)
+
+    assert artifact == onnx_backend.onnx_artifact_path(weights, 640)
+    assert artifact.read_bytes() == b"exported"
+    assert users_model.read_bytes() == b"mine"
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted([weights.name, users_model.name, artifact.name])
+
+
+def test_export_reuses_existing_artifact(tmp_path, fake_yolo):
+    weights = tmp_path / "yolov8n.pt"
+    weights.write_bytes(b"weights")
+    artifact = onnx_backend.onnx_artifact_path(weights, 640)
+    artifact.write_bytes(b"cached")
+
+    assert onnx_backend.export_onnx(weights, 640) == artifact
+    assert artifact.read_bytes() == b"cached"
+
+
+@pytest.mark.parametrize("warmup, threads, predicts", [
+    (True, 0, 1),   # the session-init predict is the warmup
+    (False, 0, 1),
+    (True, 2, 2),   # a swapped-in session is warmed again
+    (False, 2, 1),
+])
+def test_onnx_load_warms_up_once(tmp_path, monkeypatch, fake_yolo, warmup, threads, predicts):
+    monkeypatch.setattr(settings, "MODELS_DIR", tmp_path)
+    monkeypatch.setattr(settings, "ONNX_INTRA_OP_THREADS", threads)
+    monkeypatch.setattr(model_registry, "configure_session", lambda model, path, intra, inter: bool(intra or inter))
+    (tmp_path / "custom.onnx").write_bytes(b"model")
+
+    ModelRegistry("cpu", max_models=2, max_memory_bytes=1 << 30, warmup=warmup).get("custom.onnx")
+
+    assert fake_yolo.predicts == predicts
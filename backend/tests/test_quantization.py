@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from app.core.config import settings
+from app.services import quantization
+
+
+@pytest.fixture
+def weights(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MODELS_DIR", tmp_path)
+    path = tmp_path / "tiny.pt"
+    path.write_bytes(b"weights")
+    return path
+
+
+def _fake_quantize(calls):
+    def quantize(weights_path, mode, calibration_dir):
+        calls.append(mode)
+        artifact = quantization.variant_path(weights_path, mode, settings.ONNX_IMGSZ)
+        artifact.write_bytes(b"int8")
+        return artifact
+    return quantize
+
+
+def test_missing_report_images_fail_before_quantizing(weights, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(quantization, "quantize_model", _fake_quantize(calls))
+    empty = tmp_path / "calibration"
+    empty.mkdir()
+
+    with pytest.raises(ValueError, match="sample images"):
+        quantization.build_variant(weights, "dynamic", empty)
+    assert calls == []
+    assert list(tmp_path.glob("*-int8-*.onnx")) == []
+
+
+def test_failed_report_removes_new_artifact(weights, tmp_path, monkeypatch):
+    calibration = tmp_path / "calibration"
+    calibration.mkdir()
+    (calibration / "a.jpg").write_bytes(b"not really an image")
+    monkeypatch.setattr(quantization, "quantize_model", _fake_quantize([]))
+
+    with pytest.raises(ValueError):
+        quantization.build_variant(weights, "dynamic", calibration)  # unreadable image: no frames
+    assert quantization.list_variants() == []
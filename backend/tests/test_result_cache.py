@@ -0,0 +1,114 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.detection_batch import DetectionBatch
+from app.services.result_cache import CachedDetection, DetectionCache
+
+
+def _value(image: bytes = b"jpeg") -> CachedDetection:
+    detections = DetectionBatch(
+        np.array([[1, 2, 3, 4]], dtype=np.float32),
+        np.array([0.8], dtype=np.float32),
+        np.array([0], dtype=np.int32),
+        {0: "person"}
+    )
+    return CachedDetection(detections, image, 0.05)
+
+
+def _wait_for_coalesced(cache: DetectionCache, count: int):
+    deadline = time.monotonic() + 5
+    while cache.get_stats()["coalesced"] < count:
+        assert time.monotonic() < deadline, "followers never joined the in-flight compute"
+        time.sleep(0.001)
+
+
+def test_concurrent_misses_compute_once():
+    cache = DetectionCache(max_memory_bytes=1 << 20)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return _value()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(cache.get_or_compute, "k", compute)
+        started.wait(timeout=5)
+        followers = [pool.submit(cache.get_or_compute, "k", compute) for _ in range(3)]
+        _wait_for_coalesced(cache, 3)
+        release.set()
+        results = [leader.result(timeout=5)] + [f.result(timeout=5) for f in followers]
+
+    assert len(calls) == 1
+    assert results[0][1] is False
+    assert all(hit for _, hit in results[1:])
+    assert all(value is results[0][0] for value, _ in results)
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_failed_compute_reaches_waiters_and_is_not_cached():
+    cache = DetectionCache(max_memory_bytes=1 << 20)
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(timeout=5)
+        raise RuntimeError("inference failed")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(cache.get_or_compute, "k", failing)
+        started.wait(timeout=5)
+        follower = pool.submit(cache.get_or_compute, "k", failing)
+        _wait_for_coalesced(cache, 1)
+        release.set()
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError, match="inference failed"):
+                future.result(timeout=5)
+
+    value, hit = cache.get_or_compute("k", _value)
+    assert not hit
+    assert value.annotated_image == b"jpeg"
+
+
+def test_memory_tier_evicts_least_recently_used():
+    size = _value().size_bytes
+    cache = DetectionCache(max_memory_bytes=size * 2)
+    cache.get_or_compute("a", _value)
+    cache.get_or_compute("b", _value)
+    cache.get_or_compute("a", _value)  # a becomes most recent
+    cache.get_or_compute("c", _value)
+
+    assert cache.get_or_compute("a", _value)[1]
+    assert not cache.get_or_compute("b", _value)[1]
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    first = DetectionCache(max_memory_bytes=1 << 20, disk_dir=tmp_path, max_disk_bytes=1 << 20)
+    first.get_or_compute("k", lambda: _value(b"annotated"))
+
+    second = DetectionCache(max_memory_bytes=1 << 20, disk_dir=tmp_path, max_disk_bytes=1 << 20)
+    value, hit = second.get_or_compute("k", lambda: pytest.fail("should come from disk"))
+
+    assert hit
+    assert second.get_stats()["disk_hits"] == 1
+    assert value.annotated_image == b"annotated"
+    assert value.detections.names == {0: "person"}
+    np.testing.assert_array_equal(value.detections.boxes, [[1, 2, 3, 4]])
+
+
+def test_keys_depend_on_every_input():
+    base = DetectionCache.make_key("abc", "yolov8n.pt", 0.25, 0.45, ".jpg")
+    assert base == DetectionCache.make_key("abc", "yolov8n.pt", 0.25, 0.45, ".jpg")
+    assert base != DetectionCache.make_key("abd", "yolov8n.pt", 0.25, 0.45, ".jpg")
+    assert base != DetectionCache.make_key("abc", "yolov8s.pt", 0.25, 0.45, ".jpg")
+    assert base != DetectionCache.make_key("abc", "yolov8n.pt", 0.3, 0.45, ".jpg")
+    assert base != DetectionCache.make_key("abc", "yolov8n.pt", 0.25, 0.5, ".jpg")
+    assert base != DetectionCache.make_key("abc", "yolov8n.pt", 0.25, 0.45, ".webp")
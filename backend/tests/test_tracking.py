@@ -0,0 +1,164 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+
+import torch
+from ultralytics.engine.results import Results
+
+from app.services.tracking import (
+    BoxTracker,
+    IoUTracker,
+    KalmanTracker,
+    StridedDetector,
+    box_iou,
+    create_tracker
+)
+
+NAMES = {0: "person", 1: "car"}
+
+
+def _box(x, y=10, size=20):
+    return np.array([[x, y, x + size, y + size]], dtype=np.float32)
+
+
+def _update(tracker, boxes, classes=(0,)):
+    tracker.update(np.asarray(boxes, dtype=np.float32), np.full(len(boxes), 0.9, dtype=np.float32), np.asarray(classes))
+
+
+def test_box_iou():
+    a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=np.float32)
+    np.testing.assert_allclose(box_iou(a, b), [[1.0, 50 / 150], [0.0, 0.0]], rtol=1e-6)
+    assert box_iou(a, np.zeros((0, 4), dtype=np.float32)).shape == (2, 0)
+
+
+def test_box_tracker_is_abstract():
+    with pytest.raises(TypeError):
+        BoxTracker()
+
+
+def test_create_tracker():
+    assert isinstance(create_tracker("iou"), IoUTracker)
+    assert isinstance(create_tracker("kalman"), KalmanTracker)
+    with pytest.raises(ValueError):
+        create_tracker("sort")
+
+
+def test_iou_tracker_extrapolates_velocity_between_keyframes():
+    tracker = IoUTracker()
+    _update(tracker, _box(0))
+    tracker.predict()
+    tracker.predict()
+    _update(tracker, _box(9))  # the keyframe is frame 3, so 9px over three frames
+
+    np.testing.assert_allclose(tracker.predict(), _box(12), atol=1e-4)
+    np.testing.assert_allclose(tracker.predict(), _box(15), atol=1e-4)
+    assert tracker.motion() == pytest.approx(3 / 20)
+
+
+def test_iou_tracker_never_matches_across_classes():
+    tracker = IoUTracker()
+    _update(tracker, _box(0), classes=(0,))
+    tracker.predict()
+    _update(tracker, _box(2), classes=(1,))
+
+    # A new track has no velocity, so it stays put
+    np.testing.assert_allclose(tracker.predict(), _box(2), atol=1e-4)
+    assert tracker.classes.tolist() == [1]
+
+
+def test_tracks_the_detector_no_longer_sees_are_dropped():
+    tracker = IoUTracker()
+    _update(tracker, np.concatenate([_box(0), _box(100)]), classes=(0, 0))
+    _update(tracker, _box(0))
+    assert len(tracker.predict()) == 1
+    _update(tracker, np.zeros((0, 4)), classes=())
+    assert len(tracker.predict()) == 0
+    assert tracker.motion() == 0.0
+
+
+def test_kalman_tracker_learns_constant_velocity():
+    tracker = KalmanTracker()
+    # Keyframes every other frame, 4px apart: the object moves 2px per frame
+    for step in range(8):
+        _update(tracker, _box(step * 4.0))
+        predicted = tracker.predict()
+
+    assert predicted[0, 0] == pytest.approx(30.0, abs=0.5)
+    assert tracker.covariances.shape == (1, 8, 8)
+
+
+class _Detector:
+    """predict_batch stand-in: one box moving 2px per frame, recording which frames it saw"""
+
+    def __init__(self, speed=2.0):
+        self.speed = speed
+        self.calls = []
+
+    def __call__(self, frames):
+        self.calls.append([int(frame[0, 0, 0]) for frame in frames])
+        return [self._result(frame) for frame in frames]
+
+    def _result(self, frame):
+        x = int(frame[0, 0, 0]) * self.speed
+        data = torch.tensor([[x, 10, x + 20, 30, 0.9, 0]], dtype=torch.float32)
+        return Results(frame, path="", names=NAMES, boxes=data)
+
+
+def _frames(start, count):
+    # The frame index is stored in the first pixel so the fake detector can move its box
+    frames = []
+    for index in range(start, start + count):
+        frame = np.zeros((64, 128, 3), dtype=np.uint8)
+        frame[0, 0, 0] = index
+        frames.append(frame)
+    return frames
+
+
+def test_fixed_stride_detects_keyframes_in_one_batch_and_interpolates():
+    detector = _Detector()
+    strided = StridedDetector(detector, NAMES, stride=3)
+
+    first = strided.process(_frames(0, 4))
+    second = strided.process(_frames(4, 4))
+
+    assert detector.calls == [[0, 3], [6]]
+    assert strided.keyframes == 3
+    assert len(first) + len(second) == 8
+    # Frame 4 and 5 extrapolate the 2px/frame motion seen between keyframes 0 and 3
+    np.testing.assert_allclose(second[0].boxes.xyxy.numpy(), [[8, 10, 28, 30]], atol=1e-3)
+    np.testing.assert_allclose(second[1].boxes.xyxy.numpy(), [[10, 10, 30, 30]], atol=1e-3)
+    assert second[0].orig_shape == (64, 128)
+
+
+def test_fixed_stride_only_needs_keyframes_decoded():
+    strided = StridedDetector(_Detector(), NAMES, stride=4)
+    assert [strided.needs_frame(offset) for offset in range(6)] == [True, False, False, False, True, False]
+
+    # Skipped frames may arrive as None (grabbed, not decoded)
+    frames = _frames(0, 5)
+    results = strided.process([frames[0], None, None, None, frames[4]])
+    assert results[1].orig_shape == (64, 128)
+
+
+@pytest.mark.parametrize("motion_threshold, keyframes", [
+    (0.06, [0, 4, 6, 8, 10]),  # 2px/frame on a 20px box (motion 0.1) shrinks the gap to 2
+    (0.02, [0, 4, 5, 6, 7, 8, 9, 10, 11]),  # fast enough to detect every frame
+])
+def test_adaptive_stride_shrinks_the_gap_with_motion(motion_threshold, keyframes):
+    detector = _Detector(speed=2.0)
+    strided = StridedDetector(detector, NAMES, stride=4, adaptive=True, motion_threshold=motion_threshold)
+    assert strided.needs_frame(3)
+
+    strided.process(_frames(0, 12))
+
+    # The first gap is the full stride: motion is unknown until a second keyframe
+    assert [index for call in detector.calls for index in call] == keyframes
+
+
+def test_adaptive_stride_keeps_the_full_gap_for_still_objects():
+    detector = _Detector(speed=0.0)
+    strided = StridedDetector(detector, NAMES, stride=4, adaptive=True)
+    strided.process(_frames(0, 9))
+    assert [index for call in detector.calls for index in call] == [0, 4, 8]
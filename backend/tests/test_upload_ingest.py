@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("multipart")
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from app.services.upload_ingest import BodySizeLimitMiddleware, UploadTooLarge, ingest_upload, sniff_kind
+
+LIMIT = 1024
+
+
+def _client():
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_body=LIMIT, detail="too large")
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def _chunks(total: int, size: int = 256):
+    sent = 0
+    while sent < total:
+        yield b"x" * min(size, total - sent)
+        sent += size
+
+
+def test_small_upload_passes():
+    response = _client().post("/upload", files={"file": ("a.bin", b"x" * 100)})
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_declared_length_over_limit_is_rejected():
+    response = _client().post("/upload", files={"file": ("a.bin", b"x" * (LIMIT * 2))})
+    assert response.status_code == 413
+    assert response.json() == {"detail": "too large"}
+
+
+def test_chunked_body_without_length_is_rejected():
+    # A generator body goes out with Transfer-Encoding: chunked and no Content-Length
+    response = _client().post(
+        "/upload",
+        content=_chunks(LIMIT * 4),
+        headers={"content-type": "multipart/form-data; boundary=b"}
+    )
+    assert response.status_code == 413
+    assert response.json() == {"detail": "too large"}
+
+
+@pytest.mark.parametrize("head, kind", [
+    (b"\xff\xd8\xff\xe0\x00\x10JFIF", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n\x00\x00", "png"),
+    (b"BM\x36\x00\x00\x00", "bmp"),
+    (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "webp"),
+    (b"RIFF\x00\x00\x00\x00AVI LIST", "avi"),
+    (b"\x1a\x45\xdf\xa3\x01\x00", "mkv"),
+    (b"\x00\x00\x00\x18ftypisom", "mp4"),
+    (b"\x00\x00\x00\x14ftypqt  ", "mov"),
+    (b"\x00\x00\x00\x08wide\x00", "mov"),
+    (b"GIF89a\x01\x00", None),
+    (b"", None),
+])
+def test_sniff_kind(head, kind):
+    assert sniff_kind(head) == kind
+
+
+class _Upload:
+    """Just enough of UploadFile for ingest_upload"""
+
+    def __init__(self, data: bytes, size=None):
+        self._data = data
+        self.size = size
+
+    async def read(self, n: int) -> bytes:
+        chunk, self._data = self._data[:n], self._data[n:]
+        return chunk
+
+
+def test_ingest_hashes_and_sniffs_in_one_pass(tmp_path):
+    data = b"\x89PNG\r\n\x1a\n" + b"x" * 5000
+    upload = asyncio.run(ingest_upload(_Upload(data), tmp_path / "a.png", chunk_size=1000))
+    assert (upload.size, upload.kind, upload.data) == (len(data), "png", None)
+    assert upload.sha256 == hashlib.sha256(data).hexdigest()
+    assert (tmp_path / "a.png").read_bytes() == data
+
+
+def test_ingest_over_the_limit_removes_the_partial_file(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(ingest_upload(_Upload(b"x" * 5000), tmp_path / "a.mp4", max_size=2000, chunk_size=1000))
+    assert not (tmp_path / "a.mp4").exists()
+
+
+def test_webcam_frame_is_size_capped(monkeypatch):
+    pytest.importorskip("ultralytics")
+    from types import SimpleNamespace
+
+    from app.api.deps import get_current_user
+    from app.api.endpoints import detection
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "MAX_FILE_SIZE", 1000)
+    app = FastAPI()
+    app.include_router(detection.router, prefix="/api/predict")
+    app.state.yolo_service = SimpleNamespace(current_model="yolov8n.pt")
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=1)
+
+    response = TestClient(app).post(
+        "/api/predict/webcam/frame",
+        files={"file": ("frame.jpg", b"\xff\xd8\xff" + b"x" * 2000)}
+    )
+    assert response.status_code == 413
@@ -0,0 +1,167 @@
+import os
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic_settings")
+
+from app.models.database import Detection, User, UserDetectionStats
+from app.services import user_stats
+from app.services.detection_writer import DetectionWriter
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def _detection(created_at, objects=2, time=0.5, user_id=1, **extra):
+    return Detection(
+        user_id=user_id, file_name="a.jpg", file_type="image", model_used="yolov8n.pt", objects_detected=[],
+        total_objects=objects, processing_time=time, created_at=created_at, **extra
+    )
+
+
+def _stats(session_factory, user_id=1):
+    db = session_factory()
+    try:
+        stats = db.get(UserDetectionStats, user_id)
+        if stats is None:
+            return None
+        return (stats.detection_count, stats.total_objects, round(stats.total_processing_time, 6), stats.last_detection_at)
+    finally:
+        db.close()
+
+
+def test_orm_inserts_upsert_one_row_per_user(session_factory):
+    db = session_factory()
+    db.add(_detection(datetime(2024, 1, 2)))
+    db.commit()
+    assert _stats(session_factory) == (1, 2, 0.5, datetime(2024, 1, 2))
+
+    # The second flush hits ON CONFLICT and adds onto the existing row
+    db.add_all([_detection(datetime(2024, 1, 3), objects=3), _detection(datetime(2024, 1, 1), objects=0, time=None)])
+    db.commit()
+    db.close()
+    assert _stats(session_factory) == (3, 5, 1.0, datetime(2024, 1, 3))
+
+    db = session_factory()
+    assert db.query(UserDetectionStats).count() == 1
+    db.close()
+
+
+def test_last_detection_keeps_the_greatest_timestamp(session_factory):
+    db = session_factory()
+    connection = db.connection()
+    user_stats.record_added(connection, [{"user_id": 1, "total_objects": 1, "processing_time": 0.1, "created_at": None}])
+    assert db.get(UserDetectionStats, 1).last_detection_at is None
+
+    # NULL on either side must not wipe out the other
+    user_stats.record_added(connection, [{"user_id": 1, "created_at": datetime(2024, 5, 1)}])
+    user_stats.record_added(connection, [{"user_id": 1, "created_at": datetime(2024, 4, 1)}])
+    user_stats.record_added(connection, [{"user_id": 1, "created_at": None}])
+    db.commit()
+    db.close()
+
+    assert _stats(session_factory) == (4, 1, 0.1, datetime(2024, 5, 1))
+
+
+def test_delete_recomputes_the_latest_timestamp(session_factory):
+    db = session_factory()
+    older, newer = _detection(datetime(2024, 1, 1), objects=1), _detection(datetime(2024, 2, 1), objects=4)
+    db.add_all([older, newer])
+    db.commit()
+
+    db.delete(newer)
+    db.commit()
+    assert _stats(session_factory) == (1, 1, 0.5, datetime(2024, 1, 1))
+
+    db.delete(older)
+    db.commit()
+    db.close()
+    assert _stats(session_factory) == (0, 0, 0.0, None)
+
+
+def test_write_behind_batches_fold_into_the_stats(session_factory):
+    writer = DetectionWriter(session_factory, flush_interval=3600)
+    try:
+        for day in (3, 9, 5):
+            writer.submit({
+                "user_id": 1, "file_name": "a.jpg", "file_type": "image", "model_used": "yolov8n.pt",
+                "objects_detected": [], "total_objects": 2, "processing_time": 0.25, "created_at": datetime(2024, 3, day)
+            })
+        writer.flush()
+    finally:
+        writer.shutdown()
+
+    assert _stats(session_factory) == (3, 6, 0.75, datetime(2024, 3, 9))
+
+
+def test_admin_delete_updates_the_stats(session_factory, tmp_path):
+    pytest.importorskip("fastapi")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.api.deps import get_current_admin_user
+    from app.api.endpoints import admin
+    from app.database import get_db
+    from app.services.annotation import LazyAnnotationRenderer
+
+    db = session_factory()
+    db.add_all([
+        _detection(datetime(2024, 1, 1), id=1, result_path=str(tmp_path / "one.jpg")),
+        _detection(datetime(2024, 1, 2), id=2, objects=5, result_path=str(tmp_path / "two.jpg"))
+    ])
+    db.commit()
+    user = db.get(User, 1)
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(admin.router, prefix="/api/admin")
+    app.state.annotation_renderer = LazyAnnotationRenderer(tmp_path / "annotations", tmp_path, lambda p: p.read_bytes())
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_admin_user] = lambda: user
+
+    assert TestClient(app).delete("/api/admin/detection/2").status_code == 200
+    assert _stats(session_factory) == (1, 2, 0.5, datetime(2024, 1, 1))
+
+
+def test_backfill_rebuilds_from_detections(session_factory):
+    db = session_factory()
+    db.add_all([_detection(datetime(2024, 1, 1)), _detection(datetime(2024, 6, 1), objects=7)])
+    db.commit()
+    # Drift the incremental row so the rebuild has something to correct
+    db.get(UserDetectionStats, 1).detection_count = 99
+    db.commit()
+
+    assert user_stats.backfill(db) == 1
+    db.close()
+    assert _stats(session_factory) == (2, 9, 1.0, datetime(2024, 6, 1))
+
+
+def test_backfill_cli(session_factory, tmp_path):
+    db = session_factory()
+    db.add(_detection(datetime(2024, 1, 1)))
+    db.commit()
+    db.query(UserDetectionStats).delete()
+    db.commit()
+    db.close()
+
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'test.db'}"}
+    command = [sys.executable, "-m", "app.services.user_stats"]
+    result = subprocess.run(command + ["--backfill"], cwd=BACKEND, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert "Rebuilt detection stats for 1 users" in result.stdout
+    assert _stats(session_factory) == (1, 2, 0.5, datetime(2024, 1, 1))
+
+    result = subprocess.run(command, cwd=BACKEND, env=env, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "nothing to do" in result.stderr
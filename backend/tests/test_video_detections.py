@@ -0,0 +1,90 @@
+import warnings
+
+import numpy as np
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("ultralytics")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_user
+from app.api.endpoints import detection
+from app.database import get_db
+from app.models.database import Detection, User
+from app.services.detection_batch import DetectionBatch
+from app.services.frame_store import FrameDetectionWriter, sidecar_path
+
+NAMES = {0: "person", 2: "car"}
+
+
+def _frame(*objects):
+    if not objects:
+        return DetectionBatch.empty(NAMES)
+    class_ids, confidences = zip(*objects)
+    return DetectionBatch(
+        np.array([[0, 0, 10, 10]] * len(objects), dtype=np.float32),
+        np.array(confidences, dtype=np.float32),
+        np.array(class_ids, dtype=np.int32),
+        NAMES
+    )
+
+
+@pytest.fixture
+def client(session_factory, tmp_path):
+    result_path = tmp_path / "result.mp4"
+    writer = FrameDetectionWriter(sidecar_path(result_path), fps=10)
+    writer.append(_frame((0, 0.9), (2, 0.4)))
+    writer.append(_frame())
+    writer.append(_frame((2, 0.7)))
+    writer.close()
+
+    db = session_factory()
+    db.add(Detection(
+        id=1, user_id=1, file_name="clip.mp4", file_type="video", model_used="yolov8n.pt",
+        result_path=str(result_path), objects_detected=[], total_objects=3, processing_time=1.0
+    ))
+    db.commit()
+    user = db.get(User, 1)
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(detection.router, prefix="/api/predict")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_frames_are_grouped_and_serialize_cleanly(client):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        response = client.get("/api/predict/video/1/detections")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total_frames"], body["total_objects"], body["truncated"]) == (3, 3, False)
+    assert [(f["frame"], f["time"]) for f in body["frames"]] == [(0, 0.0), (2, 0.2)]
+    assert [o["class_name"] for o in body["frames"][0]["objects"]] == ["person", "car"]
+
+
+def test_filters_and_limit(client):
+    body = client.get("/api/predict/video/1/detections", params={"class_name": "car", "limit": 1}).json()
+    assert body["truncated"]
+    assert [f["frame"] for f in body["frames"]] == [0]
+    assert body["frames"][0]["objects"][0]["class_name"] == "car"
+
+    body = client.get("/api/predict/video/1/detections", params={"min_confidence": 0.5, "start": 0.1}).json()
+    assert [f["frame"] for f in body["frames"]] == [2]
+
+
+def test_unknown_video_is_a_404(client):
+    assert client.get("/api/predict/video/99/detections").status_code == 404
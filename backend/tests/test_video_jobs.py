@@ -0,0 +1,91 @@
+import time
+
+import pytest
+
+pytest.importorskip("cv2")
+pytest.importorskip("sqlalchemy")
+
+from app.models.database import Detection, VideoJob
+from app.services import video_jobs
+from app.services.detection_writer import DetectionWriter
+from app.services.video_jobs import VideoJobManager
+from app.services.video_pipeline import VideoCancelled
+
+
+class _InterruptedOnceService:
+    """detect_video that is interrupted after `first_run` seconds, then finishes in 0.5s on the resume"""
+
+    def __init__(self, first_run: float):
+        self.first_run = first_run
+        self.calls = 0
+
+    def detect_video(self, video_path, output_path, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(self.first_run)
+            raise VideoCancelled()
+        return 100, 0.5, {"objects": 7}
+
+
+@pytest.fixture
+def job_id(session_factory, monkeypatch, tmp_path):
+    monkeypatch.setattr(video_jobs, "SessionLocal", session_factory)
+    db = session_factory()
+    db.add(VideoJob(
+        id="job1",
+        user_id=1,
+        status="running",
+        file_name="clip.mp4",
+        file_path=str(tmp_path / "clip.mp4"),
+        result_path=str(tmp_path / "result_clip.mp4"),
+        model_used="yolov8n.pt"
+    ))
+    db.commit()
+    db.close()
+    return "job1"
+
+
+def _run_interrupted_then_resumed(manager):
+    manager._stopping.set()  # a shutdown: the job is checkpointed and re-queued
+    manager._run("job1")
+    manager._stopping.clear()
+    manager._run("job1")
+
+
+def test_processing_time_adds_up_across_resumes(session_factory, job_id):
+    manager = VideoJobManager(_InterruptedOnceService(first_run=0.2))
+    _run_interrupted_then_resumed(manager)
+
+    db = session_factory()
+    try:
+        job = db.get(VideoJob, job_id)
+        detection = db.get(Detection, job.detection_id)
+        assert job.status == "completed"
+        assert job.processing_time >= 0.7
+        assert detection.processing_time == pytest.approx(job.processing_time)
+        assert detection.total_objects == 7
+    finally:
+        db.close()
+
+
+def test_completed_job_is_recorded_through_write_behind(session_factory, job_id):
+    writer = DetectionWriter(session_factory, flush_interval=3600)
+    manager = VideoJobManager(_InterruptedOnceService(first_run=0.0), detection_writer=writer)
+    try:
+        _run_interrupted_then_resumed(manager)
+        db = session_factory()
+        try:
+            assert db.get(VideoJob, job_id).detection_id is None  # queued, not yet inserted
+        finally:
+            db.close()
+        writer.flush()
+    finally:
+        writer.shutdown()
+
+    db = session_factory()
+    try:
+        job = db.get(VideoJob, job_id)
+        assert job.detection_id is not None
+        assert db.get(Detection, job.detection_id).file_name == "clip.mp4"
+    finally:
+        db.close()
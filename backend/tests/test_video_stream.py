@@ -0,0 +1,134 @@
+import asyncio
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("ultralytics")
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.api.deps import authenticate_token, get_current_user
+from app.api.endpoints import detection
+from app.api.endpoints.detection import _parse_range, _read_file
+from app.core.security import create_access_token
+from app.database import get_db
+from app.models.database import User, VideoJob
+
+
+@pytest.mark.parametrize("header, requested", [
+    ("bytes=0-", (0, None)),
+    ("bytes=100-199", (100, 199)),
+    ("bytes=5-5", (5, 5)),
+    ("bytes=-500", (None, 500)),
+    ("bytes= 10-20", (10, 20)),
+    (None, None),
+    ("", None),
+    ("bytes=-", None),
+    ("bytes=20-10", None),
+    ("bytes=0-10,20-30", None),
+    ("bytes=a-b", None),
+    ("bytes=--5", None),
+    ("bytes=1.5-", None),
+    ("items=0-10", None),
+])
+def test_parse_range(header, requested):
+    assert _parse_range(header) == requested
+
+
+async def _collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+def test_read_file_range(tmp_path):
+    path = tmp_path / "result.mp4"
+    path.write_bytes(bytes(range(256)))
+    assert asyncio.run(_collect(_read_file(path, 10, 20))) == bytes(range(10, 20))
+    assert asyncio.run(_collect(_read_file(path, 250))) == bytes(range(250, 256))
+
+
+def test_read_file_follows_a_growing_file(tmp_path, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "VIDEO_STREAM_POLL_INTERVAL", 0.001)
+    path = tmp_path / "result.mp4"
+    path.write_bytes(b"moov")
+    polls = []
+
+    def follow():
+        # The writer appends twice, then finishes; bytes written before it stopped still arrive
+        polls.append(1)
+        if len(polls) <= 2:
+            with path.open("ab") as f:
+                f.write(b"frag")
+            return True
+        with path.open("ab") as f:
+            f.write(b"last")
+        return False
+
+    assert asyncio.run(_collect(_read_file(path, 0, follow=follow))) == b"moovfragfraglast"
+
+
+@pytest.fixture
+def stream_client(session_factory, tmp_path):
+    result_path = tmp_path / "result.mp4"
+    result_path.write_bytes(bytes(range(100)))
+    db = session_factory()
+    db.add(User(id=2, username="bob", email="bob@example.com", hashed_password="x"))
+    for job_id, user_id in (("job-a", 1), ("job-b", 2)):
+        db.add(VideoJob(
+            id=job_id, user_id=user_id, status="completed", file_name="clip.mp4",
+            file_path=str(tmp_path / "clip.mp4"), result_path=str(result_path), model_used="yolov8n.pt"
+        ))
+    db.commit()
+    alice = db.get(User, 1)
+    db.close()
+
+    def override_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(detection.router, prefix="/api/predict")
+    app.state.video_jobs = SimpleNamespace(is_running=lambda job_id: False)
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: alice
+    return TestClient(app)
+
+
+def test_stream_token_opens_only_its_own_job(stream_client):
+    response = stream_client.post("/api/predict/video/jobs/job-a/stream-token")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["expires_in"] == 300
+    assert body["stream_url"].startswith("/api/predict/video/jobs/job-a/stream?token=")
+
+    response = stream_client.get(body["stream_url"], headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == bytes(range(10, 20))
+
+    token = body["stream_url"].split("token=")[1]
+    assert stream_client.get("/api/predict/video/jobs/job-b/stream", params={"token": token}).status_code == 401
+    # Nor is a stream token accepted as a login
+    with pytest.raises(HTTPException) as error:
+        authenticate_token(token)
+    assert error.value.status_code == 401
+
+
+def test_stream_rejects_login_and_expired_tokens(stream_client):
+    login_token = create_access_token({"sub": "1"})
+    assert stream_client.get("/api/predict/video/jobs/job-a/stream", params={"token": login_token}).status_code == 401
+    assert stream_client.get("/api/predict/video/jobs/job-a/stream").status_code == 422
+
+    expired = create_access_token({"sub": "1", "scope": "video_stream", "job": "job-a"}, timedelta(seconds=-1))
+    assert stream_client.get("/api/predict/video/jobs/job-a/stream", params={"token": expired}).status_code == 401
+
+
+def test_stream_token_requires_access_to_the_job(stream_client):
+    assert stream_client.post("/api/predict/video/jobs/job-b/stream-token").status_code == 404
+    assert stream_client.post("/api/predict/video/jobs/missing/stream-token").status_code == 404
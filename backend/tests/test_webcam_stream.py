@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("ultralytics")
+
+from app.api.endpoints.detection import _apply_stream_params
+
+
+def _state():
+    return {"confidence": 0.25, "iou": 0.45, "model": "yolov8n.pt"}
+
+
+def _available(name):
+    return name == "yolov8s-oiv7.pt"
+
+
+def test_updates_thresholds_and_model():
+    state = _state()
+    assert _apply_stream_params(state, '{"confidence": 0.5, "iou": "0.3", "model": "yolov8s-oiv7.pt"}', _available)
+    assert state == {"confidence": 0.5, "iou": 0.3, "model": "yolov8s-oiv7.pt"}
+
+
+def test_thresholds_are_clamped():
+    state = _state()
+    _apply_stream_params(state, '{"confidence": 5, "iou": -1}', _available)
+    assert state["confidence"] == 1.0
+    assert state["iou"] == 0.0
+
+
+@pytest.mark.parametrize("text", [
+    "not json",
+    '"5"',
+    "[1]",
+    "null",
+    '{"confidence": "abc"}',
+    '{"confidence": null}',
+    '{"iou": [1]}',
+    '{"confidence": NaN}'
+])
+def test_malformed_messages_are_ignored(text):
+    state = _state()
+    assert not _apply_stream_params(state, text, _available)
+    assert state == _state()
+
+
+def test_unknown_model_is_ignored():
+    state = _state()
+    _apply_stream_params(state, '{"model": "missing.pt"}', _available)
+    _apply_stream_params(state, '{"model": 3}', _available)
+    assert state["model"] == "yolov8n.pt"
+
+
+def test_bad_token_closes_with_policy_violation():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+
+    from app.api.endpoints import detection
+
+    app = FastAPI()
+    app.include_router(detection.router, prefix="/api/predict")
+    with TestClient(app) as client:
+        with client.websocket_connect("/api/predict/webcam/ws?token=not-a-token") as websocket:
+            with pytest.raises(WebSocketDisconnect) as closed:
+                websocket.receive_text()
+    assert closed.value.code == 1008
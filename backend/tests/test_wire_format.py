@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.services import wire_format
+from app.services.detection_batch import DetectionBatch
+from app.services.wire_format import PACKED_HEADER, PACKED_MAGIC, encode_detections, negotiate
+
+NAMES = {0: "person", 2: "car", 7: "truck"}
+
+
+def _detections():
+    return DetectionBatch(
+        np.array([[1, 2, 3, 4], [10, 20, 30, 40]], dtype=np.float32),
+        np.array([0.9, 0.5], dtype=np.float32),
+        np.array([0, 2], dtype=np.int32),
+        NAMES
+    )
+
+
+@pytest.mark.parametrize("accept, fmt", [
+    (None, "json"),
+    ("", "json"),
+    ("*/*", "json"),
+    ("text/html", "json"),
+    ("application/x-yolo-detections", "packed"),
+    ("application/json;q=0.5, application/x-yolo-detections;q=0.9", "packed"),
+    ("application/x-yolo-detections;q=0.2, application/json", "json"),
+    ("Application/X-Msgpack", "msgpack"),
+    ("application/msgpack;q=bogus, application/json;q=0.1", "json"),
+])
+def test_negotiate(accept, fmt):
+    pytest.importorskip("msgpack")
+    assert negotiate(accept) == fmt
+
+
+def test_negotiate_falls_back_to_json_without_msgpack(monkeypatch):
+    monkeypatch.setattr(wire_format, "msgpack", None)
+    assert negotiate("application/msgpack") == "json"
+
+
+def test_json_keeps_the_response_shape():
+    body = json.loads(encode_detections("json", {"model_used": "yolov8n.pt"}, _detections()))
+    assert body["model_used"] == "yolov8n.pt"
+    assert body["total_objects"] == 2
+    assert [o["class_name"] for o in body["objects_detected"]] == ["person", "car"]
+
+
+def test_packed_round_trip():
+    data = encode_detections("packed", {"model_used": "yolov8n.pt"}, _detections())
+
+    magic, version, count, meta_len = PACKED_HEADER.unpack_from(data)
+    assert (magic, version, count) == (PACKED_MAGIC, 1, 2)
+    assert meta_len % 4 == 0
+    meta = json.loads(data[PACKED_HEADER.size:PACKED_HEADER.size + meta_len])
+    assert meta["names"] == {"0": "person", "2": "car"}  # only the classes present
+
+    offset = PACKED_HEADER.size + meta_len
+    boxes = np.frombuffer(data, "<f4", count * 4, offset).reshape(count, 4)
+    confidences = np.frombuffer(data, "<f4", count, offset + count * 16)
+    class_ids = np.frombuffer(data, "<u2", count, offset + count * 20)
+    np.testing.assert_array_equal(boxes, _detections().boxes)
+    np.testing.assert_array_equal(confidences, _detections().confidences)
+    np.testing.assert_array_equal(class_ids, [0, 2])
+    assert len(data) == offset + count * 22
+
+
+def test_msgpack_round_trip_and_name_table():
+    msgpack = pytest.importorskip("msgpack")
+    body = msgpack.unpackb(encode_detections("msgpack", {}, _detections(), names={}), strict_map_key=False)
+    assert body["total_objects"] == 2
+    assert body["names"] == {}
+    np.testing.assert_array_equal(np.frombuffer(body["class_ids"], "<u2"), [0, 2])
+
+
+def test_unknown_format_is_refused():
+    with pytest.raises(ValueError):
+        encode_detections("xml", {}, _detections())
@@ -17,6 +17,7 @@ const WebcamDetection = () => {
   const canvasRef = useRef(null);
   const streamRef = useRef(null);
   const animationRef = useRef(null);
+  const socketRef = useRef(null);
   const processingRef = useRef(false);
   const isDetectingRef = useRef(false);
   const isStreamingRef = useRef(false);
@@ -206,103 +207,92 @@ const WebcamDetection = () => {
     setFps(0);
   };
 
-  // Continuous detection loop - similar to desktop app's video processing
+  // Continuous detection loop over a persistent WebSocket. Frames are pushed on a
+  // timer; the server only processes the newest one and drops anything stale.
   useEffect(() => {
-    console.log('Detection useEffect - isDetecting:', isDetecting);
-    
     if (!isDetecting) {
-      console.log('Not detecting, returning');
       return;
     }
 
-    let frameCount = 0;
-    console.log('✅ Starting detection interval...');
-    
+    const socket = detectionAPI.openWebcamStream({
+      confidence: confidenceRef.current,
+      iou: iouRef.current,
+    });
+    socketRef.current = socket;
+    const sentAt = new Map();
+    let frameSeq = 0;
+
+    socket.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      const startTime = sentAt.get(data.frame_seq);
+      sentAt.clear();
+      processingRef.current = false;
+      setProcessing(false);
+
+      if (!data.success) {
+        if (data.error !== 'busy') {
+          console.error('❌ Detection error:', data.error);
+        }
+        return;
+      }
+
+      const objects = data.objects_detected || [];
+      setDetectionResults(objects);
+      drawDetections(objects);
+
+      if (startTime) {
+        setFps(Math.round(1000 / (performance.now() - startTime)));
+      }
+    };
+
+    socket.onclose = (event) => {
+      if (event.code === 1008) {
+        toast.error('Session expired. Please login again.');
+      }
+      if (isDetectingRef.current) {
+        setIsDetecting(false);
+        isDetectingRef.current = false;
+      }
+    };
+
     const detectionInterval = setInterval(async () => {
-      // Use refs to avoid closure issues
-      if (!videoRef.current || !isStreamingRef.current) {
-        console.log('⏭️ Skipping: no video or not streaming');
+      if (!videoRef.current || !isStreamingRef.current || !isDetectingRef.current) {
         return;
       }
-      
-      if (processingRef.current) {
-        console.log('⏭️ Skipping: already processing');
+      if (socket.readyState !== WebSocket.OPEN) {
         return;
       }
-      
-      if (!isDetectingRef.current) {
-        console.log('⏭️ Skipping: detection stopped');
+
+      const blob = await captureFrame();
+      if (!blob || socket.readyState !== WebSocket.OPEN) {
         return;
       }
-      
-      frameCount++;
-      console.log(`\n🎬 Frame ${frameCount}: Starting detection...`);
+
+      frameSeq += 1;
+      sentAt.set(frameSeq, performance.now());
       processingRef.current = true;
       setProcessing(true);
-      const startTime = performance.now();
-      
-      try {
-        // Capture frame  
-        const blob = await captureFrame();
-        if (!blob) {
-          console.log('❌ No blob returned from captureFrame');
-          processingRef.current = false;
-          setProcessing(false);
-          return;
-        }
-        
-        console.log('📸 Frame captured, blob size:', blob.size);
-        
-        // Send to backend for detection
-        const formData = new FormData();
-        formData.append('file', blob, 'frame.jpg');
-        formData.append('confidence', confidenceRef.current);
-        formData.append('iou', iouRef.current);
-
-        console.log('📤 Sending to API...');
-        const response = await detectionAPI.detectWebcamFrame(formData);
-        console.log('📥 API response received:', response);
-        
-        const data = response.data; // Axios returns data in response.data
-        if (data && data.success) {
-          const objects = data.objects_detected || [];
-          console.log(`✅ Detected ${objects.length} objects:`, objects.map(o => o.class_name).join(', '));
-          setDetectionResults(objects);
-          drawDetections(objects);
-          
-          // Calculate FPS
-          const endTime = performance.now();
-          const processingTime = endTime - startTime;
-          const currentFps = 1000 / processingTime;
-          setFps(Math.round(currentFps));
-          console.log(`⏱️ Processing time: ${processingTime.toFixed(0)}ms, FPS: ${Math.round(currentFps)}`);
-        }
-      } catch (error) {
-        console.error('❌ Detection error:', error);
-        if (error.response?.status === 401) {
-          toast.error('Session expired. Please login again.');
-          clearInterval(detectionInterval);
-          setIsDetecting(false);
-          isDetectingRef.current = false;
-        }
-      } finally {
-        processingRef.current = false;
-        setProcessing(false);
-      }
-    }, 200); // Process every 200ms for better performance
-    
+      socket.send(await blob.arrayBuffer());
+    }, 100);
+
     animationRef.current = detectionInterval;
-    console.log('✅ Detection interval started with ID:', detectionInterval);
 
     return () => {
-      console.log('🧹 Cleaning up detection interval');
-      if (detectionInterval) {
-        clearInterval(detectionInterval);
-      }
+      clearInterval(detectionInterval);
+      socket.close();
+      socketRef.current = null;
       processingRef.current = false;
     };
   }, [isDetecting]); // Only depend on isDetecting to start/stop the loop
 
+  // Push threshold changes to the open stream
+  useEffect(() => {
+    const socket = socketRef.current;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      socket.send(JSON.stringify({ confidence, iou }));
+    }
+  }, [confidence, iou]);
+
   useEffect(() => {
     return () => {
       // Cleanup on unmount
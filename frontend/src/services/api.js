@@ -48,10 +48,33 @@ export const detectionAPI = {
     headers: { 'Content-Type': 'multipart/form-data' },
     ...config,
   }),
+  submitVideoJob: (formData, config) => api.post('/api/predict/video/jobs', formData, {
+    headers: { 'Content-Type': 'multipart/form-data' },
+    ...config,
+  }),
+  getVideoJob: (jobId) => api.get(`/api/predict/video/jobs/${jobId}`),
+  listVideoJobs: (params) => api.get('/api/predict/video/jobs', { params }),
+  cancelVideoJob: (jobId) => api.post(`/api/predict/video/jobs/${jobId}/cancel`),
+  // Result video URL for a <video> element; plays while the job is still running.
+  // Its token is short-lived and only valid for this job, so fetch a fresh URL per playback
+  videoJobStreamUrl: async (jobId) => {
+    const { data } = await api.post(`/api/predict/video/jobs/${jobId}/stream-token`);
+    return `${API_BASE_URL}${data.stream_url}`;
+  },
   detectWebcamFrame: (formData, config) => api.post('/api/predict/webcam/frame', formData, {
     headers: { 'Content-Type': 'multipart/form-data' },
     ...config,
   }),
+  // Persistent WebSocket for live webcam detection (authenticates once on connect)
+  openWebcamStream: ({ confidence, iou }) => {
+    const params = new URLSearchParams({
+      token: localStorage.getItem('token') || '',
+      confidence,
+      iou,
+    });
+    const wsBase = API_BASE_URL.replace(/^http/, 'ws');
+    return new WebSocket(`${wsBase}/api/predict/webcam/ws?${params}`);
+  },
   getHistory: (params) => api.get('/api/predict/history', { params }),
   getModelInfo: () => api.get('/api/predict/model-info'),
 };
@@ -5,6 +5,11 @@ from tkinter import filedialog, ttk, messagebox
 from PIL import Image, ImageTk
 import threading
 import os
+import sys
+
+# Share the backend's columnar result type (pure numpy, no server dependencies)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from app.services.detection_batch import DetectionBatch
 
 class ObjectDetectionGUI:
     def __init__(self, root):
@@ -497,28 +502,17 @@ class ObjectDetectionGUI:
             self.results_text.insert(tk.END, f"🔴 LIVE DETECTION | {frame_info}\n")
             self.results_text.insert(tk.END, "=" * 50 + "\n\n")
         
-        if len(result.boxes) == 0:
+        detections = DetectionBatch.from_results(result)
+        if len(detections) == 0:
             self.results_text.insert(tk.END, "No objects detected\n")
             return
         
-        # Count detections by class
-        detections = {}
-        for box in result.boxes:
-            class_id = int(box.cls[0])
-            confidence = float(box.conf[0])
-            class_name = result.names[class_id]
-            
-            if class_name not in detections:
-                detections[class_name] = []
-            detections[class_name].append(confidence)
-        
         # Display results
-        self.results_text.insert(tk.END, f"Total Objects Detected: {len(result.boxes)}\n")
+        self.results_text.insert(tk.END, f"Total Objects Detected: {len(detections)}\n")
         self.results_text.insert(tk.END, "=" * 50 + "\n\n")
         
-        for class_name, confidences in sorted(detections.items()):
-            count = len(confidences)
-            avg_conf = sum(confidences) / count
+        # Count detections by class
+        for class_name, (count, avg_conf) in sorted(detections.summary().items()):
             self.results_text.insert(tk.END, f"• {class_name}: {count} (Avg confidence: {avg_conf:.2%})\n")
     
     def on_closing(self):